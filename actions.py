@@ -6,10 +6,14 @@
 # - list_of_words: the list of words in the command
 # - number_of_parameters: the number of parameters expected by the command
 # The functions return True if the command was executed successfully, False otherwise.
-# The functions print an error message if the number of parameters is incorrect.
+# The functions write an error message to game.output if the number of parameters is incorrect.
 # The error message is different depending on the number of parameters expected by the command.
 
 
+import os
+
+import snapshot
+
 # The error message is stored in the MSG0 and MSG1 variables and formatted with the command_word variable, the first word in the command.
 # The MSG0 variable is used when the command does not take any parameter.
 MSG0 = "\nLa commande '{command_word}' ne prend pas de paramètre.\n"
@@ -17,6 +21,8 @@ MSG0 = "\nLa commande '{command_word}' ne prend pas de paramètre.\n"
 MSG1 = "\nLa commande '{command_word}' prend 1 seul paramètre.\n"
 # The MSG3 variable is used when the command takes 3 parameters.
 MSG3 = "\nLa commande '{command_word}' prend 3 paramètres.\n"
+# The number of rooms per page of the 'history' command.
+HISTORY_PAGE_SIZE = 10
 
 class Actions:
     """ This class contains the methods that implement the actions of the game."""
@@ -26,7 +32,8 @@ class Actions:
     def go(game, list_of_words, number_of_parameters):
         """
         Move the player in the direction specified by the parameter.
-        The parameter must be a cardinal direction (N, E, S, O) or up/down(U, D).
+        The parameter must be a cardinal direction (N, E, S, O) or up/down(U, D),
+        in any spelling known to the direction lexicon (e.g. "nord", "Up", "descendre").
 
         Args:
             game (Game): The game object.
@@ -57,24 +64,90 @@ class Actions:
         # If the number of parameters is incorrect, print an error message and return False.
         if l != number_of_parameters + 1:
             command_word = list_of_words[0]
-            print(MSG1.format(command_word=command_word))
+            game.output.write(MSG1.format(command_word=command_word), "error")
             return False
 
-        # Get the direction from the list of words.
-        direction = list_of_words[1][0]
-        direction = direction.upper()
+        # Resolve the direction to its exit slot with the direction lexicon.
+        word = list_of_words[1]
+        direction = game.directions.get(word)
+        if direction is None:
+            direction = game.directions.get(word.lower())
         # if the direction is unrecognized, print an error message and return false.
-        if direction in game.directions :
+        if direction is not None :
             game.check_lose_conditions()
-            game.player.show_history()
             player.move(direction)
             
             return True
         # Move the player in the direction specified by the parameter.
         else:
-            print("\nTu ne peux pas aller par ici jeune sorcier...\n")
+            game.output.write("\nTu ne peux pas aller par ici jeune sorcier...\n", "error")
+            return False
+
+
+    @staticmethod
+    def goto(game, list_of_words, number_of_parameters):
+        """
+        Move the player along a shortest route to the room named by the parameter.
+
+        Each step is a normal move through Player.move, so quest objectives and
+        the move counter are updated as with 'go', and the non-player characters
+        move after every step. The route comes from the next-hop table of the
+        world graph, so each step costs O(1).
+
+        Args:
+            game (Game): The game object.
+            list_of_words (list): The list of words in the command.
+            number_of_parameters (int): The number of parameters expected by the command.
+
+        Returns:
+            bool: True if the command was executed successfully, False otherwise.
+
+        Examples:
+
+        >>> from game import Game
+        >>> from output import NullSink
+        >>> game = Game(NullSink())
+        >>> game.setup("TestPlayer")
+        >>> game.player.current_room = game.rooms[3]
+        >>> Actions.goto(game, ["goto", "bibliotheque"], 1)
+        True
+        >>> game.player.current_room.name
+        'Bibliotheque'
+        >>> Actions.goto(game, ["goto", "Gare"], 1)
+        False
+        """
+
+        l = len(list_of_words)
+        # If the number of parameters is incorrect, print an error message and return False.
+        if l != number_of_parameters + 1:
+            command_word = list_of_words[0]
+            game.output.write(MSG1.format(command_word=command_word), "error")
+            return False
+
+        # Find the destination in the world graph.
+        player = game.player
+        graph = game.graph
+        room_name = list_of_words[1]
+        target = graph.id_by_name(room_name)
+        if target is None:
+            game.output.write(f"\nLa pièce '{room_name}' n'existe pas.\n", "error")
+            return False
+        if player.current_room.id == target:
+            game.output.write(f"\nVous êtes déjà dans la pièce '{graph.names[target]}'.\n")
+            return True
+        if graph.next_hops.next_slot(player.current_room.id, target) is None:
+            game.output.write(f"\nAucun chemin ne mène à la pièce '{graph.names[target]}' d'ici.\n", "error")
             return False
 
+        # Follow the next-hop table one move at a time.
+        while player.current_room.id != target and not game.finished:
+            slot = graph.next_hops.next_slot(player.current_room.id, target)
+            if slot is None or not player.move(slot):
+                return False
+            game.check_lose_conditions()
+            game.tick_npcs()
+        return True
+
 
     @staticmethod
     def quit(game, list_of_words, number_of_parameters):
@@ -106,13 +179,13 @@ class Actions:
         # If the number of parameters is incorrect, print an error message and return False.
         if l != number_of_parameters + 1:
             command_word = list_of_words[0]
-            print(MSG0.format(command_word=command_word))
+            game.output.write(MSG0.format(command_word=command_word), "error")
             return False
         
         # Set the finished attribute of the game object to True.
         player = game.player
         msg = f"\nMerci {player.name} d'avoir joué à L'Ombre de Poudlard ! Au revoir et à bientôt pour de nouvelles aventures !\n"
-        print(msg)
+        game.output.write(msg)
         game.finished = True
         return True
 
@@ -148,20 +221,21 @@ class Actions:
         l = len(list_of_words)
         if l != number_of_parameters + 1:
             command_word = list_of_words[0]
-            print(MSG0.format(command_word=command_word))
+            game.output.write(MSG0.format(command_word=command_word), "error")
             return False
         
         # Print the list of available commands.
-        print("\nVoici les commandes disponibles:")
+        game.output.write("\nVoici les commandes disponibles:")
         for command in game.commands.values():
-            print("\t- " + str(command))
-        print()
+            game.output.write("\t- " + str(command))
+        game.output.write()
         return True
 
 
     def history(game, list_of_words, number_of_parameters):
         """
-        Print the history of rooms visited by the player.
+        Print one page of the history of rooms visited by the player, the most
+        recent rooms first: 'history' shows page 1, 'history 2' the rooms before.
         
         Args:
             game (Game): The game object.
@@ -186,18 +260,24 @@ class Actions:
         """
 
         # If the number of parameters is incorrect, print an error message and return False.
+        # The page number is optional.
         l = len(list_of_words)
-        if l != number_of_parameters + 1:
+        if l == number_of_parameters + 2 and list_of_words[-1].isdigit() and int(list_of_words[-1]) > 0:
+            page = int(list_of_words[-1])
+        elif l == number_of_parameters + 1:
+            page = 1
+        else:
             command_word = list_of_words[0]
-            print(MSG0.format(command_word=command_word))
+            game.output.write(MSG0.format(command_word=command_word), "error")
             return False
         
-        # Print the history of rooms visited by the player.
+        # Print the page of the history of rooms visited by the player.
         player = game.player
-        print("Historique des pièces visitées :\n")   
-        for room in player.get_history():
-            print(room.name)
-        print("\n")
+        pages = max(1, -(-len(player.history) // HISTORY_PAGE_SIZE))
+        game.output.write(f"Historique des pièces visitées (page {page}/{pages}, {len(player.visited)} pièces découvertes) :\n")
+        for room in player.get_history_page(page, HISTORY_PAGE_SIZE):
+            game.output.write(room.name)
+        game.output.write("\n")
         return True
 
         
@@ -231,19 +311,19 @@ class Actions:
         l = len(list_of_words)
         if l != number_of_parameters + 1:
             command_word = list_of_words[0]
-            print(MSG0.format(command_word=command_word))
+            game.output.write(MSG0.format(command_word=command_word), "error")
             return False
         
         # Move the player back to the previous room.
         player = game.player                                                            # Get the player object
         if len(player.history) <= 1:                                                    # Check if there's a previous room (need at least 2 rooms in history)
-            print("\nIl n'y a aucune pièce précédente dans l'historique !\n")           # Print error message
+            game.output.write("\nIl n'y a aucune pièce précédente dans l'historique !\n", "error")           # Print error message
             return False                                                                # Return False to indicate failure
         
         player.history.pop()                                                            # Remove the current room from history
         previous_room = player.history[-1]                                              # Get the room before current
         player.current_room = previous_room                                             # Set current room to previous room
-        print(player.current_room.get_long_description())                               # Print the description of the current room
+        game.output.write(player.current_room.get_long_description(), "room")                               # Print the description of the current room
         return True                                                                     # Return True to indicate success
     
 
@@ -277,18 +357,18 @@ class Actions:
         l = len(list_of_words)
         if l != number_of_parameters + 1:
             command_word = list_of_words[0]
-            print(MSG0.format(command_word=command_word))
+            game.output.write(MSG0.format(command_word=command_word), "error")
             return False
         
         # Print the inventory of the player.
         player = game.player
-        print("\nVoici ce qu'il y a dans ton inventaire :\n")
+        game.output.write("\nVoici ce qu'il y a dans ton inventaire :\n")
         if player.get_inventory():
             for item in player.get_inventory().values():
-                print(item)
+                game.output.write(item)
         else:
-            print("Oh ! On dirait bien que ton inventaire est vide.\n")
-        print("\n")
+            game.output.write("Oh ! On dirait bien que ton inventaire est vide.\n")
+        game.output.write("\n")
         return True
     
     
@@ -321,31 +401,13 @@ class Actions:
         l = len(list_of_words)
         if l != number_of_parameters + 1:
             command_word = list_of_words[0]
-            print(MSG0.format(command_word=command_word))
+            game.output.write(MSG0.format(command_word=command_word), "error")
             return False
         
-        # Print the inventory of the current room.
-        player = game.player
-        room = player.current_room
-        print(room.get_long_description())
-
-        # Print items present in the room (if any)
-        if room.get_inventory():
-            print("Objets présents dans la pièce :\n")
-            for item in room.get_inventory().values():
-                print(item)
-            print("\n")
-        else:
-            print("Il n'y a pas d'objet ici.\n")
-
-        # Print characters present in the room (if any)
-        if player.current_room.characters:
-            print("Personnages présents dans la pièce :\n")
-            for personnage in player.current_room.characters.values():
-                print(personnage)
-            print("\n")
-        else:
-            print("Il n'y a personne ici.\n")
+        # Print the description, the items and the characters of the current room
+        # (rendered again only when the room has changed).
+        for text, kind in game.player.current_room.get_look_lines():
+            game.output.write(text, kind)
         return True
     
 
@@ -382,7 +444,7 @@ class Actions:
         l = len(list_of_words)
         if l != number_of_parameters + 1:
             command_word = list_of_words[0]
-            print(MSG1.format(command_word=command_word))
+            game.output.write(MSG1.format(command_word=command_word), "error")
             return False
         
         # Take the item from the current room and add it to the player's inventory.
@@ -394,25 +456,25 @@ class Actions:
         if item_name in room.get_inventory():
             
             # Check if adding the item would exceed the player's max weight
-            if sum(float(item.weight) for item in player.get_inventory().values()) + float(room.get_inventory()[item_name].weight) <= player.max_weight:
-                item = room.get_inventory().pop(item_name)
-                player.get_inventory()[item_name] = item
-                print(f"\nVous avez pris l'objet : {item_name}\n")
+            item = room.get_inventory()[item_name]
+            if player.can_carry(item):
+                player.add_item(item_name, item, room.get_inventory())
+                game.output.write(f"\nVous avez pris l'objet : {item_name}\n")
                 
                 # Notify quest manager about taking items
                 if player.quest_manager:
                     player.quest_manager.complete_objective(f"take {item_name}")
                 
                 if item_name == "portoloin":
-                    print("\nEn prenant le portoloin, une sensation étrange vous envahit...\n"
+                    game.output.write("\nEn prenant le portoloin, une sensation étrange vous envahit...\n"
                           "le bouton en or se met à briller intensément et semble vous appeler.\n")
             
             else:
-                print(f"\nVous ne pouvez pas prendre l'objet '{item_name}', il est trop lourd.\n")  
+                game.output.write(f"\nVous ne pouvez pas prendre l'objet '{item_name}', il est trop lourd.\n", "error")  
                 return False
             return True
         else:
-            print(f"\nL'objet '{item_name}' n'est pas dans cette pièce.\n")
+            game.output.write(f"\nL'objet '{item_name}' n'est pas dans cette pièce.\n", "error")
             return False    
         
 
@@ -449,7 +511,7 @@ class Actions:
         l = len(list_of_words)
         if l != number_of_parameters + 1:
             command_word = list_of_words[0]
-            print(MSG1.format(command_word=command_word))
+            game.output.write(MSG1.format(command_word=command_word), "error")
             return False
         
         # Drop the item from the player's inventory and place it in the current room.
@@ -458,9 +520,8 @@ class Actions:
         item_name = list_of_words[1]
         # Check if the item is in the player's inventory
         if item_name in player.get_inventory():
-            item = player.get_inventory().pop(item_name)
-            room.get_inventory()[item_name] = item
-            print(f"\nVous avez déposé l'objet : {item_name}\n")
+            player.remove_item(item_name, room.get_inventory())
+            game.output.write(f"\nVous avez déposé l'objet : {item_name}\n")
             
             # Notify quest manager about dropping items
             if player.quest_manager:
@@ -468,7 +529,7 @@ class Actions:
             
             return True
         else:
-            print(f"\nL'objet '{item_name}' n'est pas dans votre inventaire.\n")
+            game.output.write(f"\nL'objet '{item_name}' n'est pas dans votre inventaire.\n", "error")
             return False
         
 
@@ -505,19 +566,19 @@ class Actions:
         l = len(list_of_words)
         if l != number_of_parameters + 1:
             command_word = list_of_words[0]
-            print(MSG0.format(command_word=command_word))
+            game.output.write(MSG0.format(command_word=command_word), "error")
             return False
         
         # Print the name of items in the inventory of the player.
         player = game.player
         # Check if the inventory is empty
         if not player.get_inventory():
-            print("\n Il n'y a aucun objet dans l'inventaire.\n")
+            game.output.write("\n Il n'y a aucun objet dans l'inventaire.\n")
         else:
-            print("\nVous disposez des items suivant :\n")
+            game.output.write("\nVous disposez des items suivant :\n")
             for _,item in player.get_inventory().items():
-                print(item.name)
-            print("\n")
+                game.output.write(item.name)
+            game.output.write("\n")
         return True
 
 
@@ -546,13 +607,82 @@ class Actions:
         l = len(list_of_words)
         if l != number_of_parameters + 1:
             command_word = list_of_words[0]
-            print(MSG0.format(command_word=command_word))
+            game.output.write(MSG0.format(command_word=command_word), "error")
             return False
 
         # Save the current room in the portoloin.
         save_room = game.player.current_room
         game.saved_room = save_room
-        print("\nLe portoloin enregistre cette pièce. Vous pourrez y revenir directement lorsque vous le souhaitez en utilisant la commande 'use'.\n")
+        game.output.write("\nLe portoloin enregistre cette pièce. Vous pourrez y revenir directement lorsque vous le souhaitez en utilisant la commande 'use'.\n")
+        return True
+
+
+    @staticmethod
+    def save(game, list_of_words, number_of_parameters):
+        """
+        Save the whole game under a name, to be resumed later with 'load'.
+
+        Args:
+            game (Game): The game object.
+            list_of_words (list): The list of words in the command.
+            number_of_parameters (int): The number of parameters expected by the command.
+
+        Returns:
+            bool: True if the command was executed successfully, False otherwise.
+        """
+
+        l = len(list_of_words)
+        if l != number_of_parameters + 1:
+            command_word = list_of_words[0]
+            game.output.write(MSG1.format(command_word=command_word), "error")
+            return False
+
+        # Write the snapshot of the game in the saves directory.
+        name = list_of_words[1]
+        try:
+            path = snapshot.save_path(name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            snapshot.save(game, path)
+        except (ValueError, OSError) as error:
+            game.output.write(f"\nImpossible de sauvegarder la partie : {error}\n", "error")
+            return False
+        game.output.write(f"\nPartie sauvegardée sous le nom '{name}'.\n")
+        return True
+
+
+
+    @staticmethod
+    def load(game, list_of_words, number_of_parameters):
+        """
+        Resume a game saved with 'save'.
+
+        Args:
+            game (Game): The game object.
+            list_of_words (list): The list of words in the command.
+            number_of_parameters (int): The number of parameters expected by the command.
+
+        Returns:
+            bool: True if the command was executed successfully, False otherwise.
+        """
+
+        l = len(list_of_words)
+        if l != number_of_parameters + 1:
+            command_word = list_of_words[0]
+            game.output.write(MSG1.format(command_word=command_word), "error")
+            return False
+
+        # Restore the snapshot of the game from the saves directory.
+        name = list_of_words[1]
+        try:
+            snapshot.load(game, snapshot.save_path(name))
+        except FileNotFoundError:
+            game.output.write(f"\nAucune sauvegarde nommée '{name}'.\n", "error")
+            return False
+        except (ValueError, OSError) as error:
+            game.output.write(f"\nImpossible de charger la partie : {error}\n", "error")
+            return False
+        game.output.write(f"\nPartie '{name}' chargée.\n")
+        game.output.write(game.player.current_room.get_long_description(), "room")
         return True
 
 
@@ -590,7 +720,7 @@ class Actions:
         l = len(list_of_words)
         if l != number_of_parameters + 1:
             command_word = list_of_words[0]
-            print(MSG1.format(command_word=command_word))
+            game.output.write(MSG1.format(command_word=command_word), "error")
             return False
         
         # Use the item from the player's inventory.
@@ -600,16 +730,16 @@ class Actions:
         # Check if the item is in the player's inventory
         if item_name in player.get_inventory():
             if item_name == "portoloin":
-                print("\nSoudain, une lumière éblouissante vous enveloppe et vous sentez une force mystérieuse vous transporter à un autre endroit...\n")
+                game.output.write("\nSoudain, une lumière éblouissante vous enveloppe et vous sentez une force mystérieuse vous transporter à un autre endroit...\n")
                 
                 # Ensure a room was saved with the portoloin before transporting
                 if getattr(game, 'saved_room', None) is None:
-                    print("\nLe portoloin n'a pas de destination enregistrée. Utilisez la commande 'charger' d'abord.\n")
+                    game.output.write("\nLe portoloin n'a pas de destination enregistrée. Utilisez la commande 'charger' d'abord.\n", "error")
                     return False
 
                 player.current_room = game.saved_room
-                print("\nVous vous retrouvez dans la pièce enregistrée précédemment avec le portoloin.\n")
-                print(player.current_room.get_long_description())
+                game.output.write("\nVous vous retrouvez dans la pièce enregistrée précédemment avec le portoloin.\n")
+                game.output.write(player.current_room.get_long_description(), "room")
                 
                 # Notify quest manager about using the portoloin
                 if player.quest_manager:
@@ -621,7 +751,7 @@ class Actions:
                 player.quest_manager.complete_objective(f"use {item_name}")
                 return True
             else:
-                print(f"\nL'objet '{item_name}' ne peut pas être utilisé maintenant.\n")
+                game.output.write(f"\nL'objet '{item_name}' ne peut pas être utilisé maintenant.\n", "error")
                 return False
 
 
@@ -658,7 +788,7 @@ class Actions:
         l = len(list_of_words)
         if l != number_of_parameters + 1:
             command_word = list_of_words[0]
-            print(MSG1.format(command_word=command_word))
+            game.output.write(MSG1.format(command_word=command_word), "error")
             return False
         
         # Read the book from the player's inventory.
@@ -667,30 +797,30 @@ class Actions:
         # Check if the item is in the player's inventory
         if item_name in player.get_inventory():
             if item_name == "detraqueurs":
-                print("\nLes Détraqueurs sont des créatures sombres et effrayantes qui se nourrissent du bonheur des êtres vivants.\n"
+                game.output.write("\nLes Détraqueurs sont des créatures sombres et effrayantes qui se nourrissent du bonheur des êtres vivants.\n"
                       "Ils sont souvent utilisés par les forces du mal pour semer la terreur.\n"
                       "Ils sont attirés par les émotions négatives et peuvent provoquer un sentiment de désespoir chez ceux qui les approchent.\n"
                       "Il est important de savoir comment les reconnaître et les éviter.\n"
                       "Heureusement, il existe des moyens de se protéger contre eux, notamment en utilisant le sortilège 'Expecto Patronum'.\n"
                       "Restez vigilant et méfiez-vous des Détraqueurs !\n")
             if item_name == "sortileges":  
-                print("En lisant le livre, vous découvrez un sortilège de protection contre les Détraqueurs : 'Expecto Patronum'.\n"
+                game.output.write("En lisant le livre, vous découvrez un sortilège de protection contre les Détraqueurs : 'Expecto Patronum'.\n"
                       "Pour utiliser ce sortilège, vous devez concentrer vos pensées sur un souvenir heureux et prononcer les mots magiques.\n"
                           "Vous sentez que vous avez appris quelque chose d'important.\n")
             if item_name == "loups":
-                print("Le livre raconte l'histoire des loups-garous, des êtres maudits qui se transforment lors des nuits de pleine lune.\n"
+                game.output.write("Le livre raconte l'histoire des loups-garous, des êtres maudits qui se transforment lors des nuits de pleine lune.\n"
                       "Il explique également comment les reconnaître et les éviter.\n")
             if item_name == "acromentules":
-                print("Le livre raconte l'histoire des Acromentules, des arachnides gigantesques et dangereux.\n"
+                game.output.write("Le livre raconte l'histoire des Acromentules, des arachnides gigantesques et dangereux.\n"
                       "Il explique également comment les reconnaître et les éviter.\n")
             if item_name == "trolls ":
-                print("Le livre raconte l'histoire des Trolls, des créatures massives et brutales.\n"
+                game.output.write("Le livre raconte l'histoire des Trolls, des créatures massives et brutales.\n"
                       "Il explique également comment les reconnaître et les éviter.\n")
             if item_name == "fantomes":
-                print("Le livre raconte l'histoire des Fantômes, des esprits errants des anciens habitants de Poudlard.\n"
+                game.output.write("Le livre raconte l'histoire des Fantômes, des esprits errants des anciens habitants de Poudlard.\n"
                       "Il explique également comment les reconnaître et les éviter.\n")
             if item_name == "papier":
-                print("En lisant le papier, vous découvrez un message mystérieux :\n"
+                game.output.write("En lisant le papier, vous découvrez un message mystérieux :\n"
                       "'Le chemin vers la vérité est caché dans l'ombre.\n")   
 
             # Notify quest manager about reading the book   
@@ -698,10 +828,10 @@ class Actions:
                 player.quest_manager.complete_objective(f"read {item_name}")
                 return True
             else:
-                print(f"\nL'objet '{item_name}' ne peut pas être lu.\n")
+                game.output.write(f"\nL'objet '{item_name}' ne peut pas être lu.\n", "error")
                 return False
         else:
-            print(f"\nL'objet '{item_name}' n'est pas dans votre inventaire.\n")
+            game.output.write(f"\nL'objet '{item_name}' n'est pas dans votre inventaire.\n", "error")
             return False
 
 
@@ -738,7 +868,7 @@ class Actions:
         l = len(list_of_words)
         if l != number_of_parameters + 1:
             command_word = list_of_words[0]
-            print(MSG1.format(command_word=command_word))
+            game.output.write(MSG1.format(command_word=command_word), "error")
             return False
         
         # Talk to a character in the current room.
@@ -749,7 +879,7 @@ class Actions:
         if character_name in room.characters:
             character = room.characters[character_name]
             messages = character.get_msg()
-            print(f"\n{character.name} dit : '{messages}'\n")
+            game.output.write(f"\n{character.name} dit : '{messages}'\n", "dialogue")
             
             # Notify quest manager about talk-related objectives
             if player.quest_manager:
@@ -757,7 +887,7 @@ class Actions:
                 player.quest_manager.check_action_objectives("talk", character_name)
             return True
         else:
-            print(f"\nLe personnage '{character_name}' n'est pas dans cette pièce.\n")
+            game.output.write(f"\nLe personnage '{character_name}' n'est pas dans cette pièce.\n", "error")
             return False
 
 
@@ -802,7 +932,7 @@ class Actions:
        n = len(list_of_words)
        if n != number_of_parameters + 1:
            command_word = list_of_words[0]
-           print(MSG0.format(command_word=command_word))
+           game.output.write(MSG0.format(command_word=command_word), "error")
            return False
 
 
@@ -855,7 +985,7 @@ class Actions:
        n = len(list_of_words)
        if n < number_of_parameters + 1:
            command_word = list_of_words[0]
-           print(MSG1.format(command_word=command_word))
+           game.output.write(MSG1.format(command_word=command_word), "error")
            return False
 
 
@@ -914,7 +1044,7 @@ class Actions:
        n = len(list_of_words)
        if n < number_of_parameters + 1:
            command_word = list_of_words[0]
-           print(MSG1.format(command_word=command_word))
+           game.output.write(MSG1.format(command_word=command_word), "error")
            return False
 
 
@@ -929,7 +1059,7 @@ class Actions:
 
        msg1 = f"\nImpossible d'activer la quête '{quest_title}'. "
        msg2 = "Vérifiez le nom ou si elle n'est pas déjà active.\n"
-       print(msg1 + msg2)
+       game.output.write(msg1 + msg2, "error")
        # print(f"\nImpossible d'activer la quête '{quest_title}'. \
        #             Vérifiez le nom ou si elle n'est pas déjà active.\n")
        return False
@@ -980,7 +1110,7 @@ class Actions:
          n = len(list_of_words)
          if n != number_of_parameters + 1:
               command_word = list_of_words[0]
-              print(MSG0.format(command_word=command_word))
+              game.output.write(MSG0.format(command_word=command_word), "error")
               return False
     
     
@@ -1029,7 +1159,7 @@ class Actions:
        n = len(list_of_words)
        if n != number_of_parameters + 1:
            command_word = list_of_words[0]
-           print(MSG0.format(command_word=command_word))
+           game.output.write(MSG0.format(command_word=command_word), "error")
            return False
 
 
@@ -1072,7 +1202,7 @@ class Actions:
         l = len(list_of_words)
         if l != number_of_parameters + 1:
             command_word = list_of_words[0]
-            print(MSG3.format(command_word=command_word))
+            game.output.write(MSG3.format(command_word=command_word), "error")
             return False
         
         # Give the item from the player's inventory to the character in the current room.
@@ -1084,19 +1214,18 @@ class Actions:
         if item_name in player.get_inventory():
             # Check if the character is in the room
             if character_name not in room.characters:
-                print(f"\nLe personnage '{character_name}' n'est pas dans cette pièce.\n")      
+                game.output.write(f"\nLe personnage '{character_name}' n'est pas dans cette pièce.\n", "error")      
                 return False
             else:
-                item = player.get_inventory().pop(item_name)
-                room.get_inventory()[item_name] = item
-                print(f"\n vous avez donné l'objet : {item_name} à : {character_name}\n")
+                player.remove_item(item_name, room.get_inventory())
+                game.output.write(f"\n vous avez donné l'objet : {item_name} à : {character_name}\n")
                 
                 # Notify quest manager about giving items
                 if player.quest_manager:
                     player.quest_manager.complete_objective(f"give {item_name} to {character_name}")    
             return True
         else:
-            print(f"\nL'objet '{item_name}' n'est pas dans cette pièce.\n")
+            game.output.write(f"\nL'objet '{item_name}' n'est pas dans cette pièce.\n", "error")
             return False
             
 
@@ -1133,7 +1262,7 @@ class Actions:
         l = len(list_of_words)
         if l != number_of_parameters + 1:
             command_word = list_of_words[0]
-            print(MSG0.format(command_word=command_word))
+            game.output.write(MSG0.format(command_word=command_word), "error")
             return False
         
         # Add the ingredient from the player's inventory to the cauldron.
@@ -1144,16 +1273,15 @@ class Actions:
         if item_name in player.get_inventory():
             # Check if the cauldron is in the player's inventory
             if "chaudron" in player.get_inventory():
-                item = player.get_inventory().pop(item_name)
-                room.get_inventory()[item_name] = item
-                print(f"\nVous avez ajouté l'ingrédient dans le chaudron : {item_name}\n")
+                player.remove_item(item_name, room.get_inventory())
+                game.output.write(f"\nVous avez ajouté l'ingrédient dans le chaudron : {item_name}\n")
                 
                 # Notify quest manager about adding items
                 if player.quest_manager:
                     player.quest_manager.complete_objective(f"add {item_name} to chaudron") 
                 return True
         else:
-            print(f"\nL'objet '{item_name}' n'est pas dans l'inventaire du joueur.\n")
+            game.output.write(f"\nL'objet '{item_name}' n'est pas dans l'inventaire du joueur.\n", "error")
             return False
 
 
@@ -1190,7 +1318,7 @@ class Actions:
         l = len(list_of_words)
         if l != number_of_parameters + 1:
             command_word = list_of_words[0]
-            print(MSG0.format(command_word=command_word))
+            game.output.write(MSG0.format(command_word=command_word), "error")
             return False
         
         # Cast the spell using an item from the player's inventory.
@@ -1198,16 +1326,16 @@ class Actions:
         spell_name = list_of_words[1]
         if spell_name == "expecto_patronum":
             if "baguette" in player.get_inventory():
-                print("\nVous lancez le sort Expecto Patronum avec succès !\n")
+                game.output.write("\nVous lancez le sort Expecto Patronum avec succès !\n")
                 
                 # Notify quest manager about casting the spell      
                 if player.quest_manager:
                     player.quest_manager.complete_objective("spell expecto_patronum")
                 return True
             else:
-                print("\nVous n'avez pas la baguette magique pour lancer ce sort.\n")
+                game.output.write("\nVous n'avez pas la baguette magique pour lancer ce sort.\n", "error")
                 return False
         else:
-            print(f"\nLe sort '{spell_name}' n'est pas reconnu.\n")
+            game.output.write(f"\nLe sort '{spell_name}' n'est pas reconnu.\n", "error")
             return False
         
\ No newline at end of file
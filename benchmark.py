@@ -0,0 +1,449 @@
+# Description: Micro-benchmark suite
+
+"""Benchmark module.
+
+This module times the hot paths of a turn, one operation at a time:
+
+- process_command.<word>: Game.process_command for each kind of command.
+- player.move.<world>: Player.move with every quest active, so the counter
+  and room objectives are checked on each move.
+- quest_manager.check_room_objectives.<world> and
+  quest_manager.check_action_objectives.<world>: the quest event lookups.
+- game.tick_npcs.<world>: the NPC movement step of the main loop.
+- actions.take.items-<N>: Actions.take in a room and an inventory holding
+  thousands of items.
+
+Every benchmark runs on the Poudlard world and, where size matters, on a
+world generated by the worldgen module (same seed, same world). Operations
+are timed one by one with the garbage collector disabled, after a warm-up;
+the state an operation changes (an item taken, a quest completed) is put
+back outside the timed section. Each benchmark runs several rounds and keeps
+the round with the lowest median, like timeit.
+
+Results are written as JSON. Given the JSON of an earlier run as a baseline,
+each median is compared with its baseline and the run fails (exit status 1)
+when one of them is slower by more than the threshold.
+
+Usage: python benchmark.py [-o FILE] [--baseline FILE] [--threshold 0.1]
+                           [-n ITERATIONS] [--repeat R] [--rooms N]
+                           [--topology T] [--items N] [--filter TEXT] [--json]
+"""
+
+import argparse
+import datetime
+import gc
+import itertools
+import json
+import os
+import platform
+import sys
+import time
+
+import worldgen
+from actions import Actions
+from game import Game
+from output import NullSink
+from world import WorldTemplate
+
+
+def measure(operation, reset=None, iterations=1000, warmup=100, repeat=3):
+    """
+    Time an operation.
+
+    Args:
+        operation (function): The operation, called without arguments.
+        reset (function): Called after each operation, outside the timed section.
+        iterations (int): The number of timed operations per round.
+        warmup (int): The number of operations run before the first round.
+        repeat (int): The number of rounds, the one with the lowest median is kept.
+
+    Returns:
+        dict: The iterations, the minimum, median, mean and 95th percentile
+              times in nanoseconds and the operations per second of the kept
+              round, and the median of every round.
+
+    Examples:
+
+    >>> stats = measure(lambda: sum(range(100)), iterations=50, warmup=5, repeat=2)
+    >>> stats["iterations"], len(stats["round_medians_ns"])
+    (50, 2)
+    >>> stats["min_ns"] <= stats["median_ns"] <= stats["p95_ns"]
+    True
+    """
+    timer = time.perf_counter_ns
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(warmup):
+            operation()
+            if reset is not None:
+                reset()
+        rounds = []
+        for _ in range(repeat):
+            samples = []
+            for _ in range(iterations):
+                start = timer()
+                operation()
+                samples.append(timer() - start)
+                if reset is not None:
+                    reset()
+            samples.sort()
+            rounds.append(samples)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    best = min(rounds, key=_median)
+    median = _median(best)
+    return {
+        "iterations": iterations,
+        "min_ns": best[0],
+        "median_ns": median,
+        "mean_ns": sum(best) / len(best),
+        "p95_ns": best[min(len(best) - 1, int(len(best) * 0.95))],
+        "ops_per_second": 1e9 / median if median else None,
+        "round_medians_ns": [_median(samples) for samples in rounds],
+    }
+
+
+
+def _median(samples):
+    """ Return the median of sorted samples. """
+    return samples[len(samples) // 2]
+
+
+
+class BenchmarkWorlds:
+    """
+    This class builds the worlds the benchmarks run on, once each.
+
+    Attributes:
+        rooms (int): The number of rooms of the generated world.
+        topology (str): The topology of the generated world.
+        items (int): The number of items of the take benchmark.
+        seed (int): The seed of the generated worlds and of the games.
+
+    Methods:
+        __init__(self, rooms=10000, topology="grid", items=5000, seed=0): The constructor.
+        generated_name(self): Return the name of the generated world in benchmark names.
+        template(self, name): Return the template of "poudlard", "generated" or "items".
+        game(self, name): Return a new game of a world with every quest active.
+    """
+
+
+    def __init__(self, rooms=10000, topology="grid", items=5000, seed=0):
+        """ Initialize the parameters of the generated worlds. """
+        self.rooms = rooms
+        self.topology = topology
+        self.items = items
+        self.seed = seed
+        self._templates = {}
+
+
+
+    def generated_name(self):
+        """ Return the name of the generated world in benchmark names. """
+        return f"{self.topology}-{self.rooms}"
+
+
+
+    def template(self, name):
+        """
+        Return the template of a world, compiling it on first use.
+
+        Args:
+            name (str): "poudlard", "generated" (rooms rooms, one quest for
+                        ten rooms) or "items" (one room holding items items).
+
+        Returns:
+            WorldTemplate: The template.
+        """
+        template = self._templates.get(name)
+        if template is None:
+            if name == "poudlard":
+                template = Game.default_template()
+            else:
+                if name == "generated":
+                    world = worldgen.generate(self.rooms, quests=self.rooms // 10,
+                                              topology=self.topology, seed=self.seed)
+                    file_name = f"bench-{self.generated_name()}-{self.seed}.json"
+                else:
+                    world = worldgen.generate(1, items=self.items, characters=0, quests=1, seed=self.seed)
+                    file_name = f"bench-items-{self.items}-{self.seed}.json"
+                path = os.path.join(worldgen.GENERATED_DIR, file_name)
+                worldgen.write(world, path)
+                template = WorldTemplate.compile(Game, path)
+            self._templates[name] = template
+        return template
+
+
+
+    def game(self, name):
+        """ Return a new game of a world, silent, seeded and with every quest active. """
+        game = Game(NullSink(), seed=self.seed)
+        game.setup("Bench", self.template(name))
+        game.process_command("activate_all")
+        return game
+
+
+
+def _room(game, name):
+    """ Return the room of a game with this name. """
+    return game.rooms[game.graph.id_by_name(name)]
+
+
+
+def _cycle(values):
+    """ Return a function returning the values one after the other, forever. """
+    return itertools.cycle(values).__next__
+
+
+
+def process_command_cases(worlds):
+    """ Yield the (name, setup) cases of Game.process_command, setup returning (operation, reset, warmup). """
+    for label, command in [("look", "look"), ("inventory", "inventory"), ("quests", "quests"), ("help", "help"),
+                           ("history", "history"), ("talk", "talk Dumbledore"), ("unknown", "dance")]:
+        def setup(command=command):
+            game = worlds.game("poudlard")
+            game.player.enter(_room(game, "Banquet"))
+            return (lambda: game.process_command(command)), None, 100
+        yield f"process_command.{label}", setup
+
+    def setup_go():
+        game = worlds.game("poudlard")
+        game.player.enter(_room(game, "Entree"))
+        commands = _cycle(["go E", "go O"])
+        return (lambda: game.process_command(commands())), None, 100
+    yield "process_command.go", setup_go
+
+    def setup_take():
+        game = worlds.game("poudlard")
+        banquet = _room(game, "Banquet")
+        game.player.enter(banquet)
+        return ((lambda: game.process_command("take cookies")),
+                (lambda: game.player.remove_item("cookies", banquet.inventory)), 100)
+    yield "process_command.take", setup_take
+
+    def setup_drop():
+        game = worlds.game("poudlard")
+        banquet = _room(game, "Banquet")
+        game.player.enter(banquet)
+        game.process_command("take cookies")
+        return ((lambda: game.process_command("drop cookies")),
+                (lambda: game.player.add_item("cookies", banquet.inventory["cookies"], banquet.inventory)), 100)
+    yield "process_command.drop", setup_drop
+
+
+
+def player_move_cases(worlds):
+    """ Yield the cases of Player.move, back and forth through one exit. """
+    for name, label in (("poudlard", "poudlard"), ("generated", worlds.generated_name())):
+        def setup(name=name):
+            game = worlds.game(name)
+            player = game.player
+            if name == "poudlard":
+                player.enter(_room(game, "Entree"))
+                directions = ["E", "O"]
+            else:
+                direction, _ = next(iter(player.current_room.exits.items()))
+                directions = [direction, worldgen.OPPOSITES[direction]]
+            moves = _cycle(directions)
+            return (lambda: player.move(moves())), None, 100
+        yield f"player.move.{label}", setup
+
+
+
+def quest_manager_cases(worlds):
+    """ Yield the cases of the room and action objective lookups of the QuestManager. """
+    for name, label in (("poudlard", "poudlard"), ("generated", worlds.generated_name())):
+        def setup_rooms(name=name):
+            game = worlds.game(name)
+            manager = game.player.quest_manager
+            room_names = [room.name for room in game.rooms]
+            rooms = _cycle(room_names)
+            # Warm up over every room so that the objectives they complete are completed before timing
+            return (lambda: manager.check_room_objectives(rooms())), None, len(room_names)
+        yield f"quest_manager.check_room_objectives.{label}", setup_rooms
+
+        def setup_actions(name=name):
+            game = worlds.game(name)
+            manager = game.player.quest_manager
+            item_names = [item.name for item in game.items.catalog]
+            targets = _cycle(item_names)
+            return (lambda: manager.check_action_objectives("take", targets())), None, len(item_names)
+        yield f"quest_manager.check_action_objectives.{label}", setup_actions
+
+
+
+def tick_npcs_cases(worlds):
+    """ Yield the cases of the NPC movement step. """
+    for name, label in (("poudlard", "poudlard"), ("generated", worlds.generated_name())):
+        def setup(name=name):
+            return worlds.game(name).tick_npcs, None, 100
+        yield f"game.tick_npcs.{label}", setup
+
+
+
+def take_cases(worlds):
+    """ Yield the case of Actions.take in a room and an inventory holding many items. """
+    def setup():
+        game = worlds.game("items")
+        player = game.player
+        room = player.current_room
+        player.max_weight = float("inf")
+        names = list(room.inventory)
+        for item_name in names[::2]:
+            player.add_item(item_name, room.inventory[item_name], room.inventory)
+        targets = _cycle(names[1::2])
+        taken = []
+
+        def take():
+            taken.append(targets())
+            Actions.take(game, ["take", taken[-1]], 1)
+
+        def put_back():
+            item_name = taken.pop()
+            player.remove_item(item_name, room.inventory)
+
+        return take, put_back, 100
+    yield f"actions.take.items-{worlds.items}", setup
+
+
+
+# The benchmark groups, in the order they are run.
+SUITE = (process_command_cases, player_move_cases, quest_manager_cases, tick_npcs_cases, take_cases)
+
+
+
+def run(worlds, iterations=1000, repeat=3, name_filter=None):
+    """
+    Run the benchmark suite.
+
+    Args:
+        worlds (BenchmarkWorlds): The worlds to run on.
+        iterations (int): The number of timed operations per round.
+        repeat (int): The number of rounds per benchmark.
+        name_filter (str): Only run the benchmarks whose name contains this text.
+
+    Returns:
+        dict: The "meta" data of the run and the "results" of each benchmark, by name.
+    """
+    results = {}
+    for cases in SUITE:
+        for name, setup in cases(worlds):
+            # Filter on the name first, so that only the worlds of the selected cases are built
+            if name_filter and name_filter not in name:
+                continue
+            operation, reset, warmup = setup()
+            results[name] = measure(operation, reset, iterations, warmup, repeat)
+    return {
+        "meta": {
+            "date": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "iterations": iterations,
+            "repeat": repeat,
+            "rooms": worlds.rooms,
+            "topology": worlds.topology,
+            "items": worlds.items,
+            "seed": worlds.seed,
+        },
+        "results": results,
+    }
+
+
+
+def compare(report, baseline, threshold=0.1):
+    """
+    Compare the medians of a run with those of a baseline run.
+
+    Args:
+        report (dict): The run, as returned by run.
+        baseline (dict): The baseline run, as returned by run or loaded from its JSON.
+        threshold (float): The relative change above which a benchmark is a
+                           regression (slower) or an improvement (faster).
+
+    Returns:
+        dict: The baseline median, median, ratio and status ("regression",
+              "improvement", "unchanged" or "new") of each benchmark, by name.
+
+    Examples:
+
+    >>> old = {"results": {"look": {"median_ns": 1000}, "go": {"median_ns": 1000}}}
+    >>> new = {"results": {"look": {"median_ns": 1200}, "go": {"median_ns": 1050}}}
+    >>> {name: row["status"] for name, row in compare(new, old).items()}
+    {'look': 'regression', 'go': 'unchanged'}
+    """
+    comparison = {}
+    for name, stats in report["results"].items():
+        reference = baseline["results"].get(name)
+        if reference is None:
+            comparison[name] = {"baseline_ns": None, "median_ns": stats["median_ns"], "ratio": None, "status": "new"}
+            continue
+        ratio = stats["median_ns"] / reference["median_ns"] if reference["median_ns"] else float("inf")
+        if ratio > 1 + threshold:
+            status = "regression"
+        elif ratio < 1 - threshold:
+            status = "improvement"
+        else:
+            status = "unchanged"
+        comparison[name] = {"baseline_ns": reference["median_ns"], "median_ns": stats["median_ns"],
+                            "ratio": ratio, "status": status}
+    return comparison
+
+
+
+def format_report(report, comparison=None):
+    """ Return the results, and their comparison with a baseline if any, as text. """
+    meta = report["meta"]
+    lines = [f"Python {meta['python']} ({meta['implementation']}), {meta['iterations']} opérations x {meta['repeat']} tours"]
+    for name, stats in report["results"].items():
+        line = f"  {name:<52} médiane {stats['median_ns'] / 1000:10.2f} µs  p95 {stats['p95_ns'] / 1000:10.2f} µs"
+        if comparison is not None:
+            row = comparison[name]
+            if row["ratio"] is not None:
+                line += f"  x{row['ratio']:.2f} {row['status']}"
+            else:
+                line += f"  {row['status']}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+
+def main():
+    # Parse the command line, run the suite, write and compare the results
+    parser = argparse.ArgumentParser(description="Micro-benchmarks des commandes de L'Ombre de Poudlard.")
+    parser.add_argument("-o", "--output", default=None, help="fichier JSON des résultats")
+    parser.add_argument("--baseline", default=None, help="fichier JSON d'une exécution de référence")
+    parser.add_argument("--threshold", type=float, default=0.1, help="écart relatif toléré (0.1 = 10%%)")
+    parser.add_argument("-n", "--iterations", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--rooms", type=int, default=10000)
+    parser.add_argument("--topology", choices=worldgen.TOPOLOGIES, default="grid")
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--filter", default=None, help="ne lancer que les benchmarks dont le nom contient ce texte")
+    parser.add_argument("--json", action="store_true", help="afficher les résultats en JSON")
+    args = parser.parse_args()
+
+    worlds = BenchmarkWorlds(args.rooms, args.topology, args.items, args.seed)
+    report = run(worlds, args.iterations, args.repeat, args.filter)
+    comparison = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            comparison = compare(report, json.load(file), args.threshold)
+        report["comparison"] = comparison
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print(format_report(report, comparison))
+    if comparison and any(row["status"] == "regression" for row in comparison.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
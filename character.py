@@ -10,13 +10,15 @@ class Character :
         description (str): The description of the character.
         current_room (Room): The current room where the character is located.
         msgs (list): A list of messages that the character can say.
+        msg_index (int): The position of the next message to say.
         movable (bool): Indicates if the character can move between rooms.
    
     Methods:
         __init__(self, name, description, current_room=None, msgs=None, movable=True): The constructor of the class.
         __str__(self): Returns the string representation of the character.
         get_msg(self): Returns a message from the character.
-        move(self): Moves the character to a random adjacent room if movable.
+        fork(self, current_room): Returns a copy of the character placed in another room.
+        move(self, rng=random, graph=None): Moves the character to a random adjacent room if movable.
         movable_status(self): Returns the movable status of the character.
     """
 
@@ -27,7 +29,7 @@ class Character :
         self.description = description
         self.current_room = current_room
         self.msgs = msgs.copy() if msgs else []
-        self.msgs_init = self.msgs.copy()  # Store initial messages for reset
+        self.msg_index = 0  # Position of the next message, wraps around to the start
         self.movable = movable
 
         # Register character in the room if provided
@@ -44,22 +46,65 @@ class Character :
 
     def get_msg(self):
         """ Return the messages of the character. """
-        if not self.msgs:  # if the list is empty
-            self.msgs = self.msgs_init.copy()  # Reset to initial messages
-        return self.msgs.pop(0)  # Return and remove the first message
-
-
-
-    def move(self):
-        """ Move the character to a random adjacent room if movable. """
+        if self.msg_index >= len(self.msgs):  # if every message has been said
+            self.msg_index = 0  # Start again from the first message
+        message = self.msgs[self.msg_index]
+        self.msg_index += 1
+        return message
+
+
+
+    def fork(self, current_room):
+        """
+        Return a copy of the character placed in the given room.
+
+        The description and messages are shared with the original, only the
+        position and the dialogue cursor belong to the copy.
+        """
+        character = Character.__new__(Character)
+        character.name = self.name
+        character.description = self.description
+        character.msgs = self.msgs
+        character.msg_index = self.msg_index
+        character.movable = self.movable
+        character.current_room = current_room
+        if current_room is not None:
+            current_room.characters[character.name] = character
+        return character
+
+
+
+    def move(self, rng=random, graph=None):
+        """
+        Move the character to a random adjacent room if movable.
+
+        Args:
+            rng: The random number generator to draw from (default: the random
+                 module). Games pass their own seeded generator.
+            graph (WorldGraph): The graph of the rooms, to pick the exit over
+                 room ids (Game.tick_npcs passes the graph of the game).
+                 Without it, the neighbours of the room are used.
+
+        Returns:
+            bool: True if the character moved, False otherwise.
+        """
+        room = self.current_room
         # No movement possible without a current room or exits
-        if not self.current_room or not self.current_room.exits:
+        if not room:
+            return False
+        if graph is not None:
+            if graph.offsets[room.id] == graph.offsets[room.id + 1]:
+                return False
+        elif not room.neighbours:
             return False
 
         # 50% chance to move
-        if random.choice([0, 1]) == 0 :
+        if rng.choice([0, 1]) == 0 :
             # Select a random exit
-            target = random.choice(list(self.current_room.exits.values()))
+            if graph is not None:
+                target = graph.room(graph.random_neighbour(room.id, rng))
+            else:
+                target = rng.choice(room.neighbours)
 
             # Remove from current room and add to target
             self.current_room.characters.pop(self.name, None)
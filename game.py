@@ -2,13 +2,17 @@
 
 # Import modules
 
-from room import Room
-from player import Player
+import random
+import sys
+import time
+
+import worldfile
+from profiler import SamplingProfiler, install_signal_handler
+from room import DIRECTION_LEXICON
 from command import Command
 from actions import Actions
-from item import Item
-from character import Character
-from quest import Quest, QuestManager
+from world import WorldTemplate
+from output import STDOUT, BufferedSink
 
 class Game:
     """
@@ -20,49 +24,181 @@ class Game:
     
     Attributes:
         finished (bool): Flag indicating whether the game has ended.
+        outcome (str): "win" or "lose" once the game has ended that way, None otherwise.
+        session_id (str): Identifier of the headless session driving this game, if any.
+        output (OutputSink): The sink every message of the game is written to.
+        seed (int): The seed of the game's random number generator.
+        deterministic (bool): Whether the seed was chosen by the caller.
+        rng (random.Random): The generator every random behaviour of the game draws from.
         rooms (list): List of all Room objects in the game.
+        graph (WorldGraph): The integer graph of the rooms, room ids are positions in rooms.
+        items (ItemLocations): Where every item of the game is.
         commands (dict): Dictionary mapping command names to Command objects.
         player (Player): The player object controlling the game.
-        directions (set): Set of valid direction tokens (N, S, E, O, U, D, etc.).
+        directions (dict): The direction lexicon, mapping every spelling of a direction to its exit slot.
+        start_room (Room): The room where the player starts.
+        main_quest (str): The title of the quest that wins the game.
+        losing_rooms (frozenset): The names of the rooms that lose the game.
+        victory (tuple): The lines shown when the game is won, from the world file.
+        characters (list): Every non-player character, in a stable order.
+        movable_characters (list): The characters that can move, in a stable order.
+        journal (SessionJournal): The journal of the accepted commands, None when not journaled.
+        metrics (Metrics): The metrics the commands are recorded in, None when not measured.
     
     Methods:  
-        __init__(self) : The constructor.
-        setup(self) : Initializes all game elements (rooms, items, characters, commands, player, quests).
+        __init__(self, output=None, seed=None) : The constructor.
+        set_output(self, output) : Sets the sink of the game, the player and the quests.
+        set_metrics(self, metrics) : Sets the metrics of the game and of the quests.
+        setup(self, player_name=None, template=None) : Creates the player and a fresh copy of the world.
+        default_template(cls) : Returns the world template shared by every game of the process.
+        build_world(self, quest_manager, world_file=worldfile.DEFAULT_WORLD) : Builds all game elements from the commands and a world file.
         play(self) : Main game loop that processes player commands until the game ends.
         print_welcome(self) : Displays the welcome message and starting room description.
         process_command(self, command_string) : Parses and executes a player command.   
-        _setup_quests(self) : Initializes all quests available in the game.
-        def check_win_conditions(self) : Checks if the player has met the conditions to win the game.
+        play_turn(self, command_string) : Runs one full turn (command, end conditions, NPC moves).
+        tick_npcs(self) : Moves every movable non-player character once.
+        def win(self, quest=None) : Ends the game as won, called as soon as the main quest is completed.
         def check_lose_conditions(self) : Checks if the player has met the conditions to lose the game.
 
     """
 
+    # The world template shared by every game of the process, built on first use.
+    _default_template = None
+
 
     # Constructor
-    def __init__(self):
+    def __init__(self, output=None, seed=None):
         """
         Initialize a new Game object.
         
         Sets up the initial game state with empty collections and no player.
+
+        Passing a seed puts the game in deterministic mode: the same seed and
+        the same commands always produce the same game. Without a seed, one is
+        drawn from the system so that the game can still be replayed later.
+
+        Args:
+            output (OutputSink): The sink to write messages to (default: stdout).
+            seed (int): The seed of the game's random number generator.
         """
         self.finished = False
         self.rooms = []
+        self.graph = None
+        self.items = None
         self.commands = {}
         self.player = None
-        self.directions = set()
-    
+        self.directions = {}
+        self.start_room = None
+        self.main_quest = None
+        self.losing_rooms = frozenset()
+        self.victory = tuple(worldfile.DEFAULT_VICTORY)
+        self.characters = []
+        self.movable_characters = []
+        self.journal = None
+        self.metrics = None
+        self.outcome = None
+        self.session_id = None
+        self.output = output if output is not None else STDOUT
+        self.deterministic = seed is not None
+        self.seed = seed if seed is not None else random.SystemRandom().randrange(2**32)
+        self.rng = random.Random(self.seed)
+
+
+    # Set the output sink
+    def set_output(self, output):
+        """
+        Set the sink of the game, its player and the player's quests.
+
+        Args:
+            output (OutputSink): The sink to write messages to.
+        """
+        self.output = output
+        if self.player is not None:
+            self.player.output = output
+            if self.player.quest_manager is not None:
+                self.player.quest_manager.set_output(output)
+
+
+    # Set the metrics
+    def set_metrics(self, metrics):
+        """
+        Set the metrics the commands of the game and the checks of its quests are recorded in.
+
+        Args:
+            metrics (Metrics): The metrics, usually shared by every game of the process, or None.
+        """
+        self.metrics = metrics
+        if self.player is not None and self.player.quest_manager is not None:
+            self.player.quest_manager.metrics = metrics
+
+
     # Setup the game
-    def setup(self):
+    def setup(self, player_name=None, template=None):
+        """
+        Initialize the game from a world template.
+
+        The world is forked from the template so that only the mutable state
+        (item locations, character positions, dialogue cursors and quest
+        progress) is created for this game.
+
+        Args:
+            player_name (str): The name of the player. When None, the name is
+                               read from the terminal.
+            template (WorldTemplate): The world to play in (default: the
+                                      process-wide template).
+        """
+        if template is None:
+            template = Game.default_template()
+        if player_name is None:
+            player_name = input("\nEntrez votre nom: ")
+        template.fork(self, player_name)
+        self.set_output(self.output)
+        self.set_metrics(self.metrics)
+
+        # Win as soon as the main quest is completed, then activate it
+        self.player.quest_manager.add_completion_callback(self.main_quest, self.win)
+        self.player.quest_manager.activate_quest(self.main_quest)
+
+
+
+    @classmethod
+    def default_template(cls):
         """
-        Initialize and configure all game elements.
+        Return the world template shared by every game of the process.
+
+        The template is compiled the first time it is needed.
+
+        Returns:
+            WorldTemplate: The shared template.
+        """
+        if cls._default_template is None:
+            cls._default_template = WorldTemplate.compile(cls)
+        return cls._default_template
+
+
+
+    # Build the world
+    def build_world(self, quest_manager, world_file=worldfile.DEFAULT_WORLD):
+        """
+        Create and configure all game elements.
         
         This method sets up:
         - All available commands with their descriptions and actions
         - All rooms with their descriptions and connections
         - All items distributed across rooms
         - All characters positioned in specific rooms
-        - The player object and starting position
-        - All quests for the player
+        - The starting room, the main quest and the losing rooms
+        - All quests, added to the given quest manager
+
+        Everything but the commands is read from a world file (see the
+        worldfile module), through its compiled cache.
+
+        Args:
+            quest_manager (QuestManager): The quest manager receiving the quests.
+            world_file (str): The world file (default: the Poudlard adventure).
+
+        Raises:
+            ValueError: If the world file is not valid.
         """
 
         # Setup commands
@@ -73,7 +209,9 @@ class Game:
         self.commands["quit"] = quit
         go = Command("go", " <direction> : se déplacer dans une direction cardinale (N, E, S, O) ou monter (U) ou descendre (D)", Actions.go, 1)
         self.commands["go"] = go
-        history = Command("history", " : afficher l'historique des pièces visitées", Actions.history, 0)
+        goto = Command("goto", " <pièce> : aller jusqu'à une pièce par le chemin le plus court", Actions.goto, 1)
+        self.commands["goto"] = goto
+        history = Command("history", " [page] : afficher l'historique des pièces visitées", Actions.history, 0)
         self.commands["history"] = history  
         back = Command("back", " : revenir à la pièce précédente", Actions.back, 0)
         self.commands["back"] = back
@@ -89,6 +227,10 @@ class Game:
         self.commands["check"] = check
         charger = Command("charger", " : charger une pièce dans le portoloin", Actions.charger, 0)
         self.commands["charger"] = charger
+        save = Command("save", " <nom> : sauvegarder la partie", Actions.save, 1)
+        self.commands["save"] = save
+        load = Command("load", " <nom> : reprendre une partie sauvegardée", Actions.load, 1)
+        self.commands["load"] = load
         use = Command("use", " : utiliser un objet de l'inventaire du joueur", Actions.use, 1)
         self.commands["use"] = use
         read = Command("read", " : lire un objet de l'inventaire du joueur", Actions.read, 1)
@@ -111,316 +253,16 @@ class Game:
         self.commands["spell"] = spell
         add = Command("add", " < objet + to + objet > : ajouter un ingrédient dans le chaudron", Actions.add, 3)   
         self.commands["add"] = add
-        
-
-        
-        # Setup rooms
-
-        foret = Room("Foret", "dans la Forêt Interdite, un lieu où même la lumière du jour semble hésiter à entrer. Vous entendez une brise légère transportant des bruits étranges. Cet endroit vous donne la chair de poule.")
-        self.rooms.append(foret)
-        gare = Room("Gare", "à la gare king's Cross, entouré par le brouhaha des voyageurs pressés et les sifflements des trains à vapeur. Autour de vous, des familles moldues passent sans rien remarquer, tandis qu’un groupe d’élèves en robe noire rit en poussant des chariots chargés de coffres et de cages à hiboux.\n Vous devez prendre le train pour Poudlard ! Choisissez le bon : \n N. L'Ombre du Nord \n E. L'Eclair Ecarlate \n S. Le Noisy-Express")
-        self.rooms.append(gare)
-        lombredunord = Room("LOmbreDuNord", "dans un train sombre et froid. Vous réalisez trop tard qu’il se dirige vers Durmstrang.")
-        self.rooms.append(lombredunord)
-        train = Room("Train", "désormais dans le train à destination de Poudlard dont les fenêtres offrent une vue sur la campagne anglaise qui défile.")
-        self.rooms.append(train)
-        noisyexpress = Room("NoisyExpress", "dans un wagon bruyant rempli d'élèves turbulents. Vous réalisez trop tard que c'est le RER A qui vous emmène à ESIEE Paris.")
-        self.rooms.append(noisyexpress)
-        entree = Room("Entree", "dans l’entrée de Poudlard. Devant vous, les grandes portes s’élèvent, flanquées de gargouilles qui semblent vous observer. Une lueur dorée filtre à travers les vitraux, projetant des ombres mouvantes sur les dalles usées.")
-        self.rooms.append(entree)
-        couloir = Room("Couloir", "dans le couloir principal qui mène aux différentes pièces de l'école. Les murs de pierre froide sont ornés de portraits animés qui vous observent, murmurant entre eux.")
-        self.rooms.append(couloir)
-        bibliotheque = Room("Bibliotheque", "dans dans la majestueuse et imposante bibliothèque de Poudlard. Un silence oppressant règne, seulement rompu par le bruissement des pages tournées et le tictac d’une horloge ensorcelée qui tourne à l’envers.")
-        self.rooms.append(bibliotheque)
-        classe = Room("Classe", "dans la classe de défense contre les forces du mal du professeur Lupin. Une odeur étrange vous enveloppe : un mélange de parchemin ancien et de plantes séchées. Les étagères sont chargées de boîtes étiquetées “dangereux”, de fioles remplies de liquides troubles et de créatures empaillées qui semblent vous suivre du regard.")
-        self.rooms.append(classe)
-        banquet = Room("Banquet", "dans la grande salle de réception. La Grande Salle est un spectacle à couper le souffle : un plafond ensorcelé reflète un ciel étoilé en mouvement, tandis que les quatre longues tables (Gryffondor, Serpentard, Poufsouffle, Serdaigle) sont garnies de plats fumants. Les bougies flottent au-dessus des têtes, projetant une lumière dorée sur les bannières aux couleurs des maisons.")
-        self.rooms.append(banquet)
-        dortoirs = Room("Dortoirs", "dans les dortoirs des élèves. Cette grande salle circulaire a des murs de pierre ornés des blasons des quatre maisons. Quatre portes mènent aux dortoirs respectifs.")
-        self.rooms.append(dortoirs)
-        cabane = Room("Cabane", "dans la cabane d'Hagrid. On y sent la fourrure mouillée et les citrouilles trop mûres. Le plancher craque sous vos pieds, et un feu de cheminée réchauffe la pièce, autour duquel ronronne un chat à trois pattes.")
-        self.rooms.append(cabane)
-        chemin = Room("Chemin", "sur un chemin sombre qui serpente à l’extérieur de Poudlard. Le chemin est éclairé seulement par la lueur tremblante de la lune, filtrée à travers les nuages. Les arbres bordant le sentier semblent se pencher vers vous de manière menaçantes.")
-        self.rooms.append(chemin)
-        escalier = Room("Escalier", "dans l’escalier qui relie le couloir au palier de l’étage. Les marches de pierre usée de l’escalier sont éclairées par des torches dont les flammes dansent comme si elles étaient vivantes. Certaines marches disparaissent quand vous posez le pied dessus.")
-        self.rooms.append(escalier)
-        palier = Room("Palier", "sur le palier de l’étage. Le palier circulaire est éclairé par une fenêtre en vitrail représentant un phénix, dont les couleurs changent selon la lumière. Deux portes en chêne massif se font face.")
-        self.rooms.append(palier)
-        cachots = Room("Cachots", "dans les cachots sombres et humides de Poudlard. L'air est frais. Ce lieu n'est pas rassurant.")
-        self.rooms.append(cachots)
-
-        # setup directions
-        # Store allowed direction tokens on the game object so actions can check them
-        self.directions = set(['N', 'NORD', 'Nord', 'nord', 'S', 'SUD', 'Sud', 'sud', 'E', 'EST', 'Est', 'est', 'O', 'OUEST', 'Ouest', 'ouest', 'U', 'UP', 'Up', 'up', 'D', 'DOWN', 'Down', 'down'])
-
-
-
-        # Create exits for rooms
-
-        foret.exits = {"N" : chemin}
-        gare.exits = {"N" : lombredunord, "E" : train, "S" : noisyexpress}
-        train.exits = {"E" : entree}
-        entree.exits = {"N" : cabane, "E" : couloir, "S" : chemin}
-        couloir.exits = {"N" : dortoirs, "E" :escalier, "S" : banquet, "O" : entree}
-        escalier.exits = {"U" : palier, "D" : cachots, "O" : couloir}
-        cachots.exits = {"U" : escalier}
-        palier.exits = {"N" : classe, "S" : bibliotheque, "D" : escalier}
-        cabane.exits = {"E" : dortoirs, "S" : entree}
-        chemin.exits = {"N" : entree, "S" : foret}
-        dortoirs.exits = {"O" : cabane, "S" : couloir}
-        classe.exits = {"S" : palier}
-        bibliotheque.exits = {"N" : palier}
-        banquet.exits = {"N" : couloir}
-
-        #setup items in rooms
-        
-        loups = Item("loups", "(livre) Plongez dans les secrets les plus sombres de la magie avec ce guide inédit sur les loups-garous.", "1.4")
-        bibliotheque.inventory["loups"]= loups
-        trolls = Item("trolls", "(livre) Découvrez les trolls leurs histoire, forces et faiblesses ", "1.3")
-        bibliotheque.inventory["trolls" ]= trolls
-        acro = Item("acromentules", "(livre) Découvrez les secrets d’Aragog et de sa colonie", "1.5")
-        bibliotheque.inventory["acromentules" ] = acro
-        detraqueurs = Item("detraqueurs", "(livre) Plongez dans l'effrayant univers des Détraqueurs.", "1.6")
-        bibliotheque.inventory["detraqueurs" ] = detraqueurs
-        fantomes = Item("fantomes", "(livre) Découvrez les secrets des résidents spectrales de Poudlard .", "1.2")
-        bibliotheque.inventory["fantomes" ] = fantomes
-
-
-        
-        echarpe = Item("echarpe", "Une écharpe aux couleurs rouge et or, symbole de courage et de bravoure.", "0.5")
-        dortoirs.inventory["echarpe" ] = echarpe
-        chapeau = Item("chapeau", "Un chapeau pointu noir orné d'une bande argentée, parfait pour compléter votre tenue de sorcier.", "0.4")
-        dortoirs.inventory["chapeau" ] = chapeau
-        journal = Item("journal", "Un petit carnet à couverture en cuir qui ne semble pas à sa place ici.", "0.7")
-        dortoirs.inventory["journal" ]  = journal
-        chaussettes = Item("chaussettes", "Une paire de chaussettes colorées et confortables, idéales pour se détendre après une longue journée de cours.", "0.3")
-        dortoirs.inventory["chaussettes" ] = chaussettes
-
-
-        valise = Item("valise", "Une valise en cuir usée, prête pour une aventure magique.", "8")
-        gare.inventory["valise" ] = valise
-        baguette= Item("baguette", "N'oubliez pas votre baguette magique!", "0.5")
-        gare.inventory["baguette"] = baguette
-
-        papier = Item("papier", "vous trouvez un papier par terre prenez le et lisez le", "0.1")
-        palier.inventory["papier"] = papier 
-        
-        portoloin = Item("portoloin", "Un portoloin ancien, orné de symboles mystérieux.", "2.1")
-        couloir.inventory["portoloin"] = portoloin 
-
-        sortileges = Item("sortileges", "De « Lumos » à « Expecto Patronum », explorez les sortilèges.", "1.9")
-        classe.inventory["sortileges" ] = sortileges
-        chaudron = Item("chaudron", "Un chaudron en étain, essentiel pour toute potion bien préparée.", "3")
-        classe.inventory["chaudron"] = chaudron
-        mandragore = Item("mandragore", "Une mandragore fraîchement récoltée, ses racines sont encore couvertes de terre.", "2.5")
-        classe.inventory["mandragore"] = mandragore
-
-
-        bonbons = Item("bonbons", "Un assortiment de bonbons magiques pour une pause sucrée.", "0.3")
-        train.inventory["bonbons"] = bonbons
-        
-        chouette = Item("chouette", "Une chouette blanche aux yeux perçants, prête à livrer votre courrier magique.", "1.7")
-        entree.inventory["chouette"] = chouette
-
-        cookies = Item("cookies", "Un pot de cookies fraîchement cuits, parfaits pour une collation rapide.", "0.5")
-        banquet.inventory["cookies"] = cookies
 
-        parchemin = Item("parchemin", "Un plan de la forêt interdite pour vous guider dans cet endroit effrayant.", "0.2")
-        cabane.inventory["parchemin"] = parchemin
-        bottes = Item("bottes", "Une paire de bottes robustes, utiles pour arpenter les chemins escarpés de la forêt interdite.", "1")
-        cabane.inventory["bottes"] = bottes
-        licorne = Item("licorne", "Un poil de licorne, réputé pour ses propriétés magiques et sa pureté.", "0.3")
-        cabane.inventory["licorne"] = licorne
 
-        tissu = Item("tissu", "Un morceau de tissu déchiré, peut-être d'un vêtement, un croissant de lune y est brodé.", "0.1")
-        chemin.inventory["tissu"] = tissu
+        # Setup directions
+        # Store the direction lexicon on the game object so actions can resolve directions
+        self.directions = DIRECTION_LEXICON
 
-        branche = Item("branche", "Une branche de saule cogneur se trouve suspicieusement sur votre chemin.", "0.6")
-        foret.inventory["branche"] = branche
+        # Setup rooms, exits, items, characters, starting room and quests from the world file
+        worldfile.build(self, quest_manager, worldfile.load(world_file))
 
-        phenix = Item("phenix", "Une larme de phénix, symbole de renaissance et de puissance magique.", "0.4")
-        cachots.inventory["phenix"] = phenix
 
-        # Setup characters in rooms
-
-        Hagrid = Character("Hagrid", "Demi-géant, garde-chasse de Poudlard et ami fidèle des créatures magiques.", cabane, ["Bonjour à toi !", "Veux-tu voir mon nouvel animal de companie? Il s'appelle Fumier."], False)
-        cabane.characters["Hagrid"] = Hagrid
-
-        Dumbledore = Character("Dumbledore", "Le directeur de Poudlard, connu pour sa grande sagesse et son puissant talent en magie.", banquet, ["Bienvenue à Poudlard jeune sorcier.", "Je vous avertis, une créature rôde dans les couloirs et menace la sécurité de l'école. Soyez prudent."], False)
-        banquet.characters["Dumbledore"] = Dumbledore
-        Mcgonagall = Character("McGonagall", "La professeur de métamorphose stricte mais juste, toujours prête à défendre ses élèves.", banquet, ["Retournez immédiatement à vos dortoirs!", "Avez-vous des questions ?"],True)
-        banquet.characters["McGonagall"] = Mcgonagall
-        Pomfresh = Character("Pomfresh", "L'infirmière de Poudlard, soigne les blessures des élèves avec douceur.", banquet, ["Comment puis-je t'aider?", "Comment allez-vous?"], True)
-        banquet.characters["Pomfresh"] = Pomfresh
-        Choixpeau = Character("Choixpeau", "Le chapeau magique qui répartit les nouveaux élèves dans les différentes maisons de Poudlard.", banquet, ["Griffondor, Poussoufle, Serdaigle ou Serpentard?"], False)
-        banquet.characters["Choixpeau"] = Choixpeau
-
-        Dobby = Character("Dobby", "Un elfe de maison loyal et courageux, toujours prêt à aider.", cachots, ["Aidez Dobby à sortir, Dobby se sent seul.", "Dobby aimerait aider.","Dobby est libre!"], False)
-        cachots.characters["Dobby"] = Dobby
-
-        Lupin = Character("Lupin", "Un professeur de défense contre les forces du mal.", classe, ["Que veux-tu apprendre aujourd'hui?", "Tu es prêt à affronter les forces du mal?"],False)
-        classe.characters["Lupin"] = Lupin
-        Rogue = Character("Rogue", "Le professeur de potions mystérieux et redouté, avec un passé complexe.", classe, ["Gare à toi, je t'ai à l'oeil !", "As-tu fini ta potion ?"], False)
-        classe.characters["Rogue"] = Rogue
-
-        Drago = Character("Drago", "Un élève de Serpentard, connu pour son arrogance et sa rivalité avec les Gryffondors.", dortoirs, ["Va-t'en sale sang de Bourbe !", "Je suis de sang pur."], True)
-        dortoirs.characters["Drago"] = Drago
-        Luna = Character("Luna", "Une élève excentrique de Serdaigle, connue pour ses idées originales et sa curiosité sans bornes.", dortoirs, ["La lune sera rose ce soir, veux tu venir l'observer avec moi? ", "J'ai eu une pensée tout à l'heure mais je ne m'en souviens plus...", "J'ai essaye de rendre un détraqueur gentil mais il m'a échappé...", "J'ai honte, aide moi à le retrouver."], False)
-        dortoirs.characters["Luna"] = Luna
-
-        Firenze = Character("Firenze", "Un centaure sage et mystérieux, gardien des secrets de la forêt interdite.", foret, ["Tu n'as pas le droit d'être ici !",  "Les détraqueurs rôdent dans la forêt."], False)
-        foret.characters["Firenze"] = Firenze
-        Detraqueur = Character("Detraqueur", "Une créature sombre et terrifiante, gardien des secrets les plus sombres de la forêt interdite.", foret, ["Shhhhhaaaaarh"], False)
-        foret.characters["Detraqueur"] = Detraqueur
-
-        Fantome = Character("Fantome", "Le Baron Sanglant, résident spectral de Poudlard, errant dans les couloirs et racontant des histoires du passé.", escalier, ["Ne va surtout pas au cachot.", "L'ambiance est pesante en ce moment."], True)
-        escalier.characters["Fantome"] = Fantome
-
-        Hermione = Character("Hermione", "Une élève brillante et studieuse, toujours prête à aider ses amis avec ses vastes connaissances.", bibliotheque, ["tu devrais être en train de réviser à la bibliothèque au lieu de traîner dans les couloirs.", "Est-ce que tu as fini ton devoir ?"], True)
-        bibliotheque.characters["Hermione"] = Hermione
-
-        Ron = Character("Ron", "Un élève drôle malgré lui et un peu peureux.", train, ["Je ne sais pas pourquoi mais j'ai comme un mauvais pressentiment pour cette année."], True)
-        train.characters["Ron"] = Ron
-        Harry = Character("Harry", "Le célèbre garçon qui a survécu à l'attaque de Voldemort.", train, ["Je suis plus célèbre que toi alors va voir ailleurs."], True)
-        train.characters["Harry"] = Harry
-        Cedric = Character("Cedric", "Un élève talentueux et courageux de Poufsouffle.", train, ["Bonjour, tu peux t'assoir à côté de moi si tu le souhaite.", "Evite Harry, la célébrité lui monte à la tête en ce moment."], False)
-        train.characters["Cedric"] = Cedric
-
-
-
-
-
-       
-        # Setup player and starting room
-
-        self.player = Player(input("\nEntrez votre nom: "))
-        self.player.current_room = gare
-        self.player.history = [gare]
-
-        # Initialize quest manager for the player and setup quests
-        self.player.quest_manager = QuestManager(self.player)
-        # Setup quests
-        self._setup_quests()
-
-
-
-    def _setup_quests(self):
-        """
-        Initialize all quests available in the game.
-        
-        Creates a series of interconnected quests with varying objectives:
-        - train_quest: Tutorial quest to reach Poudlard
-        - installation_quest: Basic quest to get settled
-        - exploration_quest: Visit all locations
-        - livre_quest: Discover information about creatures
-        - talking_quest: Interact with key characters
-        - dobby_quest: Help free an enslaved elf
-        - potion_quest: Craft a special potion
-        - fighting_quest: Defeat a dangerous creature
-        - saving_quest: Complete all other quests to save Poudlard
-        
-        All quests are added to the player's quest manager.
-        """
-
-        train_quest = Quest(
-            title="Petit Voyageur",
-            description="Prenez le bon train pour aller à Poudlard.",
-            objectives=["Aller dans le bon train"],
-            reward="Ticket de train"
-        )
-
-
-        installation_quest = Quest(
-            title="Installation",
-            description="Installez-vous à Poudlard, allez déposer votre valise dans les dortoirs.",
-            objectives=["take valise", "Aller à l'entree", "Aller aux dortoirs", "drop valise"],
-            reward="Uniforme de Poudlard"
-        )
-
-
-        exploration_quest = Quest(
-            title="Grand Explorateur",
-            description="Explorez tous les lieux de ce monde mystérieux.",
-            objectives=["Visiter foret"
-                        , "Visiter dortoirs"
-                        , "Visiter classe"
-                        , "Visiter chemin"
-                        , "Visiter cabane"
-                        , "Visiter banquet"
-                        , "Visiter bibliotheque"
-                        , "Visiter escalier"
-                        , "Visiter couloir"
-                        , "Visiter entree"
-                        , "Visiter train"
-                        , "Visiter palier"
-                        , "Visiter cachots"],
-            reward="Titre de Grand Explorateur"
-        )
-
-
-        livre_quest = Quest(
-            title="Qui est l'ombre",
-            description="Découvrez quelle est la créature qui rôde dans les couloirs et menace Poudlard. Prenez le livre à son sujet dans la bibliothèque pour en savoir plus.",
-            objectives=["Aller à la bibliotheque", "take detraqueurs", "read detraqueurs"],
-            reward="Grimoire magique"
-        )
-
-
-        talking_quest = Quest(
-            title="Maître de la Conversation",
-            description="Parlez à ces 5 personnages différents dans le jeu (Dumbledore, Hagrid, Rogue, Hermione, Firenze).",                   
-            objectives=["talk à Dumbledore", "talk à Hagrid", "talk à Rogue", "talk à Hermione", "talk à Firenze"],
-            reward="Amulette de communication"
-        )   
-
-
-        dobby_quest = Quest(
-            title="Libérateur d'Elfe",
-            description="Aidez Dobby à se libérer de l'esclavage en lui offrant un vêtement.",
-            objectives=["take chaussettes", "give chaussettes to Dobby"],
-            reward="Gratitude de Dobby"
-        )
-
-
-        potion_quest = Quest(
-            title="Apprenti Potioniste",
-            description="faire une potion de vérité pour faire parler Luna de son secret.", 
-            objectives=["Add licorne to chaudron","Add phenix to chaudron","Add mandragore to chaudron"],
-            reward="Potion de vérité"
-        )   
-
-
-        fighting_quest = Quest(
-            title="Combattant Courageux",
-            description="Vaincre le détraqueur dans la forêt interdite grâce aux sort de protection.",
-            objectives=["take baguette","aller à la classe", "take sortileges", "read sortileges", "aller à la foret","spell expecto_patronum", "use portoloin"],
-            reward="Cape d'invisibilité"
-        )
-
-
-        saving_quest = Quest(
-            title="Sauveur de Poudlard",
-            description="Sauvez Poudlard de la menace qui plane sur elle en accomplissant toutes les autres quêtes.",
-            objectives=["Compléter Combattant Courageux","Compléter Grand Explorateur", "Compléter Petit Voyageur"],
-            reward="Héros de Poudlard"
-        )
-
-
-        # Add quests to player's quest manager
-        self.player.quest_manager.add_quest(train_quest)
-        self.player.quest_manager.add_quest(installation_quest)
-        self.player.quest_manager.add_quest(exploration_quest)
-        self.player.quest_manager.add_quest(livre_quest)
-        self.player.quest_manager.add_quest(talking_quest)
-        self.player.quest_manager.add_quest(dobby_quest)
-        self.player.quest_manager.add_quest(potion_quest)    
-        self.player.quest_manager.add_quest(fighting_quest)   
-        self.player.quest_manager.add_quest(saving_quest)
-
-        # Activate the main quest
-        self.player.quest_manager.activate_quest("Sauveur de Poudlard")
-        
-        
 
     # Play the game
     def play(self):
@@ -437,43 +279,91 @@ class Game:
             None: Game ends when self.finished becomes True.
         """
         self.setup()
+        # Write the output of each command in one go
+        self.set_output(BufferedSink(sys.stdout))
         self.print_welcome()
+        self.output.flush()
         # Loop until the game is finished
         while not self.finished:
-            # Get the command from the player and process it
-           command_input = input("> ")
-           executed_command = self.process_command(command_input)
+            # Get the command from the player and play the turn
+            command_input = input("> ")
+            self.play_turn(command_input)
+            self.output.flush()
 
-           # Check for win conditions after each command
-           self.check_win_conditions()
 
-           # Check for lose conditions after each command
-           self.check_lose_conditions()
+        return None
+
 
-           # Déplacer les personnages non-joueurs uniquement après la commande 'go'
-           if executed_command == "go":
-               for room in self.rooms:
-                   for character in list(room.characters.values()):
-                       if character.movable_status():
-                           character.move()
+    # Play a single turn
+    def play_turn(self, command_string):
+        """
+        Play one turn of the game without reading from the terminal.
 
+        Processes the command, checks the lose conditions and moves the
+        non-player characters after a 'go' command, exactly as the main loop does.
+        The game is won during the command itself, when the main quest is completed.
 
-        return None
+        Args:
+            command_string (str): The raw command input from the player.
+
+        Returns:
+            str or None: The command word if a command was executed, None otherwise.
+        """
+        executed_command = self.process_command(command_string)
+
+        # Check for lose conditions after each command
+        self.check_lose_conditions()
+
+        # Déplacer les personnages non-joueurs uniquement après la commande 'go'
+        if executed_command == "go":
+            self.tick_npcs()
+
+        # Checkpoint the journal once the whole turn has been played
+        if self.journal is not None:
+            self.journal.end_turn(self)
+
+        return executed_command
+
+
+
+    # Move the non-player characters
+    def tick_npcs(self):
+        """
+        Give every movable non-player character a chance to move.
+
+        Only the characters of the movable index are visited, so the cost does
+        not depend on the number of rooms. Each character moves at most once
+        per tick, to an exit drawn over the room ids of the world graph. The main loop calls it after a 'go' command, servers and
+        simulators may call it on their own schedule.
+
+        Returns:
+            int: The number of characters that moved.
+        """
+        moved = 0
+        graph = self.graph
+        for character in self.movable_characters:
+            if character.move(self.rng, graph):
+                moved += 1
+        return moved
 
 
     # Define winning conditions 
-    def check_win_conditions(self):
+    def win(self, quest=None):
         """
-        Check if the player has met the conditions to win the game.
-        
-        The game is won when the main quest "Sauveur de Poudlard" is completed.
+        End the game as won.
+
+        Registered in setup as the completion callback of the main quest
+        ("Sauveur de Poudlard" in the Poudlard adventure), so the game ends the moment it is completed.
+        The victory lines come from the "victory" entry of the world file.
+
+        Args:
+            quest (Quest): The quest that was completed.
         """
         if not self.finished:
-            saving_quest = self.player.quest_manager.get_quest_by_title("Sauveur de Poudlard")
-            if saving_quest and saving_quest.is_completed:
-                print("\n 🏆 Félicitations ! Vous avez sauvé Poudlard et remporté le jeu ! 🏆")
-                print("Vous êtes désormais le Héros de Poudlard.🎖️🎖️🎖️")
-                self.finished = True
+            for line in self.victory:
+                self.output.write(line, "end")
+            self.finished = True
+            self.outcome = "win"
 
 
     # Define loosing conditions
@@ -484,11 +374,12 @@ class Game:
         The game is lost when the player enters a losing room.
         """
         if not self.finished:
-            # Example losing condition: entering a specific room
-            if self.player.current_room.name == "LOmbreDuNord" or self.player.current_room.name == "NoisyExpress":
-                print("\n💀 Vous avez perdu le jeu ! 💀")
-                print("Mieux vaut réessayer et faire les bons choix cette fois-ci.\n")
+            # Losing condition: entering one of the losing rooms of the world
+            if self.player.current_room.name in self.losing_rooms:
+                self.output.write("\n💀 Vous avez perdu le jeu ! 💀", "end")
+                self.output.write("Mieux vaut réessayer et faire les bons choix cette fois-ci.\n", "end")
                 self.finished = True
+                self.outcome = "lose"
         
 
     # Process the command entered by the player
@@ -521,11 +412,24 @@ class Game:
 
         # If the command is not recognized, return nothing
         if command_word not in self.commands.keys():
+            if self.metrics is not None:
+                self.metrics.observe_unknown()
             return None
 
-        # If the command is recognized, execute it and return the command word
+        # If the command is recognized, journal it, execute it and return the command word
+        if self.journal is not None:
+            self.journal.record(command_string)
         command = self.commands[command_word]
-        command.action(self, list_of_words, command.number_of_parameters)
+        metrics = self.metrics
+        if metrics is None:
+            command.action(self, list_of_words, command.number_of_parameters)
+        else:
+            # Time the action and the quest checks it triggers
+            quest_seconds = metrics.quest_check_seconds
+            start = time.perf_counter()
+            result = command.action(self, list_of_words, command.number_of_parameters)
+            metrics.observe_command(command_word, time.perf_counter() - start, result is False,
+                                    metrics.quest_check_seconds - quest_seconds)
         return command_word
 
 
@@ -539,14 +443,15 @@ class Game:
         - A help hint
         - The full description of the starting room
         """
-        print(f"\nBienvenue {self.player.name} dans ce jeu d'aventure !")
-        print("Entrez 'help' si vous avez besoin d'aide.et pour voir toutes les commandes disponibles")
+        self.output.write(f"\nBienvenue {self.player.name} dans ce jeu d'aventure !")
+        self.output.write("Entrez 'help' si vous avez besoin d'aide.et pour voir toutes les commandes disponibles")
         #
-        print(self.player.current_room.get_long_description())
+        self.output.write(self.player.current_room.get_long_description(), "room")
     
 
 def main():
-    # Create a game object and play the game
+    # Let SIGUSR2 toggle the sampling profiler, then create a game object and play the game
+    install_signal_handler(SamplingProfiler())
     Game().play()
     
 
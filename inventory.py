@@ -0,0 +1,256 @@
+# Description: ItemLocations and InventoryView classes
+
+"""Inventory module.
+
+This module keeps track of where the items of a game session are. The items
+themselves are immutable flyweights shared by every session; a session only
+owns an ItemLocations table, a compact array giving the holder of each item:
+a room id, PLAYER for the player's inventory or NOWHERE for an item that has
+left the game.
+
+Room and player inventories are InventoryView objects, dict-like views of the
+table for one holder, so the actions keep using inventory[name], name in
+inventory and inventory.pop(name) while a move is a single table update. The
+table also indexes the items of each holder, so listing an inventory costs
+the number of items it holds, not the number of items in the world.
+"""
+
+from array import array
+from collections.abc import MutableMapping
+
+# The holder of the items in the player's inventory.
+PLAYER = -1
+# The holder of the items that are no longer anywhere.
+NOWHERE = -2
+
+
+class ItemLocations:
+    """
+    This class gives the holder of every item of a game session.
+
+    Attributes:
+        catalog (tuple): The items, by item id, shared by every session.
+        ids_by_name (dict): The item id of each item name, shared by every session.
+        holders (array): The holder of each item, by item id.
+        held (dict): The set of item ids of each holder.
+        changes (dict): The number of changes of each holder, for InventoryView.version.
+        epoch (int): The number of times every holder was replaced by restore.
+
+    Methods:
+        __init__(self, catalog, holders): The constructor.
+        from_rooms(cls, rooms): Build the table of the items placed in rooms.
+        fork(self): Return a copy of the table sharing the catalog.
+        view(self, holder): Return the inventory of a holder.
+        holder_of(self, item_name): Return the holder of an item.
+        move(self, item_name, holder): Give an item to another holder.
+        restore(self, holders): Replace the holder of every item.
+
+    Examples:
+
+    >>> from item import Item
+    >>> from room import Room
+    >>> hall = Room("Hall", "a hall")
+    >>> hall.inventory["key"] = Item("key", "A key.", 0.1)
+    >>> locations = ItemLocations.from_rooms([hall])
+    >>> player = locations.view(PLAYER)
+    >>> player["key"] = locations.view(0).pop("key")
+    >>> locations.holder_of("key") == PLAYER, list(player), len(locations.view(0))
+    (True, ['key'], 0)
+    """
+
+
+    def __init__(self, catalog, holders):
+        """
+        Initialize the table.
+
+        Args:
+            catalog (tuple): The items, by item id.
+            holders (array): The holder of each item, by item id.
+        """
+        self.catalog = catalog
+        self.ids_by_name = {item.name: item_id for item_id, item in enumerate(catalog)}
+        if len(self.ids_by_name) != len(catalog):
+            raise ValueError("Deux objets portent le même nom.")
+        self.changes = {}
+        self.epoch = 0
+        self.restore(holders)
+
+
+
+    @classmethod
+    def from_rooms(cls, rooms):
+        """
+        Build the table of the items placed in the inventories of rooms.
+
+        Args:
+            rooms (list): The rooms, the holder of their items is their position.
+
+        Returns:
+            ItemLocations: The table.
+
+        Raises:
+            ValueError: If two items have the same name.
+        """
+        catalog = []
+        holders = array("l")
+        for room_id, room in enumerate(rooms):
+            for item in room.inventory.values():
+                catalog.append(item)
+                holders.append(room_id)
+        return cls(tuple(catalog), holders)
+
+
+
+    def fork(self):
+        """
+        Return a copy of the table for a new game session.
+
+        Returns:
+            ItemLocations: The copy, sharing the catalog and name index.
+        """
+        locations = ItemLocations.__new__(ItemLocations)
+        locations.catalog = self.catalog
+        locations.ids_by_name = self.ids_by_name
+        locations.holders = array("l", self.holders)
+        locations.held = {holder: set(item_ids) for holder, item_ids in self.held.items()}
+        locations.changes = {}
+        locations.epoch = 0
+        return locations
+
+
+
+    def view(self, holder):
+        """ Return the inventory of a holder (a room id or PLAYER). """
+        return InventoryView(self, holder)
+
+
+
+    def holder_of(self, item_name):
+        """ Return the holder of an item, None if there is no such item. """
+        item_id = self.ids_by_name.get(item_name)
+        return None if item_id is None else self.holders[item_id]
+
+
+
+    def restore(self, holders):
+        """
+        Replace the holder of every item, e.g. when a saved game is loaded.
+
+        Args:
+            holders (array): The holder of each item, by item id.
+        """
+        if len(holders) != len(self.catalog):
+            raise ValueError("Le nombre d'objets ne correspond pas.")
+        self.holders = holders
+        self.epoch += 1
+        self.held = {}
+        for item_id, holder in enumerate(holders):
+            self.held.setdefault(holder, set()).add(item_id)
+
+
+
+    def move(self, item_name, holder):
+        """
+        Give an item to another holder.
+
+        Args:
+            item_name (str): The name of the item.
+            holder (int): The new holder.
+
+        Raises:
+            KeyError: If there is no such item.
+        """
+        item_id = self.ids_by_name[item_name]
+        previous = self.holders[item_id]
+        if previous != holder:
+            self.held[previous].discard(item_id)
+            self.held.setdefault(holder, set()).add(item_id)
+            self.holders[item_id] = holder
+            self.changes[previous] = self.changes.get(previous, 0) + 1
+            self.changes[holder] = self.changes.get(holder, 0) + 1
+
+
+
+class InventoryView(MutableMapping):
+    """
+    This class is the inventory of one holder: a dict-like view mapping the
+    names of its items to the items, backed by an ItemLocations table.
+
+    Storing an item in a view moves it to the holder of the view, deleting or
+    popping it sends it NOWHERE until it is stored in another view. Items are
+    listed in catalog order.
+
+    Attributes:
+        locations (ItemLocations): The table of the session.
+        holder (int): The holder whose items are viewed.
+        version (int): A counter that grows whenever the items of the holder change.
+    """
+
+    __slots__ = ("locations", "holder")
+
+
+    def __init__(self, locations, holder):
+        """ Initialize the view of a holder. """
+        self.locations = locations
+        self.holder = holder
+
+
+
+    def __getitem__(self, item_name):
+        """ Return the item of the holder with this name. """
+        locations = self.locations
+        item_id = locations.ids_by_name.get(item_name)
+        if item_id is None or locations.holders[item_id] != self.holder:
+            raise KeyError(item_name)
+        return locations.catalog[item_id]
+
+
+
+    def __setitem__(self, item_name, item):
+        """ Move an item of the catalog to the holder. """
+        locations = self.locations
+        item_id = locations.ids_by_name.get(item_name)
+        if item_id is None or locations.catalog[item_id] is not item:
+            raise ValueError(f"L'objet '{item_name}' n'existe pas dans ce monde.")
+        locations.move(item_name, self.holder)
+
+
+
+    def __delitem__(self, item_name):
+        """ Send an item of the holder NOWHERE. """
+        if item_name not in self:
+            raise KeyError(item_name)
+        self.locations.move(item_name, NOWHERE)
+
+
+
+    def __contains__(self, item_name):
+        """ Return True if the holder has an item with this name. """
+        return self.locations.holder_of(item_name) == self.holder
+
+
+
+    def __iter__(self):
+        """ Iterate over the names of the items of the holder. """
+        catalog = self.locations.catalog
+        for item_id in sorted(self.locations.held.get(self.holder, ())):
+            yield catalog[item_id].name
+
+
+
+    def __len__(self):
+        """ Return the number of items of the holder. """
+        return len(self.locations.held.get(self.holder, ()))
+
+
+
+    @property
+    def version(self):
+        """ Return a counter that grows whenever the items of the holder change. """
+        return self.locations.epoch + self.locations.changes.get(self.holder, 0)
+
+
+
+    def __repr__(self):
+        """ Return the view as a dict. """
+        return repr(dict(self))
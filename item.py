@@ -2,28 +2,51 @@ class Item :
     """
     This class represents an item in the game with a name, description, and weight.
 
+    Items are immutable flyweights: the same Item object is shared by every
+    game session, which only records where it is (see inventory.ItemLocations).
+
     Attributes:
         name (str): The name of the item.
         description (str): The description of the item.
-        weight (float): The weight of the item in kilograms.
+        weight (float): The weight of the item in kilograms, parsed once when the item is created.
 
     Methods:
         __init__(self, name, description, weight): The constructor of the class.
+        __setattr__(self, name, value): Refuses to change an item.
         __str__(self): Returns the string representation of the item.
 
+    Examples:
+
+    >>> valise = Item("valise", "Une valise en cuir usée.", "8")
+    >>> valise.weight
+    8.0
+    >>> print(valise)
+    valise : Une valise en cuir usée. (poids: 8 kg)
+    >>> valise.weight = 1
+    Traceback (most recent call last):
+    ...
+    AttributeError: Item is immutable
     """
 
+    __slots__ = ("name", "description", "weight")
+
 
 
     def __init__(self, name, description, weight):
-        """ Initialize an item with name, description, and weight. """
-        self.name = name
-        self.description = description
-        self.weight = weight
+        """ Initialize an item with name, description, and weight (a number or a numeric string). """
+        object.__setattr__(self, "name", name)
+        object.__setattr__(self, "description", description)
+        object.__setattr__(self, "weight", float(weight))
+
+
+
+    def __setattr__(self, name, value):
+        """ Refuse to change an item, it is shared by every session. """
+        raise AttributeError("Item is immutable")
 
 
 
     def __str__(self) :
         """ Return the string representation of the item. """
-        return f"{self.name} : {self.description} (poids: {self.weight} kg)"
+        return f"{self.name} : {self.description} (poids: {self.weight:g} kg)"
     
\ No newline at end of file
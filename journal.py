@@ -0,0 +1,413 @@
+# Description: Journal and SessionJournal classes
+
+"""Journal module.
+
+This module makes sessions survive a crash. Every command accepted by
+Game.process_command is appended to the journal of its session, and every
+checkpoint_interval commands the whole session is written as a snapshot (see
+the snapshot module) and the journal is emptied. After a crash, a session is
+rebuilt from its last checkpoint and the commands journaled after it.
+
+Appending never waits for the disk: records are queued and a background
+thread commits them in groups, every commit_interval seconds, with one fsync
+per session file touched by the group whatever the number of commands and
+sessions. A crash loses at most the last commit_interval of commands.
+
+If a group commit fails (disk full, I/O error), the journal stops: the
+records of that group may be missing on disk, so nothing more is written
+after them. The error is raised by flush and by every later command, which
+is then not played, instead of commands being accepted without a journal.
+
+Files, in the journal directory:
+
+- <session id>.journal: the commands, as records (length, sequence number,
+  CRC-32, UTF-8 command). Recovery stops at the first torn record.
+- <session id>.checkpoint: b"TBAJ", the sequence number of the last command
+  it includes, then the snapshot. Written to a temporary file and renamed.
+
+Sequence numbers only grow over the life of a session, across reconnections
+and recoveries, so the records a checkpoint already includes are always told
+apart from the ones that follow it, even when a crash leaves them next to it.
+"""
+
+import os
+import struct
+import threading
+import zlib
+
+import snapshot
+
+CHECKPOINT_MAGIC = b"TBAJ"
+
+_RECORD = struct.Struct("<IQI")
+_CHECKPOINT = struct.Struct("<4sQ")
+
+
+class Journal:
+    """
+    This class journals the commands of many sessions with group commits.
+
+    Attributes:
+        directory (str): The directory of the journal and checkpoint files.
+        checkpoint_interval (int): The number of commands between two checkpoints.
+        commit_interval (float): The seconds between two group commits.
+
+    Methods:
+        __init__(self, directory, checkpoint_interval=100, commit_interval=0.005): The constructor.
+        open(self, session): Start journaling a session.
+        flush(self, timeout=None): Wait until everything submitted is on disk.
+        close(self): Commit what is pending and stop the background thread.
+        session_ids(self): Return the ids of the sessions that can be recovered.
+        recover(self, session_id, output=None, template=None): Rebuild a session after a crash.
+        discard(self, session_id): Delete the files of a session.
+
+    Examples:
+
+    >>> import tempfile
+    >>> from session import Session
+    >>> journal = Journal(tempfile.mkdtemp(), checkpoint_interval=2)
+    >>> session = Session("Bob", seed=7, journal=journal)
+    >>> results = session.run(["take valise", "go E", "go E", "talk Hermione", "dance"])
+    >>> journal.close()
+    >>> again = Journal(journal.directory)
+    >>> recovered = again.recover(session.session_id)
+    >>> recovered.snapshot() == session.snapshot()
+    True
+    >>> again.open(recovered).sequence == session.game.journal.sequence == 4
+    True
+    >>> again.close()
+    """
+
+
+    def __init__(self, directory, checkpoint_interval=100, commit_interval=0.005):
+        """
+        Initialize the journal and start its commit thread.
+
+        Args:
+            directory (str): The directory of the files, created if needed.
+            checkpoint_interval (int): The number of commands between two checkpoints.
+            commit_interval (float): The seconds between two group commits.
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.checkpoint_interval = checkpoint_interval
+        self.commit_interval = commit_interval
+        self._lock = threading.Lock()
+        self._committed_condition = threading.Condition(self._lock)
+        self._pending = {}
+        self._submitted = 0
+        self._committed = 0
+        self._files = {}
+        self._recovered = {}
+        self._error = None
+        self._closed = False
+        self._wakeup = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="journal-commit", daemon=True)
+        self._thread.start()
+
+
+
+    def open(self, session):
+        """
+        Start journaling a session: write its first checkpoint and attach a
+        SessionJournal to its game. The sequence numbers go on from the
+        journal already attached to the game, or from the last command
+        replayed by recover.
+
+        Args:
+            session (Session): The session.
+
+        Returns:
+            SessionJournal: The journal of the session.
+        """
+        previous = session.game.journal
+        if previous is not None and previous.session_id == session.session_id:
+            sequence = previous.sequence
+        else:
+            sequence = self._recovered.pop(session.session_id, 0)
+        session_journal = SessionJournal(self, session.session_id, sequence)
+        session_journal.checkpoint(session.game)
+        session.game.journal = session_journal
+        return session_journal
+
+
+
+    def _submit(self, session_id, operation):
+        """ Queue an operation for the next group commit. """
+        with self._lock:
+            if self._closed:
+                raise ValueError("Le journal est fermé.")
+            self._check()
+            self._pending.setdefault(session_id, []).append(operation)
+            self._submitted += 1
+
+
+
+    def flush(self, timeout=None):
+        """
+        Wait until every operation submitted so far is on disk.
+
+        Returns:
+            bool: False if the timeout expired first.
+
+        Raises:
+            OSError: If a group commit failed.
+        """
+        with self._lock:
+            self._check()
+            target = self._submitted
+        self._wakeup.set()
+        with self._committed_condition:
+            done = self._committed_condition.wait_for(
+                lambda: self._committed >= target or self._error is not None, timeout)
+            self._check()
+            return done
+
+
+
+    def _check(self):
+        """ Raise OSError if a group commit failed, the lock must be held. """
+        if self._error is not None:
+            raise OSError(f"Le journal ne peut plus écrire sur le disque ({self._error}).")
+
+
+
+    def close(self):
+        """ Commit everything pending, stop the commit thread and close the files. """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._wakeup.set()
+        self._thread.join()
+        for file in self._files.values():
+            try:
+                file.close()
+            except OSError:
+                pass
+        self._files.clear()
+
+
+
+    def _run(self):
+        # Commit the pending operations in groups until the journal is closed
+        while True:
+            self._wakeup.wait(self.commit_interval)
+            self._wakeup.clear()
+            try:
+                self._commit()
+            except Exception as error:
+                # Stop journaling and wake the waiters up with the error
+                with self._committed_condition:
+                    self._error = error
+                    self._pending.clear()
+                    self._committed_condition.notify_all()
+                return
+            with self._lock:
+                if self._closed and not self._pending:
+                    return
+
+
+
+    def _commit(self):
+        """ Write every pending operation, then fsync each file touched once. """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            target = self._submitted
+        touched = []
+        for session_id, operations in pending.items():
+            file = self._file(session_id)
+            for operation in operations:
+                if operation[0] == "append":
+                    file.write(operation[1])
+                elif operation[0] == "checkpoint":
+                    self._write_checkpoint(session_id, operation[1])
+                    file.truncate(0)
+                else:
+                    file.close()
+                    del self._files[session_id]
+                    self._remove(session_id)
+                    file = None
+                    break
+            if file is not None:
+                touched.append(file)
+        for file in touched:
+            file.flush()
+            os.fsync(file.fileno())
+        with self._committed_condition:
+            self._committed = target
+            self._committed_condition.notify_all()
+
+
+
+    def _file(self, session_id):
+        """ Return the journal file of a session, opening it if needed. """
+        file = self._files.get(session_id)
+        if file is None:
+            file = open(self._path(session_id, "journal"), "ab")
+            self._files[session_id] = file
+        return file
+
+
+
+    def _path(self, session_id, extension):
+        """ Return the path of a file of a session. """
+        return os.path.join(self.directory, f"{session_id}.{extension}")
+
+
+
+    def _write_checkpoint(self, session_id, data):
+        """ Write a checkpoint file atomically. """
+        path = self._path(session_id, "checkpoint")
+        with open(path + ".tmp", "wb") as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(path + ".tmp", path)
+
+
+
+    def _remove(self, session_id):
+        """ Delete the files of a session. """
+        for extension in ("journal", "checkpoint"):
+            try:
+                os.remove(self._path(session_id, extension))
+            except FileNotFoundError:
+                pass
+
+
+
+    def session_ids(self):
+        """ Return the ids of the sessions that have a checkpoint, and can be recovered. """
+        suffix = ".checkpoint"
+        return sorted(name[:-len(suffix)] for name in os.listdir(self.directory) if name.endswith(suffix))
+
+
+
+    def recover(self, session_id, output=None, template=None):
+        """
+        Rebuild a session from its last checkpoint and the commands journaled after it.
+
+        The recovered session is not journaled, attach it with open to go on.
+
+        Args:
+            session_id (str): The id of the session.
+            output (OutputSink): The sink of the recovered game.
+            template (WorldTemplate): The world the session was played in.
+
+        Returns:
+            Session: The recovered session, its output flushed.
+
+        Raises:
+            ValueError: If the checkpoint is missing or is not valid.
+        """
+        from session import Session
+
+        try:
+            with open(self._path(session_id, "checkpoint"), "rb") as file:
+                data = file.read()
+        except FileNotFoundError:
+            raise ValueError(f"Aucun point de reprise pour la session '{session_id}'.") from None
+        # A checkpoint cut short by a crash during its first write is not valid either
+        if len(data) < _CHECKPOINT.size:
+            raise ValueError(f"Point de reprise invalide pour la session '{session_id}'.")
+        magic, sequence = _CHECKPOINT.unpack_from(data)
+        if magic != CHECKPOINT_MAGIC:
+            raise ValueError(f"Point de reprise invalide pour la session '{session_id}'.")
+
+        session = Session.restore(data[_CHECKPOINT.size:], session_id, output, template)
+        for record_sequence, command in self._records(session_id):
+            if record_sequence > sequence + 1:
+                break  # A record is missing, the ones after it cannot be replayed
+            if record_sequence == sequence + 1:
+                try:
+                    session.send(command)
+                except Exception:
+                    pass  # The command failed the same way when it was played, and the game went on
+                sequence = record_sequence
+        session.game.output.flush()
+        self._recovered[session_id] = sequence
+        return session
+
+
+
+    def _records(self, session_id):
+        """ Yield the (sequence number, command) records of a journal, up to the first torn one. """
+        try:
+            with open(self._path(session_id, "journal"), "rb") as file:
+                data = file.read()
+        except FileNotFoundError:
+            return
+        offset = 0
+        while offset + _RECORD.size <= len(data):
+            length, sequence, checksum = _RECORD.unpack_from(data, offset)
+            payload = data[offset + _RECORD.size:offset + _RECORD.size + length]
+            if len(payload) != length or zlib.crc32(payload) != checksum:
+                return
+            yield sequence, payload.decode("utf-8")
+            offset += _RECORD.size + length
+
+
+
+    def discard(self, session_id):
+        """ Delete the files of a session once its journaled commands are committed. """
+        self._submit(session_id, ("discard",))
+
+
+
+class SessionJournal:
+    """
+    This class journals the commands of one session.
+
+    Attributes:
+        journal (Journal): The journal the records are committed by.
+        session_id (str): The id of the session.
+        sequence (int): The sequence number of the last command journaled.
+        checkpoint_sequence (int): The sequence number of the last checkpoint.
+
+    Methods:
+        __init__(self, journal, session_id, sequence=0): The constructor.
+        record(self, command): Journal an accepted command.
+        end_turn(self, game): Write a checkpoint if one is due.
+        checkpoint(self, game): Write a checkpoint now.
+        discard(self): Stop journaling and delete the files of the session.
+    """
+
+
+    def __init__(self, journal, session_id, sequence=0):
+        """ Initialize the journal of a session, numbering its commands after sequence. """
+        self.journal = journal
+        self.session_id = session_id
+        self.sequence = sequence
+        self.checkpoint_sequence = sequence
+
+
+
+    def record(self, command):
+        """ Journal an accepted command, without waiting for the disk. """
+        sequence = self.sequence + 1
+        payload = command.encode("utf-8")
+        record = _RECORD.pack(len(payload), sequence, zlib.crc32(payload)) + payload
+        self.journal._submit(self.session_id, ("append", record))
+        self.sequence = sequence
+
+
+
+    def end_turn(self, game):
+        """ Write a checkpoint if checkpoint_interval commands were journaled since the last one. """
+        if self.sequence - self.checkpoint_sequence >= self.journal.checkpoint_interval:
+            self.checkpoint(game)
+
+
+
+    def checkpoint(self, game):
+        """ Write a checkpoint of the game now, the journal is emptied once it is on disk. """
+        self.checkpoint_sequence = self.sequence
+        data = _CHECKPOINT.pack(CHECKPOINT_MAGIC, self.sequence) + snapshot.dumps(game)
+        self.journal._submit(self.session_id, ("checkpoint", data))
+
+
+
+    def discard(self):
+        """ Stop journaling and delete the files of the session. """
+        self.journal.discard(self.session_id)
@@ -0,0 +1,299 @@
+# Description: Metrics class
+
+"""Metrics module.
+
+This module collects the latency and outcome of the commands played through
+Game.process_command and the time spent checking quest objectives, and
+exports them in the Prometheus text format:
+
+- tba_command_duration_seconds{command}: a histogram of the command latency.
+- tba_commands_total{command}: the number of commands played.
+- tba_command_failures_total{command}: the number of commands whose action returned False.
+- tba_command_quest_check_seconds_total{command}: the time the commands spent checking quests.
+- tba_unknown_commands_total: the number of lines that were not a command.
+- tba_quest_check_duration_seconds{check}: a histogram of the quest checks,
+  by kind (objective, room, action, counter).
+
+A Metrics object is shared by every game of a process (see Game.set_metrics)
+and is only touched by the thread playing the commands. It can be written to
+a file, e.g. for the textfile collector of the node exporter, or served over
+HTTP from the event loop of the server with start_endpoint.
+"""
+
+import asyncio
+import os
+from bisect import bisect_left
+
+# The upper bounds of the histogram buckets, in seconds.
+DEFAULT_BUCKETS = (0.000005, 0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+                   0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+class Histogram:
+    """
+    This class counts observations in buckets, like a Prometheus histogram.
+
+    Attributes:
+        bounds (tuple): The upper bounds of the buckets, the last bucket (+Inf) is implicit.
+        counts (list): The number of observations of each bucket (not cumulative).
+        sum (float): The sum of the observations.
+        count (int): The number of observations.
+
+    Methods:
+        __init__(self, bounds=DEFAULT_BUCKETS): The constructor.
+        observe(self, value): Count an observation.
+        cumulative(self): Return the (upper bound, cumulative count) pairs.
+
+    Examples:
+
+    >>> histogram = Histogram((0.001, 0.01))
+    >>> for value in (0.0005, 0.001, 0.005, 2.0):
+    ...     histogram.observe(value)
+    >>> histogram.cumulative()
+    [('0.001', 2), ('0.01', 3), ('+Inf', 4)]
+    """
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+
+    def __init__(self, bounds=DEFAULT_BUCKETS):
+        """ Initialize an empty histogram. """
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+
+
+    def observe(self, value):
+        """ Count an observation in the first bucket whose bound is not below it. """
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+
+    def cumulative(self):
+        """ Return the (upper bound, cumulative count) pairs, the last bound being '+Inf'. """
+        pairs = []
+        total = 0
+        for bound, count in zip(self.bounds + (float("inf"),), self.counts):
+            total += count
+            pairs.append(("+Inf" if bound == float("inf") else repr(bound), total))
+        return pairs
+
+
+
+class CommandStats:
+    """
+    This class holds the metrics of one command word.
+
+    Attributes:
+        latency (Histogram): The latency of the command, its count is the number of calls.
+        failures (int): The number of calls whose action returned False.
+        quest_seconds (float): The time the calls spent checking quests.
+    """
+
+    __slots__ = ("latency", "failures", "quest_seconds")
+
+
+    def __init__(self, buckets):
+        """ Initialize the metrics of a command word. """
+        self.latency = Histogram(buckets)
+        self.failures = 0
+        self.quest_seconds = 0.0
+
+
+
+class Metrics:
+    """
+    This class collects the metrics of the commands and quest checks of the games of a process.
+
+    Attributes:
+        buckets (tuple): The upper bounds of the histogram buckets, in seconds.
+        commands (dict): The CommandStats of each command word.
+        unknown_commands (int): The number of lines that were not a command.
+        quest_checks (dict): The histogram of each kind of quest check.
+        quest_check_seconds (float): The total time spent checking quests.
+
+    Methods:
+        __init__(self, buckets=DEFAULT_BUCKETS): The constructor.
+        observe_command(self, command_word, seconds, failed, quest_seconds=0.0): Record a command.
+        observe_unknown(self): Record a line that was not a command.
+        observe_quest_check(self, kind, seconds): Record a quest check.
+        render(self): Return the metrics in the Prometheus text format.
+        write(self, path): Write the metrics to a file atomically.
+
+    Examples:
+
+    >>> from game import Game
+    >>> from output import NullSink
+    >>> metrics = Metrics()
+    >>> game = Game(NullSink(), seed=1)
+    >>> game.setup("Bob")
+    >>> game.set_metrics(metrics)
+    >>> for command in ["go E", "go X", "take valise", "dance"]:
+    ...     _ = game.play_turn(command)
+    >>> metrics.commands["go"].latency.count, metrics.commands["go"].failures, metrics.unknown_commands
+    (2, 1, 1)
+    >>> 'tba_commands_total{command="take"} 1' in metrics.render().splitlines()
+    True
+    """
+
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """ Initialize empty metrics. """
+        self.buckets = buckets
+        self.commands = {}
+        self.unknown_commands = 0
+        self.quest_checks = {}
+        self.quest_check_seconds = 0.0
+
+
+
+    def observe_command(self, command_word, seconds, failed, quest_seconds=0.0):
+        """
+        Record a command played through Game.process_command.
+
+        Args:
+            command_word (str): The command word.
+            seconds (float): The time the action took.
+            failed (bool): Whether the action returned False.
+            quest_seconds (float): The part of that time spent checking quests.
+        """
+        stats = self.commands.get(command_word)
+        if stats is None:
+            stats = self.commands[command_word] = CommandStats(self.buckets)
+        stats.latency.observe(seconds)
+        if failed:
+            stats.failures += 1
+        stats.quest_seconds += quest_seconds
+
+
+
+    def observe_unknown(self):
+        """ Record a line that was not a command. """
+        self.unknown_commands += 1
+
+
+
+    def observe_quest_check(self, kind, seconds):
+        """
+        Record a quest check of the QuestManager.
+
+        Args:
+            kind (str): "objective", "room", "action" or "counter".
+            seconds (float): The time the check took.
+        """
+        histogram = self.quest_checks.get(kind)
+        if histogram is None:
+            histogram = self.quest_checks[kind] = Histogram(self.buckets)
+        histogram.observe(seconds)
+        self.quest_check_seconds += seconds
+
+
+
+    def render(self):
+        """ Return the metrics in the Prometheus text exposition format. """
+        lines = []
+        commands = sorted(self.commands.items())
+        _histogram(lines, "tba_command_duration_seconds", "Latence des commandes.",
+                   "command", [(word, stats.latency) for word, stats in commands])
+        _counter(lines, "tba_commands_total", "Nombre de commandes jouées.",
+                 "command", [(word, stats.latency.count) for word, stats in commands])
+        _counter(lines, "tba_command_failures_total", "Nombre de commandes dont l'action a échoué.",
+                 "command", [(word, stats.failures) for word, stats in commands])
+        _counter(lines, "tba_command_quest_check_seconds_total", "Temps passé par les commandes à vérifier les quêtes.",
+                 "command", [(word, repr(stats.quest_seconds)) for word, stats in commands])
+        _counter(lines, "tba_unknown_commands_total", "Nombre de lignes qui n'étaient pas une commande.",
+                 None, [(None, self.unknown_commands)])
+        _histogram(lines, "tba_quest_check_duration_seconds", "Durée des vérifications de quêtes.",
+                   "check", sorted(self.quest_checks.items()))
+        return "\n".join(lines) + "\n"
+
+
+
+    def write(self, path):
+        """ Write the metrics to a file, through a temporary file so that readers never see a partial file. """
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            file.write(self.render())
+        os.replace(temporary, path)
+
+
+
+def _labels(label, value, extra=None):
+    """ Return the label set of a sample, e.g. '{command="go",le="0.001"}'. """
+    pairs = []
+    if label is not None:
+        escaped = value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{label}="{escaped}"')
+    if extra is not None:
+        pairs.append(f'le="{extra}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+
+def _counter(lines, name, help_text, label, samples):
+    """ Append a counter and its samples. """
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} counter")
+    for value, count in samples:
+        lines.append(f"{name}{_labels(label, value)} {count}")
+
+
+
+def _histogram(lines, name, help_text, label, samples):
+    """ Append a histogram and its buckets, sum and count for each label value. """
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for value, histogram in samples:
+        for bound, count in histogram.cumulative():
+            lines.append(f"{name}_bucket{_labels(label, value, bound)} {count}")
+        lines.append(f"{name}_sum{_labels(label, value)} {histogram.sum!r}")
+        lines.append(f"{name}_count{_labels(label, value)} {histogram.count}")
+
+
+
+async def start_endpoint(metrics, host="127.0.0.1", port=9100, timeout=5.0):
+    """
+    Serve the metrics over HTTP (GET /metrics) from the running event loop.
+
+    Args:
+        metrics (Metrics): The metrics to serve.
+        host (str): The address to listen on.
+        port (int): The port to listen on (0 picks a free port).
+        timeout (float): The seconds a client has to send its request,
+                         the connection is closed when they run out.
+
+    Returns:
+        asyncio.Server: The endpoint, close it to stop serving.
+    """
+    async def read_request(reader):
+        # Read the request line, then skip the headers up to the blank line
+        request = await reader.readline()
+        while (await reader.readline()).strip():
+            pass
+        return request
+
+    async def handle(reader, writer):
+        try:
+            try:
+                request = await asyncio.wait_for(read_request(reader), timeout)
+            except asyncio.TimeoutError:
+                return
+            parts = request.decode("latin-1").split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+                status, content_type, body = "200 OK", "text/plain; version=0.0.4; charset=utf-8", metrics.render()
+            else:
+                status, content_type, body = "404 Not Found", "text/plain; charset=utf-8", "Not Found\n"
+            body = body.encode("utf-8")
+            writer.write(f"HTTP/1.0 {status}\r\nContent-Type: {content_type}\r\n"
+                         f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1") + body)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
@@ -0,0 +1,203 @@
+# Description: Output sinks
+
+"""Output module.
+
+This module defines the output sinks the game writes to instead of calling
+print directly. Every write carries a kind so that structured consumers can
+tell the messages apart:
+
+- "room": the description of a room
+- "dialogue": what a character says
+- "quest": quest activation, progress and completion
+- "reward": a reward given to the player
+- "error": a command that could not be executed
+- "end": the end of the game (win or lose)
+- "info": everything else
+
+The sinks are:
+
+- StdoutSink: writes every message immediately (the default).
+- BufferedSink: keeps the messages and writes them in one go on flush.
+- NullSink: drops everything, for simulations.
+- EventSink: keeps (kind, text) events for structured consumers.
+"""
+
+import sys
+
+
+class OutputSink:
+    """
+    This class is the base of all output sinks.
+
+    Methods:
+        write(self, text="", kind="info"): Write one message.
+        flush(self): Deliver the pending messages and return them.
+    """
+
+
+    def write(self, text="", kind="info"):
+        """
+        Write one message, the equivalent of one call to print.
+
+        Args:
+            text: The message (converted with str).
+            kind (str): The kind of message.
+        """
+        raise NotImplementedError
+
+
+
+    def flush(self):
+        """
+        Deliver the pending messages.
+
+        Returns:
+            The messages delivered by this flush, in the format of the sink.
+        """
+        return None
+
+
+
+class StdoutSink(OutputSink):
+    """
+    This class writes every message immediately, like print.
+
+    Attributes:
+        stream: The stream to write to (default: the current sys.stdout).
+
+    Examples:
+
+    >>> StdoutSink().write("Bonjour")
+    Bonjour
+    """
+
+
+    def __init__(self, stream=None):
+        """ Initialize the sink with an optional stream. """
+        self.stream = stream
+
+
+
+    def write(self, text="", kind="info"):
+        """ Write the message and a newline to the stream. """
+        stream = self.stream if self.stream is not None else sys.stdout
+        stream.write(f"{text}\n")
+
+
+
+class BufferedSink(OutputSink):
+    """
+    This class keeps the messages until flush, then writes them in one go.
+
+    Attributes:
+        stream: The stream to write to on flush, or None to only return the text.
+        lines (list): The pending messages.
+
+    Examples:
+
+    >>> sink = BufferedSink()
+    >>> sink.write("Bonjour")
+    >>> sink.write("Au revoir", "info")
+    >>> sink.flush()
+    'Bonjour\\nAu revoir\\n'
+    >>> sink.flush()
+    ''
+    """
+
+
+    def __init__(self, stream=None):
+        """ Initialize the sink with an optional stream. """
+        self.stream = stream
+        self.lines = []
+
+
+
+    def write(self, text="", kind="info"):
+        """ Keep the message until the next flush. """
+        self.lines.append(f"{text}\n")
+
+
+
+    def flush(self):
+        """
+        Write the pending messages to the stream with a single call.
+
+        Returns:
+            str: The text that was flushed.
+        """
+        text = "".join(self.lines)
+        self.lines.clear()
+        if text and self.stream is not None:
+            self.stream.write(text)
+            self.stream.flush()
+        return text
+
+
+
+class NullSink(OutputSink):
+    """
+    This class drops every message.
+
+    Examples:
+
+    >>> sink = NullSink()
+    >>> sink.write("Bonjour")
+    >>> sink.flush()
+    ''
+    """
+
+
+    def write(self, text="", kind="info"):
+        """ Drop the message. """
+
+
+
+    def flush(self):
+        """ Return an empty text. """
+        return ""
+
+
+
+class EventSink(OutputSink):
+    """
+    This class keeps every message as a (kind, text) event.
+
+    Attributes:
+        events (list): The pending events.
+
+    Examples:
+
+    >>> sink = EventSink()
+    >>> sink.write("Aucune porte dans cette direction !", "error")
+    >>> sink.flush()
+    [('error', 'Aucune porte dans cette direction !')]
+    """
+
+
+    def __init__(self):
+        """ Initialize the sink with no event. """
+        self.events = []
+
+
+
+    def write(self, text="", kind="info"):
+        """ Keep the message as an event. """
+        self.events.append((kind, str(text)))
+
+
+
+    def flush(self):
+        """
+        Return the pending events and forget them.
+
+        Returns:
+            list: The (kind, text) events.
+        """
+        events = self.events
+        self.events = []
+        return events
+
+
+
+# The sink used by objects that have not been given one.
+STDOUT = StdoutSink()
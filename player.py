@@ -1,3 +1,10 @@
+from collections import deque
+
+from output import STDOUT
+
+# The number of rooms kept in the history, for 'back' and 'history'.
+HISTORY_LENGTH = 100
+
 # Define the Player class.
 class Player():
     """
@@ -6,21 +13,30 @@ class Player():
     Attributes:
         name (str): The name of the player.
         current_room (Room): The current room where the player is located.
-        history (list): A list of rooms the player has visited.
+        history (deque): The last HISTORY_LENGTH rooms the player has been in, the current one last.
+        visited (set): Every room the player has been in.
         inventory (dict): The inventory of the player.
+        inventory_weight (float): The total weight of the inventory, kept up to date by add_item and remove_item.
         max_weight (float): The maximum weight the player can carry.
         rewards (list): A list of rewards earned by the player.
         move_count (int): A counter for the number of moves made by the player.
         active_quests (list): A list of active quests for the player.
         completed_quests (list): A list of completed quests for the player.
         quest_manager (QuestManager): An instance to manage quests for the player.
+        output (OutputSink): The sink the player writes messages to.
 
     Methods:
         __init__(self, name): The constructor.
         move(self, direction): Move the player in the given direction.
+        enter(self, room): Make a room the current room and record it.
         get_history(self): Return the history of rooms visited by the player.
+        get_history_page(self, page, page_size=10): Return one page of the history.
         show_history'(self): Display the history of rooms visited by the player.
         get_inventory(self): Return the inventory of the player.
+        add_item(self, item_name, item, source=None): Put an item in the inventory.
+        remove_item(self, item_name, destination=None): Take an item out of the inventory.
+        remaining_capacity(self): Return the weight the player can still carry.
+        can_carry(self, item): Return True if the player can carry one more item.
         add_reward(self, reward): Add a reward to the player's rewards list.
         show_rewards(self): Display all rewards earned by the player.
 
@@ -34,14 +50,17 @@ class Player():
         """ Initialize a player with a name, current room, history, inventory, and other attributes. """
         self.name = name
         self.current_room = None
-        self.history = []  
+        self.history = deque(maxlen=HISTORY_LENGTH)
+        self.visited = set()
         self.inventory = {} 
+        self.inventory_weight = 0.0
         self.max_weight = 10
         self.rewards = []  # List to store rewards earned by the player. 
         self.move_count = 0  # Counter for the number of moves made by the player.
         self.active_quests = []  # List to store active quests for the player.
         self.completed_quests = []  # List to store completed quests for the player.
         self.quest_manager = None # QuestManager instance to manage quests for the player.
+        self.output = STDOUT # Sink the player writes messages to.
     
 
 
@@ -53,13 +72,12 @@ class Player():
 
         # If the next room is None, print an error message and return False.
         if next_room is None:
-            print("\nAucune porte dans cette direction !\n")
+            self.output.write("\nAucune porte dans cette direction !\n", "error")
             return False
 
         # Set the current room to the next room.
-        self.current_room = next_room
-        self.history.append(next_room)
-        print(self.current_room.get_long_description())
+        self.enter(next_room)
+        self.output.write(self.current_room.get_long_description(), "room")
         # Update move counter and notify quest manager (if any)
         try:
             self.move_count += 1
@@ -76,6 +94,25 @@ class Player():
 
 
 
+    def enter(self, room):
+        """
+        Make a room the current room and record it in the history and the visited rooms.
+
+        Examples:
+
+        >>> from room import Room
+        >>> player = Player("Bob")
+        >>> hall = Room("Hall", "a hall")
+        >>> player.enter(hall)
+        >>> player.current_room is hall, hall in player.visited, len(player.history)
+        (True, True, 1)
+        """
+        self.current_room = room
+        self.history.append(room)
+        self.visited.add(room)
+
+
+
     def get_history(self):
         """Return the history of rooms visited by the player.
 
@@ -85,18 +122,120 @@ class Player():
     
 
 
+    def get_history_page(self, page, page_size=10):
+        """
+        Return one page of the history, the first page holding the most recent rooms.
+
+        Args:
+            page (int): The page number, from 1.
+            page_size (int): The number of rooms per page.
+
+        Returns:
+            list: The rooms of the page, oldest first.
+
+        Examples:
+
+        >>> from room import Room
+        >>> player = Player("Bob")
+        >>> for name in "ABCDE":
+        ...     player.enter(Room(name, name))
+        >>> [room.name for room in player.get_history_page(1, 2)], [room.name for room in player.get_history_page(3, 2)]
+        (['D', 'E'], ['A'])
+        """
+        end = len(self.history) - (page - 1) * page_size
+        start = max(0, end - page_size)
+        return [self.history[i] for i in range(start, end)] if end > 0 else []
+
+
+
     def show_history(self):
         """Display the history of rooms visited by the player."""
-        print("Historique des pièces visitées :\n")   
+        self.output.write("Historique des pièces visitées :\n")   
         for room in self.history:
-            print(room.name)
-        print("\n")
+            self.output.write(room.name)
+        self.output.write("\n")
 
 
 
     def get_inventory(self):
         """Return the inventory of the player."""
         return self.inventory
+
+
+
+    def add_item(self, item_name, item, source=None):
+        """
+        Put an item in the inventory and add its weight to the total.
+
+        This is the only way items should enter the inventory, so the total
+        stays right. The capacity is not checked, see can_carry.
+
+        Args:
+            item_name (str): The name of the item.
+            item (Item): The item.
+            source (dict): The inventory the item comes from (e.g. the room's),
+                           None if it comes from nowhere. Between two views of
+                           the same ItemLocations, the move is one table update.
+
+        Examples:
+
+        >>> from item import Item
+        >>> player = Player("Bob")
+        >>> room_inventory = {"valise": Item("valise", "Une valise.", "8")}
+        >>> player.add_item("valise", room_inventory["valise"], room_inventory)
+        >>> player.inventory_weight, player.remaining_capacity(), room_inventory
+        (8.0, 2.0, {})
+        """
+        previous = self.inventory.get(item_name)
+        if previous is not None:
+            self.inventory_weight -= previous.weight
+        self.inventory[item_name] = item
+        if source is not None and item_name in source:
+            # Plain dicts only, a view of the same table has already lost the item
+            del source[item_name]
+        self.inventory_weight += item.weight
+
+
+
+    def remove_item(self, item_name, destination=None):
+        """
+        Take an item out of the inventory and remove its weight from the total.
+
+        This is the only way items should leave the inventory, so the total
+        stays right.
+
+        Args:
+            item_name (str): The name of the item.
+            destination (dict): The inventory the item goes to (e.g. the room's),
+                                None to take it out of the game. Between two
+                                views of the same ItemLocations, the move is one
+                                table update.
+
+        Returns:
+            Item: The item, None if it is not in the inventory.
+        """
+        item = self.inventory.get(item_name)
+        if item is None:
+            return None
+        if destination is not None:
+            destination[item_name] = item
+        if item_name in self.inventory:
+            del self.inventory[item_name]
+        # Reset the total when the inventory is empty, so rounding errors don't pile up
+        self.inventory_weight = self.inventory_weight - item.weight if self.inventory else 0.0
+        return item
+
+
+
+    def remaining_capacity(self):
+        """Return the weight the player can still carry."""
+        return self.max_weight - self.inventory_weight
+
+
+
+    def can_carry(self, item):
+        """Return True if the player can carry the item in addition to the inventory."""
+        return self.inventory_weight + item.weight <= self.max_weight
     
 
 
@@ -116,7 +255,7 @@ class Player():
        """
        if reward and reward not in self.rewards:
            self.rewards.append(reward)
-           print(f"\n🎁 Vous avez obtenu: {reward}\n")
+           self.output.write(f"\n🎁 Vous avez obtenu: {reward}\n", "reward")
 
 
 
@@ -138,9 +277,9 @@ class Player():
        <BLANKLINE>
        """
        if not self.rewards:
-           print("\n🎁 Aucune récompense obtenue pour le moment.\n")
+           self.output.write("\n🎁 Aucune récompense obtenue pour le moment.\n", "reward")
        else:
-           print("\n🎁 Vos récompenses:")
+           self.output.write("\n🎁 Vos récompenses:", "reward")
            for reward in self.rewards:
-               print(f"  • {reward}")
-           print()
+               self.output.write(f"  • {reward}", "reward")
+           self.output.write()
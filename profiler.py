@@ -0,0 +1,268 @@
+# Description: SamplingProfiler class
+
+"""Profiler module.
+
+This module defines a sampling profiler that can be switched on and off in a
+running game or server, without restarting it and without the overhead of a
+tracing profiler such as cProfile: the profiled code runs at full speed and
+its stack is only looked at every interval seconds.
+
+Two clocks can drive the samples:
+
+- "cpu" (default where available): a SIGPROF interval timer counting the CPU
+  time of the process. The signal handler runs in the main thread on the
+  interrupted frame, so the samples show where the CPU time goes; waiting
+  for the network costs nothing and is not sampled.
+- "wall": a background thread reading the stack of a thread. It also works
+  on other threads and platforms, but a sample can only be taken when the
+  sampled thread releases the GIL, so the samples are biased towards I/O
+  calls.
+
+Each sample is one stack, from the outermost frame to the innermost, with a
+frame named "Class.method (file.py)". The frames of Game, Actions, Quest and
+QuestManager are labelled with the session of the game being played, e.g.
+"Actions.take (actions.py) [session 3f2a]", so the time of every session can
+be told apart. Samples are written in the collapsed stack format read by
+flamegraph.pl, inferno or speedscope: one "frame;frame;frame count" line per
+distinct stack.
+
+The profiler is toggled by the SIGUSR2 signal in game.py and server.py, and
+by the admin command of the server (see GameServer).
+"""
+
+import os
+import signal
+import sys
+import threading
+import time
+
+# The classes whose frames are labelled with the session of their game.
+LABELLED_CLASSES = ("Game.", "Actions.", "Quest.", "QuestManager.")
+# The signal that toggles the profiler.
+TOGGLE_SIGNAL = getattr(signal, "SIGUSR2", None)
+# The clock of the samples, "cpu" where the platform has interval timers.
+DEFAULT_MODE = "cpu" if hasattr(signal, "setitimer") else "wall"
+
+
+class SamplingProfiler:
+    """
+    This class samples the stack of a thread at a fixed interval.
+
+    Attributes:
+        interval (float): The seconds between two samples.
+        mode (str): "cpu" (CPU time of the main thread) or "wall" (wall time of any thread).
+        thread_id (int): The ident of the thread sampled in wall mode (default: the main thread).
+        stacks (dict): The number of samples of each collapsed stack.
+        samples (int): The number of samples taken.
+        running (bool): Whether the profiler is sampling.
+
+    Methods:
+        __init__(self, interval=0.005, mode=DEFAULT_MODE, thread_id=None): The constructor.
+        start(self): Start sampling.
+        stop(self): Stop sampling.
+        clear(self): Forget the samples.
+        collapsed(self): Return the samples in the collapsed stack format.
+        write(self, path): Write the samples to a file.
+        toggle(self, directory="."): Start, or stop and write the samples to a new file.
+
+    Examples:
+
+    >>> from game import Game
+    >>> from output import NullSink
+    >>> game = Game(NullSink(), seed=1)
+    >>> game.setup("Bob")
+    >>> game.session_id = "demo"
+    >>> profiler = SamplingProfiler(interval=0.001)
+    >>> profiler.start()
+    >>> while profiler.samples < 20:
+    ...     _ = game.play_turn("look")
+    >>> profiler.stop()
+    >>> "Game.play_turn (game.py) [session demo]" in profiler.collapsed()
+    True
+    """
+
+
+    def __init__(self, interval=0.005, mode=DEFAULT_MODE, thread_id=None):
+        """
+        Initialize a stopped profiler.
+
+        Args:
+            interval (float): The seconds between two samples.
+            mode (str): "cpu" or "wall", see the module documentation.
+            thread_id (int): The ident of the thread to sample in wall mode (default: the main thread).
+
+        Raises:
+            ValueError: If the mode is unknown or not available on this platform.
+        """
+        if mode not in ("cpu", "wall") or (mode == "cpu" and not hasattr(signal, "setitimer")):
+            raise ValueError(f"Mode de profilage non disponible: '{mode}'.")
+        self.interval = interval
+        self.mode = mode
+        self.thread_id = thread_id if thread_id is not None else threading.main_thread().ident
+        self.stacks = {}
+        self.samples = 0
+        self.running = False
+        self._stop = threading.Event()
+        self._thread = None
+        self._previous_handler = None
+
+
+
+    def start(self):
+        """
+        Start sampling, if not already sampling.
+
+        In cpu mode, it must be called from the main thread (like signal.signal).
+        """
+        if self.running:
+            return
+        if self.mode == "cpu":
+            self._previous_handler = signal.signal(signal.SIGPROF, self._sample_signal)
+            signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        else:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+            self._thread.start()
+        self.running = True
+
+
+
+    def stop(self):
+        """ Stop sampling, the samples are kept. """
+        if not self.running:
+            return
+        if self.mode == "cpu":
+            signal.setitimer(signal.ITIMER_PROF, 0)
+            signal.signal(signal.SIGPROF, self._previous_handler or signal.SIG_DFL)
+        else:
+            self._stop.set()
+            if self._thread is not threading.current_thread():
+                self._thread.join()
+            self._thread = None
+        self.running = False
+
+
+
+    def clear(self):
+        """ Forget the samples. """
+        self.stacks = {}
+        self.samples = 0
+
+
+
+    def _sample_signal(self, signum, frame):
+        # Take a sample of the frame interrupted by the CPU timer
+        self._record(frame)
+
+
+
+    def _run(self):
+        # Take a sample of the sampled thread every interval until stopped
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self._record(frame)
+            del frame
+
+
+
+    def _record(self, frame):
+        """ Count the collapsed stack of a frame. """
+        stack = _collapse(frame)
+        self.stacks[stack] = self.stacks.get(stack, 0) + 1
+        self.samples += 1
+
+
+
+    def collapsed(self):
+        """ Return the samples in the collapsed stack format, one 'frame;frame count' line per stack. """
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(dict(self.stacks).items()))
+
+
+
+    def write(self, path):
+        """ Write the samples to a file in the collapsed stack format. """
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            file.write(self.collapsed())
+        os.replace(temporary, path)
+
+
+
+    def toggle(self, directory="."):
+        """
+        Start the profiler, or stop it and write its samples to a new file.
+
+        Args:
+            directory (str): The directory of the file.
+
+        Returns:
+            str or None: The file written, None if the profiler was started.
+        """
+        if not self.running:
+            self.clear()
+            self.start()
+            return None
+        self.stop()
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"profile-{os.getpid()}-{time.strftime('%Y%m%d-%H%M%S')}.collapsed")
+        self.write(path)
+        return path
+
+
+
+def _collapse(frame):
+    """ Return the collapsed stack of a frame, outermost frame first. """
+    frames = []
+    while frame is not None:
+        frames.append(frame)
+        frame = frame.f_back
+    frames.reverse()
+
+    names = []
+    session = None
+    looked_up = False
+    for frame in frames:
+        code = frame.f_code
+        name = getattr(code, "co_qualname", code.co_name)
+        label = f"{name} ({os.path.basename(code.co_filename)})"
+        if name.startswith(LABELLED_CLASSES):
+            # The outermost Game or Actions frame gives the session of the whole stack
+            if not looked_up and name.startswith(("Game.", "Actions.")):
+                session = _session_of(frame, name)
+                looked_up = True
+            if session is not None:
+                label += f" [session {session}]"
+        names.append(label.replace(";", ","))
+    return ";".join(names)
+
+
+
+def _session_of(frame, name):
+    """ Return the session id of the game of a Game or Actions frame, None if there is none. """
+    game = frame.f_locals.get("self" if name.startswith("Game.") else "game")
+    return getattr(game, "session_id", None)
+
+
+
+def install_signal_handler(profiler, directory=".", signum=TOGGLE_SIGNAL):
+    """
+    Toggle a profiler whenever the process receives a signal (SIGUSR2 by default).
+
+    Args:
+        profiler (SamplingProfiler): The profiler.
+        directory (str): The directory the samples are written to when it stops.
+        signum (int): The signal, None where the platform has no SIGUSR2.
+
+    Returns:
+        bool: True if the handler was installed.
+    """
+    if signum is None:
+        return False
+
+    def handle(signum, frame):
+        path = profiler.toggle(directory)
+        sys.stderr.write(f"Profil écrit dans {path}\n" if path else "Profilage démarré\n")
+
+    signal.signal(signum, handle)
+    return True
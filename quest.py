@@ -1,5 +1,142 @@
 """ Define the Quest class"""
 
+import heapq
+import re
+import time
+
+from output import STDOUT
+
+
+# The phrasings of room objectives: one of these prefixes followed by the room name.
+ROOM_OBJECTIVE_PREFIXES = (
+    "Visiter ",
+    "Explorer ",
+    "Aller à ",
+    "Entrer dans ",
+    "Aller à l'",
+    "Entrer dans l'",
+    "Aller à la ",
+    "Entrer dans la ",
+    "Aller dans le bon ",
+    "Aller aux ",
+    "Entrer dans le ",
+)
+
+# The phrasings of action objectives, with the action and its target.
+ACTION_OBJECTIVE_PATTERNS = (
+    "{action} {target}",
+    "{action} avec {target}",
+    "{action} le bon {target}",
+    "{action} le {target}",
+    "{action} la {target}",
+    "{action} l'{target}",
+    "{action} aux {target}",
+    "{action} des {target}",
+    "{action} de {target}",
+    "{action} du {target}",
+    "{action} de la {target}",
+    "{action} de l'{target}",
+    "'{action} de aux {target}",
+    "{action} chez {target}",
+    "{action} sur le {target}",
+    "{action} à {target}",
+    "{action} {target} à {target}",
+    "{action} {target} au {target}",
+    "{action} la {target} contre le {target}",
+    "{action} le livre sur les {target}",
+)
+
+
+
+def _compile_action_pattern(pattern):
+    """ Turn an action phrasing into a regular expression capturing the action and target. """
+    regex = ""
+    has_target = False
+    for part in re.split(r"(\{action\}|\{target\})", pattern):
+        if part == "{action}":
+            regex += r"(?P<action>\S+)"
+        elif part == "{target}":
+            regex += r"(?P=target)" if has_target else r"(?P<target>.+)"
+            has_target = True
+        else:
+            regex += re.escape(part)
+    return re.compile(regex)
+
+
+_ACTION_OBJECTIVE_REGEXES = tuple(_compile_action_pattern(pattern) for pattern in ACTION_OBJECTIVE_PATTERNS)
+
+def parse_counter_objective(objective):
+    """
+    Parse a counting objective into the name of its counter and its threshold.
+
+    The threshold is the first number of the objective and the counter is the
+    text before it (or after it when the objective starts with the number).
+
+    Args:
+        objective (str): The objective text.
+
+    Returns:
+        tuple or None: The lower-cased counter name and the threshold, None if
+                       the objective has no number.
+
+    Examples:
+
+    >>> parse_counter_objective("Se déplacer 10 fois")
+    ('se déplacer', 10)
+    >>> parse_counter_objective("3 lieux visités")
+    ('lieux visités', 3)
+    >>> parse_counter_objective("Visiter foret") is None
+    True
+    """
+    words = objective.split()
+    for index, word in enumerate(words):
+        if word.isdigit():
+            counter = " ".join(words[:index]) or " ".join(words[index + 1:])
+            return counter.lower(), int(word)
+    return None
+
+
+
+# The prefix of the objectives completed by completing another quest ("Compléter <title>").
+DEPENDENCY_OBJECTIVE_PREFIX = "Compléter "
+
+
+
+def objective_keys(objective):
+    """
+    Return the normalized keys of the events that complete an objective.
+
+    An objective is completed by the exact text ("text", text), by entering
+    a room ("room", room) when it uses a room phrasing, and by an action on
+    a target ("action", action, target) when it uses an action phrasing.
+    Everything is lower-cased.
+
+    Args:
+        objective (str): The objective text.
+
+    Returns:
+        set: The keys.
+
+    Examples:
+
+    >>> sorted(objective_keys("Aller à la bibliotheque"))
+    [('action', 'aller', 'la bibliotheque'), ('action', 'aller', 'à la bibliotheque'), ('room', 'bibliotheque'), ('room', 'la bibliotheque'), ('text', 'aller à la bibliotheque')]
+    >>> ("action", "talk", "dumbledore") in objective_keys("talk à Dumbledore")
+    True
+    """
+    text = objective.lower()
+    keys = {("text", text)}
+    for prefix in ROOM_OBJECTIVE_PREFIXES:
+        prefix = prefix.lower()
+        if text.startswith(prefix) and len(text) > len(prefix):
+            keys.add(("room", text[len(prefix):]))
+    for regex in _ACTION_OBJECTIVE_REGEXES:
+        match = regex.fullmatch(text)
+        if match:
+            keys.add(("action", match.group("action"), match.group("target")))
+    return keys
+
+
 class Quest:
     """
     This class represents a quest in the game. A quest has a title, description,
@@ -9,14 +146,20 @@ class Quest:
         title (str): The title of the quest.
         description (str): The description of the quest.
         objectives (list): List of objectives to complete.
+        prerequisites (tuple): The titles of the quests to complete before this one is activated automatically.
+        counter_objectives (list): The (counter, threshold, objective) triples of the counting objectives.
+        objective_lookup (dict): The objectives by lower-cased text.
         is_completed (bool): Whether the quest is completed.
         is_active (bool): Whether the quest is currently active.
         reward (str): Optional reward for completing the quest.
+        output (OutputSink): The sink the quest writes messages to.
+        manager (QuestManager): The manager the quest belongs to, told when the quest is completed.
 
     Methods:
-        __init__(self, title, description, objectives=None, reward=None): The constructor.
+        __init__(self, title, description, objectives=None, reward=None, prerequisites=None): The constructor.
         activate(self): Activate the quest.
         complete_objective(self, objective, player=None): Mark an objective as completed.
+        mark_objective_completed(self, objective, player=None): Mark one of the quest's objectives as completed.
         complete_quest(self, player=None): Complete the quest.
         get_status(self): Get the current status of the quest.
         get_details(self, current_counts=None): Get detailed information about the quest.
@@ -25,12 +168,14 @@ class Quest:
         check_room_objective(self, room_name, player=None): Check if visiting a room completes an objective.
         check_action_objective(self, action, target=None, player=None): Check if performing an action completes an objective.
         check_counter_objective(self, counter_name, current_count, player=None): Check counting objectives.
+        dependencies(self): Return the titles of the quests this quest depends on.
+        fork(self): Return a copy of the quest with its own progress.
         __str__(self): Return a string representation of the quest.
         
     """
 
 
-    def __init__(self, title, description, objectives=None, reward=None):
+    def __init__(self, title, description, objectives=None, reward=None, prerequisites=None):
         """
         Initialize a new quest.
         
@@ -39,14 +184,25 @@ class Quest:
             description (str): The description of the quest.
             objectives (list): List of objectives (default: empty list).
             reward (str): Optional reward description.
+            prerequisites (list): Titles of the quests that activate this one
+                                  once they are all completed (default: none).
         """
         self.title = title
         self.description = description
         self.objectives = objectives if objectives is not None else []
+        self.prerequisites = tuple(prerequisites) if prerequisites is not None else ()
+        self.counter_objectives = []
+        for objective in self.objectives:
+            parsed = parse_counter_objective(objective)
+            if parsed is not None:
+                self.counter_objectives.append((*parsed, objective))
+        self.objective_lookup = {objective.lower(): objective for objective in reversed(self.objectives)}
         self.completed_objectives = []
         self.is_completed = False
         self.is_active = False
         self.reward = reward
+        self.output = STDOUT
+        self.manager = None
 
 
 
@@ -68,8 +224,8 @@ class Quest:
         True
         """
         self.is_active = True
-        print(f"\n🗡️  Nouvelle quête activée: {self.title}")
-        print(f"📝 {self.description}\n")
+        self.output.write(f"\n🗡️  Nouvelle quête activée: {self.title}", "quest")
+        self.output.write(f"📝 {self.description}\n", "quest")
 
 
 
@@ -99,27 +255,34 @@ class Quest:
         """
         # Match objectives case-insensitively so small differences in casing
         # (or apostrophe capitalization) don't prevent completion.
-        matching = None
-        for obj in self.objectives:
-            if obj.lower() == objective.lower():
-                matching = obj
-                break
+        matching = self.objective_lookup.get(objective.lower())
 
         if matching and matching not in self.completed_objectives:
-            self.completed_objectives.append(matching)
-            print(f"✅ Objectif accompli: {matching}\n")
-    
-
-            # Check if all objectives are completed
-            if len(self.completed_objectives) == len(self.objectives):
-                self.complete_quest(player)
-
+            self.mark_objective_completed(matching, player)
             return True
 
         return False
 
 
 
+    def mark_objective_completed(self, objective, player=None):
+        """
+        Mark one of the quest's objectives as completed and complete the quest
+        when it was the last one.
+
+        Args:
+            objective (str): The objective, exactly as in self.objectives.
+            player: The player object (optional).
+        """
+        self.completed_objectives.append(objective)
+        self.output.write(f"✅ Objectif accompli: {objective}\n", "quest")
+
+        # Check if all objectives are completed
+        if len(self.completed_objectives) == len(self.objectives):
+            self.complete_quest(player)
+
+
+
     def complete_quest(self, player=None):
         """
         Mark the quest as completed and give reward to player.
@@ -143,16 +306,19 @@ class Quest:
 
         if not self.is_completed:
             self.is_completed = True
-            print(f"\n🏆 Quête terminée: {self.title}")
+            self.output.write(f"\n🏆 Quête terminée: {self.title}", "quest")
             if self.reward:
-                print(f"🎁 Récompense: {self.reward}")
+                self.output.write(f"🎁 Récompense: {self.reward}", "reward")
                 if player:
                     player.add_reward(self.reward)
-            print()
+            self.output.write()
 
-            # Check for quest completion dependencies
-            if player and hasattr(player, 'quest_manager'):
-                player.quest_manager.check_quest_completion_dependencies(self.title)
+            # Tell the manager (dependencies, active quests, completion callbacks)
+            manager = self.manager
+            if manager is None and player and hasattr(player, 'quest_manager'):
+                manager = player.quest_manager
+            if manager is not None:
+                manager.quest_completed(self)
 
 
 
@@ -242,14 +408,12 @@ class Quest:
         if not current_counts:
             return objective
 
-        for counter_name, current_count in current_counts.items():
-            if counter_name not in objective:
+        for counter, required, counter_objective in self.counter_objectives:
+            if counter_objective != objective:
                 continue
-
-            # Extract required count from objective
-            required = self._extract_number_from_text(objective)
-            if required is not None:
-                return f"{objective} (Progression: {current_count}/{required})"
+            for counter_name, current_count in current_counts.items():
+                if counter_name.lower() == counter:
+                    return f"{objective} (Progression: {current_count}/{required})"
 
         return objective
 
@@ -295,20 +459,7 @@ class Quest:
         >>> quest.check_room_objective("Tower")
         False
         """
-        room_objectives = [
-            f"Visiter {room_name}",
-            f"Explorer {room_name}",
-            f"Aller à {room_name}",
-            f"Entrer dans {room_name}",
-            f"Aller à l'{room_name}",
-            f"Entrer dans l'{room_name}",
-            f"Aller à la {room_name}",
-            f"Entrer dans la {room_name}",
-            f"Aller dans le bon {room_name}",
-            f"Entrer dans l'{room_name}",
-            f"Aller aux {room_name}",
-            f"Entrer dans le {room_name}"
-        ]
+        room_objectives = [prefix + room_name for prefix in ROOM_OBJECTIVE_PREFIXES]
 
         for objective in room_objectives:
             if self.complete_objective(objective, player):
@@ -343,26 +494,7 @@ class Quest:
         """
         if target:
             objective_variations = [
-                f"{action} {target}",
-                f"{action} avec {target}",
-                f"{action} le bon {target}",
-                f"{action} le {target}",
-                f"{action} la {target}",
-                f"{action} l'{target}",
-                f"{action} aux {target}",
-                f"{action} des {target}",
-                f"{action} de {target}",
-                f"{action} du {target}",
-                f"{action} de la {target}",
-                f"{action} de l'{target}",
-                f"'{action} de aux {target}",
-                f"{action} chez {target}",
-                f"{action} sur le {target}",
-                f"{action} à {target}",
-                f"{action} {target} à {target}",
-                f"{action} {target} au {target}",
-                f"{action} la {target} contre le {target}",
-                f"{action} le livre sur les {target}"
+                pattern.format(action=action, target=target) for pattern in ACTION_OBJECTIVE_PATTERNS
             ]
         else:
             objective_variations = [action]
@@ -398,20 +530,65 @@ class Quest:
         <BLANKLINE>
         True
         """
-        for objective in self.objectives:
-            if counter_name in objective and objective not in self.completed_objectives:
-                # Extract number from objective (e.g., "Visiter 3 lieux" -> 3)
-                words = objective.split()
-                for word in words:
-                    if word.isdigit():
-                        required_count = int(word)
-                        if current_count >= required_count:
-                            self.complete_objective(objective, player)
-                            return True
+        counter_name = counter_name.lower()
+        for counter, required_count, objective in self.counter_objectives:
+            if counter == counter_name and objective not in self.completed_objectives:
+                if current_count >= required_count:
+                    self.mark_objective_completed(objective, player)
+                    return True
         return False
 
 
 
+    def dependencies(self):
+        """
+        Return the quests this quest depends on: its prerequisites and the
+        quests named by its "Compléter <title>" objectives.
+
+        Returns:
+            list: The (title, objective) pairs, objective being None for a prerequisite.
+
+        Examples:
+
+        >>> Quest("Final", "f", ["Compléter Start"], prerequisites=["Intro"]).dependencies()
+        [('Intro', None), ('Start', 'Compléter Start')]
+        """
+        dependencies = [(title, None) for title in self.prerequisites]
+        prefix = DEPENDENCY_OBJECTIVE_PREFIX.lower()
+        for objective in self.objectives:
+            if objective.lower().startswith(prefix):
+                dependencies.append((objective[len(prefix):], objective))
+        return dependencies
+
+
+
+    def fork(self):
+        """
+        Return a copy of the quest for a new game session.
+
+        The title, description, objectives and reward are shared with the
+        original, only the progress belongs to the copy.
+
+        Returns:
+            Quest: The new quest.
+        """
+        quest = Quest.__new__(Quest)
+        quest.title = self.title
+        quest.description = self.description
+        quest.objectives = self.objectives
+        quest.prerequisites = self.prerequisites
+        quest.counter_objectives = self.counter_objectives
+        quest.objective_lookup = self.objective_lookup
+        quest.reward = self.reward
+        quest.output = self.output
+        quest.manager = None
+        quest.completed_objectives = self.completed_objectives.copy()
+        quest.is_completed = self.is_completed
+        quest.is_active = self.is_active
+        return quest
+
+
+
     def __str__(self):
         """
         Return a string representation of the quest.
@@ -433,19 +610,94 @@ class Quest:
 
 
 
+class ActiveQuests:
+    """
+    This class holds the active quests: a set for O(1) membership tests and
+    removals, iterated in activation order for display.
+
+    Methods:
+        __init__(self, quests=()): The constructor.
+        add(self, quest): Add a quest.
+        discard(self, quest): Remove a quest if it is there.
+        __contains__(self, quest): Return True if the quest is active.
+        __iter__(self): Iterate over the quests in activation order.
+        __len__(self): Return the number of active quests.
+
+    Examples:
+
+    >>> a, b = Quest("A", "a"), Quest("B", "b")
+    >>> active = ActiveQuests([a, b])
+    >>> active.discard(a)
+    >>> a in active, [quest.title for quest in active]
+    (False, ['B'])
+    """
+
+
+    def __init__(self, quests=()):
+        """ Initialize the view with quests, in order. """
+        self._quests = dict.fromkeys(quests)
+
+
+
+    def add(self, quest):
+        """ Add a quest (after the ones already there). """
+        self._quests[quest] = None
+
+
+
+    def discard(self, quest):
+        """ Remove a quest if it is there. """
+        self._quests.pop(quest, None)
+
+
+
+    def __contains__(self, quest):
+        """ Return True if the quest is active. """
+        return quest in self._quests
+
+
+
+    def __iter__(self):
+        """ Iterate over the quests in activation order. """
+        return iter(self._quests)
+
+
+
+    def __len__(self):
+        """ Return the number of active quests. """
+        return len(self._quests)
+
+
+
 class QuestManager:
     """
     This class manages all quests in the game.
     
     Attributes:
         quests (list): List of all quests in the game.
-        active_quests (list): List of currently active quests.
+        active_quests (ActiveQuests): The currently active quests, in activation order.
+        all_quests (dict): All quests, by title.
+        positions (dict): The position of each quest in quests.
         player: Reference to the player object.
+        objective_index (dict): For each normalized event key (see objective_keys),
+                                the (quest position, objective) pairs it completes.
+        output (OutputSink): The sink the manager and its quests write messages to.
+        completion_callbacks (dict): The functions to call when a quest is completed, by quest title.
+        dependents (dict): The dependency graph reversed: for each lower-cased quest
+                           title, the (quest position, objective) pairs depending on it,
+                           objective being None for a prerequisite.
+        missing_prerequisites (list): The number of prerequisites not completed yet, by quest position.
+        counter_heaps (dict): For each lower-cased counter name, a min-heap of the
+                              (threshold, quest position, objective) of the active quests.
+        metrics (Metrics): The metrics the duration of the checks is recorded in, None when not measured.
 
     Methods:
         __init__(self, player=None): The constructor.
         add_quest(self, quest): Add a quest to the game.    
+        set_output(self, output): Set the sink of the manager and all its quests.
         activate_quest(self, quest_title): Activate a quest by its title.
+        add_completion_callback(self, quest_title, callback): Call a function when a quest is completed.
+        quest_completed(self, quest): Update the manager when one of its quests is completed.
         complete_objective(self, objective_text): Complete an objective in any active quest.
         check_room_objectives(self, room_name): Check all active quests for room-related objectives.
         check_action_objectives(self, action, target=None): Check all active quests for action-related objectives.
@@ -455,6 +707,8 @@ class QuestManager:
         get_quest_by_title(self, title): Get a quest by its title.
         show_quests(self): Display all quests and their status.
         show_quest_details(self, quest_title, current_counts=None): Show detailed information about a specific quest.
+        rebuild_counter_heaps(self): Rebuild the counter heaps from the quest progress.
+        fork(self, player=None): Return a copy of the manager with copies of its quests.
     """
 
 
@@ -475,18 +729,32 @@ class QuestManager:
         0
         """
         self.quests = []
-        self.active_quests = []
+        self.active_quests = ActiveQuests()
         self.player = player
         self.all_quests = {}
+        self.objective_index = {}
+        self.output = STDOUT
+        self.completion_callbacks = {}
+        self.dependents = {}
+        self.missing_prerequisites = []
+        self.counter_heaps = {}
+        self.positions = {}
+        self.metrics = None
 
 
 
     def add_quest(self, quest):
         """
         Add a quest to the game.
+
+        The dependencies of the quest are added to the dependency graph,
+        which must stay acyclic.
         
         Args:
             quest (Quest): The quest to add.
+
+        Raises:
+            ValueError: If the quest depends on a quest that depends on it.
             
         Examples:
         
@@ -497,8 +765,107 @@ class QuestManager:
         1
         >>> manager.quests[0].title
         'Quest 1'
+        >>> manager.add_quest(Quest("Quest 0", "Before", prerequisites=["Quest 2"]))
+        >>> manager.add_quest(Quest("Quest 2", "Loop", ["Compléter Quest 0"]))
+        Traceback (most recent call last):
+        ...
+        ValueError: La quête 'Quest 2' dépend d'elle-même: Quest 2 -> Quest 0 -> Quest 2
         """
+        dependencies = quest.dependencies()
+        self._check_acyclic(quest.title, [title for title, _ in dependencies])
+
+        quest.output = self.output
+        quest.manager = self
+        position = len(self.quests)
         self.quests.append(quest)
+        self.positions[quest] = position
+        self.all_quests.setdefault(quest.title, quest)
+
+        # Normalize the objectives once into the event index
+        for objective in quest.objectives:
+            for key in objective_keys(objective):
+                self.objective_index.setdefault(key, []).append((position, objective))
+
+        # Add the reversed edges of the dependency graph
+        for title, objective in dependencies:
+            self.dependents.setdefault(title.lower(), []).append((position, objective))
+        self.missing_prerequisites.append(len({title.lower() for title in quest.prerequisites}))
+
+
+
+    def _check_acyclic(self, title, dependencies):
+        """
+        Check that a quest can depend on other quests without creating a cycle,
+        which is the case unless one of them already depends on it.
+
+        Args:
+            title (str): The title of the quest.
+            dependencies (list): The titles of the quests it depends on.
+
+        Raises:
+            ValueError: If the new edges would close a cycle.
+        """
+        targets = {dependency.lower() for dependency in dependencies}
+        parents = {title.lower(): None}
+        names = {title.lower(): title}
+        stack = [title.lower()]
+        while stack:
+            current = stack.pop()
+            if current in targets:
+                path = [title, names[current]]
+                while parents[current] is not None:
+                    current = parents[current]
+                    path.append(names[current])
+                raise ValueError(f"La quête '{title}' dépend d'elle-même: {' -> '.join(path)}")
+            for position, _ in self.dependents.get(current, ()):
+                dependent = self.quests[position].title
+                if dependent.lower() not in parents:
+                    parents[dependent.lower()] = current
+                    names[dependent.lower()] = dependent
+                    stack.append(dependent.lower())
+
+
+
+    def _matching_objectives(self, key):
+        """
+        Yield the (quest, objective) pairs of active quests completed by an event.
+
+        Args:
+            key (tuple): The normalized event key.
+        """
+        for position, objective in self.objective_index.get(key, ()):
+            quest = self.quests[position]
+            if quest.is_active and not quest.is_completed and objective not in quest.completed_objectives:
+                yield quest, objective
+
+
+
+    def _complete_matches(self, key):
+        """
+        Complete at most one objective per active quest for an event.
+
+        Args:
+            key (tuple): The normalized event key.
+        """
+        done = set()
+        for quest, objective in self._matching_objectives(key):
+            if id(quest) in done:
+                continue
+            done.add(id(quest))
+            quest.mark_objective_completed(objective, self.player)
+
+
+
+    def set_output(self, output):
+        """
+        Set the sink of the manager and of all its quests.
+
+        Args:
+            output (OutputSink): The sink to write messages to.
+        """
+        self.output = output
+        for quest in self.quests:
+            quest.output = output
 
 
 
@@ -528,15 +895,69 @@ class QuestManager:
         >>> manager.activate_quest("Unknown Quest")
         False
         """
-        for quest in self.quests:
-            if quest.title == quest_title and not quest.is_active:
-                quest.activate()
-                self.active_quests.append(quest)
-                return True
+        quest = self.all_quests.get(quest_title)
+        if quest is not None and not quest.is_active:
+            self._activate(quest)
+            return True
         return False
 
 
 
+    def _activate(self, quest):
+        """
+        Activate a quest and push its counting objectives on the counter heaps.
+
+        Args:
+            quest (Quest): A quest of the manager.
+        """
+        quest.activate()
+        self.active_quests.add(quest)
+        if quest.counter_objectives:
+            position = self.positions[quest]
+            for counter, threshold, objective in quest.counter_objectives:
+                heapq.heappush(self.counter_heaps.setdefault(counter, []), (threshold, position, objective))
+
+
+
+    def add_completion_callback(self, quest_title, callback):
+        """
+        Call a function as soon as a quest is completed.
+
+        Args:
+            quest_title (str): The title of the quest.
+            callback (function): A function taking the completed quest.
+
+        Examples:
+
+        >>> manager = QuestManager()
+        >>> manager.add_quest(Quest("Win", "Win the game", ["Win"]))
+        >>> manager.add_completion_callback("Win", lambda quest: print("Bravo", quest.title))
+        >>> manager.activate_quest("Win") and manager.complete_objective("Win") # doctest: +ELLIPSIS
+        <BLANKLINE>
+        ...
+        Bravo Win
+        True
+        """
+        self.completion_callbacks.setdefault(quest_title, []).append(callback)
+
+
+
+    def quest_completed(self, quest):
+        """
+        Update the manager when one of its quests is completed: remove it from
+        the active quests, complete the objectives depending on it and call the
+        completion callbacks of its title.
+
+        Args:
+            quest (Quest): The quest that was just completed.
+        """
+        self.active_quests.discard(quest)
+        self.check_quest_completion_dependencies(quest.title)
+        for callback in self.completion_callbacks.get(quest.title, ()):
+            callback(quest)
+
+
+
     def complete_objective(self, objective_text):
         """
         Complete an objective in any active quest.
@@ -567,16 +988,31 @@ class QuestManager:
         >>> manager.complete_objective("Do nothing")
         False
         """
-        for quest in self.active_quests:
-            if quest.complete_objective(objective_text, self.player):
-                # Remove completed quests from active list
-                if quest.is_completed:
-                    self.active_quests.remove(quest)
-                return True
+        if self.metrics is not None:
+            return self._timed("objective", self._complete_first, ("text", objective_text.lower()))
+        return self._complete_first(("text", objective_text.lower()))
+
+
+
+    def _complete_first(self, key):
+        """ Complete the first objective matching an event key, return True if there was one. """
+        for quest, objective in self._matching_objectives(key):
+            quest.mark_objective_completed(objective, self.player)
+            return True
         return False
 
 
 
+    def _timed(self, kind, check, *args):
+        """ Run a check and record its duration in the metrics. """
+        start = time.perf_counter()
+        try:
+            return check(*args)
+        finally:
+            self.metrics.observe_quest_check(kind, time.perf_counter() - start)
+
+
+
     def check_room_objectives(self, room_name):
         """
         Check all active quests for room-related objectives.
@@ -603,10 +1039,10 @@ class QuestManager:
         >>> len(manager.active_quests)
         0
         """
-        for quest in self.active_quests[:]:  # Use slice to avoid modification during iteration
-            quest.check_room_objective(room_name, self.player)
-            if quest.is_completed:
-                self.active_quests.remove(quest)
+        if self.metrics is not None:
+            self._timed("room", self._complete_matches, ("room", room_name.lower()))
+        else:
+            self._complete_matches(("room", room_name.lower()))
 
 
 
@@ -637,16 +1073,20 @@ class QuestManager:
         >>> len(manager.active_quests)
         0
         """
-        for quest in self.active_quests[:]:
-            quest.check_action_objective(action, target, self.player)
-            if quest.is_completed:
-                self.active_quests.remove(quest)
+        key = ("action", action.lower(), target.lower()) if target else ("text", action.lower())
+        if self.metrics is not None:
+            self._timed("action", self._complete_matches, key)
+        else:
+            self._complete_matches(key)
 
 
 
     def check_counter_objectives(self, counter_name, current_count):
         """
         Check all active quests for counter-related objectives.
+
+        Only the thresholds crossed by the new count are popped from the heap
+        of the counter, so the cost does not depend on the number of quests.
         
         Args:
             counter_name (str): The name of what is being counted.
@@ -674,10 +1114,21 @@ class QuestManager:
         >>> len(manager.active_quests)
         0
         """
-        for quest in self.active_quests[:]:
-            quest.check_counter_objective(counter_name, current_count, self.player)
-            if quest.is_completed:
-                self.active_quests.remove(quest)
+        if self.metrics is not None:
+            self._timed("counter", self._pop_counter, counter_name, current_count)
+        else:
+            self._pop_counter(counter_name, current_count)
+
+
+
+    def _pop_counter(self, counter_name, current_count):
+        """ Complete the objectives of a counter whose threshold is crossed. """
+        heap = self.counter_heaps.get(counter_name.lower())
+        while heap and heap[0][0] <= current_count:
+            _, position, objective = heapq.heappop(heap)
+            quest = self.quests[position]
+            if quest.is_active and not quest.is_completed and objective not in quest.completed_objectives:
+                quest.mark_objective_completed(objective, self.player)
 
 
 
@@ -686,7 +1137,7 @@ class QuestManager:
         Get all active quests.
         
         Returns:
-            list: List of active quests.
+            ActiveQuests: The active quests, in activation order.
             
         Examples:
         
@@ -752,10 +1203,7 @@ class QuestManager:
         >>> manager.get_quest_by_title("Unknown") is None
         True
         """
-        for quest in self.quests:
-            if quest.title == title:
-                return quest
-        return None
+        return self.all_quests.get(title)
 
 
 
@@ -779,13 +1227,13 @@ class QuestManager:
         <BLANKLINE>
         """
         if not self.quests:
-            print("\nAucune quête disponible.\n")
+            self.output.write("\nAucune quête disponible.\n", "quest")
             return
 
-        print("\n📋 Liste des quêtes:")
+        self.output.write("\n📋 Liste des quêtes:", "quest")
         for quest in self.quests:
-            print(f"  {quest.get_status()}")
-        print()
+            self.output.write(f"  {quest.get_status()}", "quest")
+        self.output.write()
 
 
 
@@ -817,20 +1265,90 @@ class QuestManager:
         """
         quest = self.get_quest_by_title(quest_title)
         if quest:
-            print(quest.get_details(current_counts))
+            self.output.write(quest.get_details(current_counts), "quest")
         else:
-            print(f"\nQuête '{quest_title}' non trouvée.\n")
+            self.output.write(f"\nQuête '{quest_title}' non trouvée.\n", "error")
 
 
 
     def check_quest_completion_dependencies(self, completed_quest_title):
         """
-        Check if completing a quest triggers objectives in other quests.
+        Propagate the completion of a quest to the quests depending on it.
+
+        Only the reversed edges of the completed quest are followed: its
+        "Compléter <title>" objectives are completed in the active quests, and
+        the quests whose prerequisites are now all completed are activated.
         
         Args:
             completed_quest_title (str): The title of the quest that was just completed.
+
+        Examples:
+
+        >>> manager = QuestManager()
+        >>> manager.add_quest(Quest("Start", "s", ["Begin"]))
+        >>> manager.add_quest(Quest("Next", "n", ["Continue"], prerequisites=["Start"]))
+        >>> manager.activate_quest("Start") and manager.complete_objective("Begin") # doctest: +ELLIPSIS
+        <BLANKLINE>
+        ...
+        🗡️  Nouvelle quête activée: Next
+        📝 n
+        <BLANKLINE>
+        True
+        >>> manager.get_quest_by_title("Next").is_active
+        True
+        """
+        for position, objective in self.dependents.get(completed_quest_title.lower(), ()):
+            quest = self.quests[position]
+            if objective is None:
+                self.missing_prerequisites[position] -= 1
+                if self.missing_prerequisites[position] == 0 and not quest.is_active:
+                    self._activate(quest)
+            elif quest.is_active and not quest.is_completed and objective not in quest.completed_objectives:
+                quest.mark_objective_completed(objective, self.player)
+
+
+
+    def rebuild_counter_heaps(self):
+        """
+        Rebuild the counter heaps from the active quests and their completed
+        objectives, e.g. after the progress has been restored from a save.
         """
-        objective_text = f"Compléter {completed_quest_title}"
-        for quest in self.active_quests[:]: # Use slice to avoid modification during iteration
-            if not quest.is_completed:
-                quest.complete_objective(objective_text, self.player)
+        self.counter_heaps = {}
+        for quest in self.active_quests:
+            position = self.positions[quest]
+            for counter, threshold, objective in quest.counter_objectives:
+                if objective not in quest.completed_objectives:
+                    self.counter_heaps.setdefault(counter, []).append((threshold, position, objective))
+        for heap in self.counter_heaps.values():
+            heapq.heapify(heap)
+
+
+
+    def fork(self, player=None):
+        """
+        Return a copy of the manager for a new game session.
+
+        Every quest is forked so that progress is not shared between sessions.
+        Completion callbacks are not copied.
+
+        Args:
+            player: The player object of the new session (optional).
+
+        Returns:
+            QuestManager: The new quest manager.
+        """
+        manager = QuestManager(player)
+        manager.output = self.output
+        manager.objective_index = self.objective_index
+        manager.dependents = self.dependents
+        manager.missing_prerequisites = self.missing_prerequisites.copy()
+        manager.counter_heaps = {counter: heap.copy() for counter, heap in self.counter_heaps.items()}
+        forked = {}
+        for quest in self.quests:
+            forked[id(quest)] = quest.fork()
+            forked[id(quest)].manager = manager
+            manager.positions[forked[id(quest)]] = len(manager.quests)
+            manager.quests.append(forked[id(quest)])
+        manager.all_quests = {title: forked[id(quest)] for title, quest in self.all_quests.items()}
+        manager.active_quests = ActiveQuests(forked[id(quest)] for quest in self.active_quests)
+        return manager
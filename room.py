@@ -4,8 +4,139 @@
 
 This module defines the Room class which represents a location in the game world.
 Rooms can contain items, characters, and connections to other rooms via exits.
+
+Exits are stored in a fixed array with one slot per canonical direction.
+DIRECTION_LEXICON maps every accepted spelling of a direction to its slot, so
+resolving a movement is one dictionary lookup followed by one array index.
+
+Rendered views of a room are cached and tagged with the version of the room,
+a counter that grows whenever its exits, items or characters change.
 """
 
+from types import MappingProxyType
+
+# The canonical directions, in slot order.
+DIRECTIONS = ("N", "E", "S", "O", "U", "D")
+
+# The accepted spellings of each canonical direction.
+DIRECTION_SYNONYMS = {
+    "N": ("n", "nord", "north"),
+    "E": ("e", "est", "east"),
+    "S": ("s", "sud", "south"),
+    "O": ("o", "ouest", "w", "west"),
+    "U": ("u", "up", "haut", "monter"),
+    "D": ("d", "down", "bas", "descendre"),
+}
+
+# Every spelling of a direction (lower case, upper case and capitalized) mapped to its slot.
+DIRECTION_LEXICON = {
+    spelling: slot
+    for slot, direction in enumerate(DIRECTIONS)
+    for synonym in DIRECTION_SYNONYMS[direction]
+    for spelling in (synonym, synonym.upper(), synonym.capitalize())
+}
+
+
+
+class VersionedDict(dict):
+    """
+    This class is a dict that counts its changes, so that views built from it
+    can tell whether they are out of date.
+
+    Attributes:
+        version (int): The number of changes so far.
+
+    Examples:
+
+    >>> characters = VersionedDict()
+    >>> characters["Hagrid"] = "Hagrid"
+    >>> characters.pop("Hagrid")
+    'Hagrid'
+    >>> characters.version
+    2
+    """
+
+    version = 0
+
+
+    def __setitem__(self, key, value):
+        """ Set an entry and count the change. """
+        super().__setitem__(key, value)
+        self.version += 1
+
+
+
+    def __delitem__(self, key):
+        """ Delete an entry and count the change. """
+        super().__delitem__(key)
+        self.version += 1
+
+
+
+    def pop(self, *args):
+        """ Remove an entry, counting the change, and return its value. """
+        self.version += 1
+        return super().pop(*args)
+
+
+
+    def popitem(self):
+        """ Remove the last entry, counting the change, and return it. """
+        self.version += 1
+        return super().popitem()
+
+
+
+    def setdefault(self, key, default=None):
+        """ Return an entry, setting it first (and counting the change) if it is missing. """
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+
+
+    def update(self, *args, **kwargs):
+        """ Update the entries and count the change. """
+        super().update(*args, **kwargs)
+        self.version += 1
+
+
+
+    def clear(self):
+        """ Remove every entry and count the change. """
+        super().clear()
+        self.version += 1
+
+
+
+def resolve_direction(token):
+    """
+    Return the slot of a direction, whatever its spelling.
+
+    Args:
+        token (str or int): A direction spelling (e.g. "N", "nord", "Up") or a slot.
+
+    Returns:
+        int or None: The slot of the direction, None if it is not a direction.
+
+    Examples:
+
+    >>> resolve_direction("Ouest") == resolve_direction("O")
+    True
+    >>> DIRECTIONS[resolve_direction("down")]
+    'D'
+    >>> resolve_direction("Escalier") is None
+    True
+    """
+    if isinstance(token, int):
+        return token if 0 <= token < len(DIRECTIONS) else None
+    slot = DIRECTION_LEXICON.get(token)
+    if slot is None:
+        slot = DIRECTION_LEXICON.get(token.lower())
+    return slot
+
+
+
 class Room:
     """
     Represents a room/location in the game world.
@@ -19,10 +150,17 @@ class Room:
     
     Attributes:
         name (str): The name of the room.
+        id (int): The id of the room in its WorldGraph, None until the graph is built.
         description (str): A text description of what the room looks like.
-        exits (dict): Dictionary mapping directions to adjacent Room objects.
-        inventory (dict): Dictionary mapping item names to Item objects in this room.
-        characters (dict): Dictionary mapping character names to Character objects in this room.
+        exit_slots (list): The adjacent Room in each direction slot, None where there is no exit.
+        exit_order (list): The slots of the exits, in the order they were defined.
+        neighbours (list): The adjacent rooms, in slot order.
+        exits (MappingProxyType): Read-only mapping of canonical directions to adjacent Room objects
+                      (built from exit_slots; change exits with set_exit, or assign a dict to replace them all).
+        inventory (dict): Dictionary mapping item names to Item objects in this room
+                          (a VersionedDict, or an InventoryView of the session's item locations).
+        characters (VersionedDict): Dictionary mapping character names to Character objects in this room.
+        version (int): A counter that grows whenever the exits, items or characters change.
     """
 
 
@@ -40,20 +178,138 @@ class Room:
         and can be populated after the room is created.
         """
         self.name = name
+        self.id = None
         self.description = description
-        self.exits = {}
-        self.inventory = {}
-        self.characters = {}
+        self.exit_slots = [None] * len(DIRECTIONS)
+        self.exit_order = []
+        self.neighbours = []
+        self.inventory = VersionedDict()
+        self.characters = VersionedDict()
+        self._exits_version = 0
+        self._render_cache = {}
     
 
 
+    # Define the fork method.
+    def fork(self, inventory=None):
+        """
+        Return a copy of the room for a new game session.
+
+        The name and description are shared with the original. The copy gets
+        no characters or exits, which are wired by the caller.
+
+        Args:
+            inventory: The inventory of the copy, usually a view of the
+                       session's item locations (default: a copy of this one).
+
+        Returns:
+            Room: The new room.
+        """
+        room = Room(self.name, self.description)
+        room.inventory = inventory if inventory is not None else VersionedDict(self.inventory)
+        return room
+
+
+
+    @property
+    def version(self):
+        """
+        Return the version of the room: the sum of the change counters of its
+        exits, inventory and characters, so it grows with every change.
+        """
+        return self._exits_version + self.inventory.version + self.characters.version
+
+
+
+    def _cached(self, key, render):
+        """
+        Return a rendered view of the room, rendering it only if the room has
+        changed since it was last rendered.
+
+        Args:
+            key (str): The name of the view.
+            render (function): A function returning the view.
+        """
+        version = self.version
+        cached = self._render_cache.get(key)
+        if cached is None or cached[0] != version:
+            cached = (version, render())
+            self._render_cache[key] = cached
+        return cached[1]
+
+
+
+    # Define the exits property.
+    @property
+    def exits(self):
+        """
+        Return a read-only mapping of canonical directions to adjacent rooms,
+        in the order the exits were defined.
+
+        The mapping is built from the exit slots, so it cannot be written to:
+        use set_exit to change one exit, or assign a dict to replace them all.
+
+        Examples:
+
+        >>> hall, kitchen = Room("Hall", "un hall"), Room("Kitchen", "une cuisine")
+        >>> hall.exits = {"nord": kitchen}
+        >>> hall.exits == {"N": kitchen}
+        True
+        >>> hall.exits["S"] = kitchen
+        Traceback (most recent call last):
+        ...
+        TypeError: 'mappingproxy' object does not support item assignment
+        """
+        return MappingProxyType({DIRECTIONS[slot]: self.exit_slots[slot] for slot in self.exit_order})
+
+
+
+    @exits.setter
+    def exits(self, exits):
+        """
+        Replace every exit of the room.
+
+        Args:
+            exits (dict): Dictionary mapping directions (any spelling) to adjacent rooms.
+        """
+        self.exit_slots = [None] * len(DIRECTIONS)
+        self.exit_order = []
+        for direction, room in exits.items():
+            self.set_exit(direction, room)
+
+
+
+    # Define the set_exit method.
+    def set_exit(self, direction, room):
+        """
+        Connect the room to another room in the given direction.
+
+        Args:
+            direction (str or int): A direction spelling or slot.
+            room (Room): The adjacent room, or None to remove the exit.
+        """
+        slot = resolve_direction(direction)
+        if slot is None:
+            raise ValueError(f"Direction inconnue : {direction}")
+        self.exit_slots[slot] = room
+        # A new list, the order may be shared with the rooms forked from this one
+        if room is None:
+            self.exit_order = [other for other in self.exit_order if other != slot]
+        elif slot not in self.exit_order:
+            self.exit_order = self.exit_order + [slot]
+        self.neighbours = [neighbour for neighbour in self.exit_slots if neighbour is not None]
+        self._exits_version += 1
+
+
+
     # Define the get_exit method.
     def get_exit(self, direction):
         """
         Get the room connected in the given direction.
         
         Args:
-            direction (str): A direction code (e.g., 'N', 'S', 'E', 'O', 'U', 'D').
+            direction (str or int): A direction slot, or a direction spelling
+                                    (e.g., 'N', 'S', 'E', 'O', 'U', 'D', 'nord').
         
         Returns:
             Room or None: The connected room if an exit exists in that direction,
@@ -61,10 +317,11 @@ class Room:
         """
 
         # Return the room in the given direction if it exists.
-        if direction in self.exits.keys():
-            return self.exits[direction]
-        else:
-            return None
+        if not isinstance(direction, int):
+            direction = resolve_direction(direction)
+            if direction is None:
+                return None
+        return self.exit_slots[direction]
     
 
 
@@ -75,14 +332,16 @@ class Room:
         
         Returns:
             str: A string in the format "Sorties: N, E, S, O" showing all directions
-                 with available exits, comma-separated.
+                 with available exits, comma-separated, in the order they were defined.
+
+        Examples:
+
+        >>> hall, kitchen, cellar = Room("Hall", "un hall"), Room("Kitchen", "une cuisine"), Room("Cellar", "une cave")
+        >>> hall.exits = {"U": kitchen, "D": cellar, "O": kitchen}
+        >>> hall.get_exit_string()
+        'Sorties: U, D, O'
         """
-        exit_string = "Sorties: " 
-        for exit in self.exits.keys():
-            if self.exits.get(exit) is not None:
-                exit_string += exit + ", "
-        exit_string = exit_string.strip(", ")
-        return exit_string
+        return ("Sorties: " + ", ".join(DIRECTIONS[slot] for slot in self.exit_order)).rstrip()
 
 
 
@@ -98,7 +357,50 @@ class Room:
                  - The list of available exits
                  - Additional newlines for formatting
         """
-        return f"\nVous êtes {self.description}\n\n{self.get_exit_string()}\n"
+        return self._cached("long_description",
+                            lambda: f"\nVous êtes {self.description}\n\n{self.get_exit_string()}\n")
+
+
+
+    # Return what 'look' shows in this room.
+    def get_look_lines(self):
+        """
+        Get what the 'look' command shows: the long description, the items and
+        the characters of the room.
+
+        Returns:
+            tuple: The (text, kind) messages to write, in order.
+
+        Examples:
+
+        >>> from item import Item
+        >>> hall = Room("Hall", "dans un hall.")
+        >>> hall.inventory["key"] = Item("key", "Une clé.", 0.1)
+        >>> hall.get_look_lines()[2]
+        ('key : Une clé. (poids: 0.1 kg)', 'info')
+        >>> hall.get_look_lines() is hall.get_look_lines()
+        True
+        """
+        return self._cached("look", self._render_look)
+
+
+
+    def _render_look(self):
+        """ Render the messages of the 'look' command. """
+        lines = [(self.get_long_description(), "room")]
+        if self.inventory:
+            lines.append(("Objets présents dans la pièce :\n", "info"))
+            lines.extend((str(item), "info") for item in self.inventory.values())
+            lines.append(("\n", "info"))
+        else:
+            lines.append(("Il n'y a pas d'objet ici.\n", "info"))
+        if self.characters:
+            lines.append(("Personnages présents dans la pièce :\n", "info"))
+            lines.extend((str(character), "info") for character in self.characters.values())
+            lines.append(("\n", "info"))
+        else:
+            lines.append(("Il n'y a personne ici.\n", "info"))
+        return tuple(lines)
     
 
     
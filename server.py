@@ -0,0 +1,386 @@
+# Description: GameServer class
+
+"""Server module.
+
+This module defines a TCP line server built on asyncio. Every connection gets
+its own Session (and so its own Game), and every line received is played as
+one command through Game.process_command. All sessions share one thread and
+one event loop, so a single process can host thousands of players.
+
+Protocol: the server asks for the player name, then sends the output of each
+command followed by a "> " prompt. Lines are UTF-8 encoded.
+
+With a journal (see the journal module), the sessions survive a restart: the
+unfinished ones are recovered when the server starts and resumed when their
+player connects again with the same name and the resume code given with the
+welcome message. A name can only be used by one connection at a time.
+
+A command that raises an exception is logged and answered with an error
+line, the connection and the session go on.
+
+With metrics (see the metrics module), every session records its commands in
+the same Metrics object, served over HTTP on --metrics-port and/or written to
+--metrics-file every --metrics-interval seconds and at shutdown.
+
+The sampling profiler (see the profiler module) is toggled by SIGUSR2, or by
+a player line "/admin <token> profile start|stop|status" when the server is
+started with --admin-token. Profiles are written to --profile-dir.
+
+Usage: python server.py [--host HOST] [--port PORT] [--idle-timeout SECONDS]
+                        [--journal DIR] [--checkpoint-interval N]
+                        [--metrics-port PORT] [--metrics-file FILE]
+                        [--metrics-interval SECONDS] [--admin-token TOKEN]
+                        [--profile-dir DIR] [--profile-interval SECONDS]
+"""
+
+import argparse
+import asyncio
+import hmac
+import logging
+import signal
+
+from journal import Journal
+from metrics import Metrics, start_endpoint
+from profiler import TOGGLE_SIGNAL, SamplingProfiler
+from session import Session
+
+logger = logging.getLogger(__name__)
+
+
+class GameServer:
+    """
+    This class hosts many game sessions behind one asyncio TCP server.
+
+    Attributes:
+        host (str): The address to listen on.
+        port (int): The port to listen on (0 picks a free port, updated by start).
+        idle_timeout (float): Seconds without a line before a connection is closed.
+        template (WorldTemplate): The world sessions are forked from (default: the process-wide one).
+        sessions (dict): The active sessions, by session id.
+        journal (Journal): The journal of the sessions, None to keep them in memory only.
+        parked (dict): The unfinished sessions without a connection, by session id (their resume code).
+        metrics (Metrics): The metrics every session records its commands in, None for none.
+        profiler (SamplingProfiler): The profiler of the admin command.
+        admin_token (str): The token of the admin command, None to disable it.
+        profile_dir (str): The directory the profiles are written to.
+
+    Methods:
+        __init__(self, host="127.0.0.1", port=8765, idle_timeout=300.0, template=None, journal=None, metrics=None,
+                 profiler=None, admin_token=None, profile_dir="profiles"): The constructor.
+        start(self): Recover the journaled sessions and start listening.
+        serve_forever(self): Serve until close is called.
+        close(self): Stop accepting connections and close every session gracefully.
+        play(self, session, command): Play a command and return its output, logging any error.
+        admin(self, line): Run an admin command and return its answer.
+        profile(self, action): Start, stop or describe the sampling profiler.
+    """
+
+    PROMPT = b"> "
+    NAME_PROMPT = "\nEntrez votre nom: "
+    IDLE_MESSAGE = "\nVous êtes resté inactif trop longtemps. Au revoir !\n"
+    SHUTDOWN_MESSAGE = "\nLe serveur s'arrête. Au revoir !\n"
+    RESUME_MESSAGE = "\nBon retour {name} ! Votre partie reprend où vous l'aviez laissée.\n"
+    RESUME_CODE_MESSAGE = "\nVotre code de reprise: {code}\nGardez-le pour reprendre cette partie plus tard.\n"
+    RESUME_CODE_PROMPT = "\nCode de reprise (vide pour une nouvelle partie): "
+    RESUME_DENIED = "\nCode de reprise invalide. Au revoir !\n"
+    NAME_IN_USE = "\nCe nom est déjà utilisé par un joueur connecté. Au revoir !\n"
+    ERROR_MESSAGE = "\nUne erreur interne est survenue, la commande n'a pas pu être terminée.\n"
+    ADMIN_PREFIX = "/admin "
+    ADMIN_DENIED = "\nCommande d'administration refusée.\n"
+    ADMIN_USAGE = "\nUsage: /admin <jeton> profile start|stop|status\n"
+
+
+    def __init__(self, host="127.0.0.1", port=8765, idle_timeout=300.0, template=None, journal=None, metrics=None,
+                 profiler=None, admin_token=None, profile_dir="profiles"):
+        """ Initialize the server with its address, idle timeout, world template, journal, metrics and profiler. """
+        self.host = host
+        self.port = port
+        self.idle_timeout = idle_timeout
+        self.template = template
+        self.sessions = {}
+        self.journal = journal
+        self.parked = {}
+        self.metrics = metrics
+        self.profiler = profiler if profiler is not None else SamplingProfiler()
+        self.admin_token = admin_token
+        self.profile_dir = profile_dir
+        self._server = None
+        self._connections = {}
+        self._names = set()
+        self._closed = asyncio.Event()
+
+
+
+    async def start(self):
+        """ Recover the journaled sessions, start listening and record the actual port. """
+        if self.journal is not None:
+            for session_id in self.journal.session_ids():
+                session = self.journal.recover(session_id, template=self.template)
+                if session.finished:
+                    self.journal.discard(session_id)
+                else:
+                    self.parked[session.session_id] = session
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+
+
+    async def serve_forever(self):
+        """ Serve connections until close is called. """
+        if self._server is None:
+            await self.start()
+        await self._closed.wait()
+
+
+
+    async def close(self):
+        """
+        Stop accepting connections, tell every connected player and wait for
+        their handlers to finish.
+        """
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for task, writer in list(self._connections.items()):
+            self._send(writer, self.SHUTDOWN_MESSAGE)
+            task.cancel()
+        await asyncio.gather(*self._connections, return_exceptions=True)
+        if self.journal is not None:
+            self.journal.close()
+        self._closed.set()
+
+
+
+    async def _readline(self, reader):
+        """
+        Read one line, waiting at most idle_timeout seconds.
+
+        Returns:
+            str or None: The decoded line, or None on timeout or end of stream.
+        """
+        try:
+            line = await asyncio.wait_for(reader.readline(), self.idle_timeout)
+        except asyncio.TimeoutError:
+            return None
+        if not line:
+            return None
+        return line.decode("utf-8", errors="replace").strip()
+
+
+
+    def _send(self, writer, text):
+        """ Write text to a connection without waiting. """
+        if text and not writer.is_closing():
+            writer.write(text.encode("utf-8"))
+
+
+
+    async def _handle(self, reader, writer):
+        """ Run one session for the lifetime of a connection. """
+        task = asyncio.current_task()
+        self._connections[task] = writer
+        session = None
+        claimed = None
+        try:
+            self._send(writer, self.NAME_PROMPT)
+            await writer.drain()
+            name = await self._readline(reader)
+            if not name:
+                return
+            if name in self._names:
+                self._send(writer, self.NAME_IN_USE)
+                return
+            self._names.add(name)
+            claimed = name
+
+            code = ""
+            if any(parked.player_name == name for parked in self.parked.values()):
+                self._send(writer, self.RESUME_CODE_PROMPT)
+                await writer.drain()
+                code = await self._readline(reader)
+                if code is None:
+                    return
+            if code:
+                session = self.parked.get(code)
+                if session is None or not hmac.compare_digest(session.player_name, name):
+                    session = None
+                    self._send(writer, self.RESUME_DENIED)
+                    return
+                del self.parked[code]
+                self.journal.open(session)
+                welcome = self.RESUME_MESSAGE.format(name=name) + session.game.player.current_room.get_long_description()
+            else:
+                session = Session(name, template=self.template, journal=self.journal)
+                welcome = session.welcome
+                if self.journal is not None:
+                    welcome += self.RESUME_CODE_MESSAGE.format(code=session.session_id)
+            session.game.set_metrics(self.metrics)
+            self.sessions[session.session_id] = session
+            self._send(writer, welcome)
+            writer.write(self.PROMPT)
+            await writer.drain()
+
+            while not session.finished:
+                command = await self._readline(reader)
+                if command is None:
+                    self._send(writer, self.IDLE_MESSAGE)
+                    break
+                if command.startswith(self.ADMIN_PREFIX):
+                    self._send(writer, self.admin(command))
+                    writer.write(self.PROMPT)
+                    await writer.drain()
+                    continue
+                self._send(writer, self.play(session, command))
+                if not session.finished:
+                    writer.write(self.PROMPT)
+                await writer.drain()
+        except (asyncio.CancelledError, ConnectionError):
+            pass
+        finally:
+            if session is not None:
+                self.sessions.pop(session.session_id, None)
+                if self.journal is not None:
+                    # Keep an unfinished session for the next connection of its player
+                    if session.finished:
+                        try:
+                            self.journal.discard(session.session_id)
+                        except (ValueError, OSError):
+                            logger.exception("Impossible de supprimer le journal de la session %s", session.session_id)
+                    else:
+                        self.parked[session.session_id] = session
+            self._names.discard(claimed)
+            self._connections.pop(task, None)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, asyncio.CancelledError):
+                pass
+
+
+
+    def play(self, session, command):
+        """
+        Play one command of a session and return the output to send back.
+
+        An exception raised by the game is logged and answered with an error
+        line, together with what the command wrote before failing.
+        """
+        try:
+            return session.send(command).output
+        except Exception:
+            logger.exception("Erreur de la commande %r de la session %s", command, session.session_id)
+            return session.game.output.flush() + self.ERROR_MESSAGE
+
+
+
+    def admin(self, line):
+        """
+        Run an admin command: "/admin <token> profile start|stop|status".
+
+        Args:
+            line (str): The line sent by a player.
+
+        Returns:
+            str: The answer to send back.
+        """
+        words = line.split()
+        if self.admin_token is None or len(words) < 2 or not hmac.compare_digest(words[1], self.admin_token):
+            return self.ADMIN_DENIED
+        if len(words) == 4 and words[2] == "profile" and words[3] in ("start", "stop", "status"):
+            return self.profile(words[3])
+        return self.ADMIN_USAGE
+
+
+
+    def profile(self, action):
+        """
+        Start, stop or describe the sampling profiler.
+
+        Args:
+            action (str): "start", "stop" (and write the profile to profile_dir) or "status".
+
+        Returns:
+            str: The answer to send back.
+        """
+        if action == "start":
+            if self.profiler.running:
+                return "\nLe profilage est déjà en cours.\n"
+            self.profiler.toggle(self.profile_dir)
+            return "\nProfilage démarré.\n"
+        if action == "stop":
+            if not self.profiler.running:
+                return "\nLe profilage n'est pas en cours.\n"
+            return f"\nProfil écrit dans {self.profiler.toggle(self.profile_dir)} ({self.profiler.samples} échantillons).\n"
+        state = "en cours" if self.profiler.running else "arrêté"
+        return f"\nProfilage {state}, {self.profiler.samples} échantillons.\n"
+
+
+
+async def write_metrics(metrics, path, interval):
+    """ Write the metrics to a file every interval seconds, until cancelled. """
+    while True:
+        await asyncio.sleep(interval)
+        metrics.write(path)
+
+
+
+async def run_server(host, port, idle_timeout, journal=None, metrics_port=None, metrics_file=None,
+                     metrics_interval=15.0, admin_token=None, profile_dir="profiles", profile_interval=0.005):
+    """ Run a server until SIGINT or SIGTERM, then shut it down gracefully. """
+    metrics = Metrics() if metrics_port is not None or metrics_file else None
+    server = GameServer(host, port, idle_timeout, journal=journal, metrics=metrics,
+                        profiler=SamplingProfiler(profile_interval), admin_token=admin_token,
+                        profile_dir=profile_dir)
+    logging.basicConfig(format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    await server.start()
+    print(f"Serveur en écoute sur {server.host}:{server.port}")
+    endpoint = writer = None
+    if metrics_port is not None:
+        endpoint = await start_endpoint(metrics, host, metrics_port)
+        print(f"Métriques sur http://{host}:{endpoint.sockets[0].getsockname()[1]}/metrics")
+    if metrics_file:
+        writer = asyncio.ensure_future(write_metrics(metrics, metrics_file, metrics_interval))
+
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signum, lambda: asyncio.ensure_future(server.close()))
+        except NotImplementedError:
+            pass
+    if TOGGLE_SIGNAL is not None:
+        loop.add_signal_handler(TOGGLE_SIGNAL,
+                                lambda: print(server.profile("stop" if server.profiler.running else "start").strip()))
+    await server.serve_forever()
+
+    if endpoint is not None:
+        endpoint.close()
+        await endpoint.wait_closed()
+    if writer is not None:
+        writer.cancel()
+        metrics.write(metrics_file)
+
+
+
+def main():
+    # Parse the command line and run the server
+    parser = argparse.ArgumentParser(description="Serveur multi-joueurs de L'Ombre de Poudlard.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--idle-timeout", type=float, default=300.0)
+    parser.add_argument("--journal", default=None, help="répertoire du journal des parties")
+    parser.add_argument("--checkpoint-interval", type=int, default=100)
+    parser.add_argument("--metrics-port", type=int, default=None, help="port HTTP des métriques (GET /metrics)")
+    parser.add_argument("--metrics-file", default=None, help="fichier des métriques au format Prometheus")
+    parser.add_argument("--metrics-interval", type=float, default=15.0)
+    parser.add_argument("--admin-token", default=None, help="jeton de la commande /admin")
+    parser.add_argument("--profile-dir", default="profiles", help="répertoire des profils")
+    parser.add_argument("--profile-interval", type=float, default=0.005, help="secondes entre deux échantillons")
+    args = parser.parse_args()
+    journal = Journal(args.journal, args.checkpoint_interval) if args.journal else None
+    asyncio.run(run_server(args.host, args.port, args.idle_timeout, journal,
+                           args.metrics_port, args.metrics_file, args.metrics_interval,
+                           args.admin_token, args.profile_dir, args.profile_interval))
+
+
+if __name__ == "__main__":
+    main()
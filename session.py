@@ -0,0 +1,257 @@
+# Description: Session class
+
+"""Session module.
+
+This module defines a headless driver around the Game class. A session is
+created with an injected player name and is fed commands one at a time or as
+an iterable. It never reads from stdin and never writes to stdout: the game
+writes to an output sink which is flushed once per command into a CommandResult.
+"""
+
+import uuid
+
+import snapshot
+from game import Game
+from output import BufferedSink
+
+
+class CommandResult:
+    """
+    This class represents the outcome of one command sent to a session.
+
+    Attributes:
+        command (str): The raw command string that was sent.
+        command_word (str): The command word if it was executed, None otherwise.
+        output: Everything the game wrote while running the command, as returned
+                by the flush of the session's sink (text for a BufferedSink,
+                events for an EventSink).
+        finished (bool): Whether the game has ended after this command.
+        outcome (str): "win" or "lose" once the game has ended that way, None otherwise.
+
+    Methods:
+        __init__(self, command, command_word, output, finished, outcome): The constructor.
+        __repr__(self): Return a short representation of the result.
+    """
+
+
+    def __init__(self, command, command_word, output, finished, outcome):
+        """ Initialize a result with the command, its output and the game state. """
+        self.command = command
+        self.command_word = command_word
+        self.output = output
+        self.finished = finished
+        self.outcome = outcome
+
+
+
+    def __repr__(self):
+        """ Return a short representation of the result. """
+        return f"CommandResult({self.command!r}, executed={self.command_word!r}, finished={self.finished})"
+
+
+
+class Session:
+    """
+    This class drives a Game without any terminal I/O.
+
+    Attributes:
+        session_id (str): A unique identifier for the session.
+        game (Game): The game driven by the session.
+        welcome: The output written when the session started.
+        commands (list): The commands sent to the session, in order.
+        player_name (str): The name of the player.
+
+    Methods:
+        __init__(self, player_name, session_id=None, output=None, template=None, seed=None, journal=None): The constructor.
+        send(self, command): Run one command and return its CommandResult.
+        run(self, commands): Run an iterable of commands until the game ends.
+        transcript(self): Return the seed and commands needed to replay the session.
+        replay(cls, transcript, output=None, template=None): Rebuild a session from a transcript.
+        snapshot(self): Return the state of the game as a binary snapshot.
+        restore(cls, data, session_id=None, output=None, template=None): Rebuild a session from a snapshot.
+        finished: Whether the game has ended.
+
+    Examples:
+
+    >>> session = Session("Bob")
+    >>> "Bienvenue Bob" in session.welcome
+    True
+    >>> result = session.send("go E")
+    >>> result.command_word
+    'go'
+    >>> "train" in result.output
+    True
+    >>> session.send("dance").command_word is None
+    True
+
+    A session started with a seed is deterministic and can be replayed:
+
+    >>> session = Session("Bob", seed=42)
+    >>> outputs = [result.output for result in session.run(["go E", "go E", "look"])]
+    >>> replayed = Session.replay(session.transcript())
+    >>> [result.output for result in replayed.run(session.transcript()["commands"])] == outputs
+    True
+
+    A session can be parked as a snapshot and restored later:
+
+    >>> restored = Session.restore(session.snapshot())
+    >>> restored.send("go E").output == session.send("go E").output
+    True
+    """
+
+
+    def __init__(self, player_name, session_id=None, output=None, template=None, seed=None, journal=None):
+        """
+        Create a new game for the given player and collect the welcome output.
+
+        Args:
+            player_name (str): The name of the player.
+            session_id (str): An identifier for the session (default: a random one).
+            output (OutputSink): The sink the game writes to (default: a
+                                 BufferedSink without stream).
+            template (WorldTemplate): The world to play in (default: the
+                                      process-wide template).
+            seed (int): The seed of the game, for a deterministic session.
+            journal (Journal): The journal the accepted commands are written
+                               to, for crash recovery (default: none).
+        """
+        self.session_id = session_id if session_id is not None else uuid.uuid4().hex
+        self.game = Game(output if output is not None else BufferedSink(), seed)
+        self.game.session_id = self.session_id
+        self.commands = []
+        self.player_name = player_name
+
+        self.game.setup(player_name, template)
+        self.game.print_welcome()
+        self.welcome = self.game.output.flush()
+        if journal is not None:
+            journal.open(self)
+
+
+
+    @property
+    def finished(self):
+        """ Return True if the game has ended. """
+        return self.game.finished
+
+
+
+    def send(self, command):
+        """
+        Run one command and return its result.
+
+        Commands sent after the game has ended are not executed.
+
+        Args:
+            command (str): The raw command string.
+
+        Returns:
+            CommandResult: The structured result of the command.
+        """
+        if self.game.finished:
+            return CommandResult(command, None, self.game.output.flush(), True, self.game.outcome)
+
+        self.commands.append(command)
+        command_word = self.game.play_turn(command)
+        return CommandResult(command, command_word, self.game.output.flush(),
+                             self.game.finished, self.game.outcome)
+
+
+
+    def run(self, commands):
+        """
+        Run an iterable of commands, stopping as soon as the game ends.
+
+        Args:
+            commands (iterable): The raw command strings.
+
+        Returns:
+            list: The CommandResult of every command that was run.
+        """
+        results = []
+        for command in commands:
+            if self.game.finished:
+                break
+            results.append(self.send(command))
+        return results
+
+
+
+    def transcript(self):
+        """
+        Return everything needed to replay the session.
+
+        Returns:
+            dict: The player name, the seed of the game and the commands sent.
+        """
+        return {
+            "player_name": self.player_name,
+            "seed": self.game.seed,
+            "commands": list(self.commands),
+        }
+
+
+
+    @classmethod
+    def replay(cls, transcript, output=None, template=None):
+        """
+        Create a new session with the player name and seed of a transcript.
+
+        The commands of the transcript are not run: send them with run to
+        reproduce the original session step by step.
+
+        Args:
+            transcript (dict): A transcript returned by Session.transcript.
+            output (OutputSink): The sink the game writes to.
+            template (WorldTemplate): The world to play in.
+
+        Returns:
+            Session: The new session.
+        """
+        return cls(transcript["player_name"], output=output, template=template,
+                   seed=transcript["seed"])
+
+
+
+    def snapshot(self):
+        """
+        Return the state of the game as a binary snapshot (see the snapshot module).
+
+        Returns:
+            bytes: The snapshot.
+        """
+        return snapshot.dumps(self.game)
+
+
+
+    @classmethod
+    def restore(cls, data, session_id=None, output=None, template=None):
+        """
+        Create a session from a snapshot returned by Session.snapshot.
+
+        The restored session starts with no command: its transcript replays
+        from the snapshot, not from the start of the game.
+
+        Args:
+            data (bytes): The snapshot.
+            session_id (str): An identifier for the session (default: a random one).
+            output (OutputSink): The sink the game writes to.
+            template (WorldTemplate): The world the snapshot was taken in.
+
+        Returns:
+            Session: The restored session.
+
+        Raises:
+            ValueError: If the data is not a valid snapshot of this world.
+        """
+        session = cls.__new__(cls)
+        session.session_id = session_id if session_id is not None else uuid.uuid4().hex
+        session.game = Game(output if output is not None else BufferedSink())
+        session.game.session_id = session.session_id
+        session.commands = []
+        session.game.setup("", template)
+        session.game.output.flush()
+        snapshot.loads(session.game, data)
+        session.player_name = session.game.player.name
+        session.welcome = ""
+        return session
@@ -0,0 +1,404 @@
+# Description: Monte Carlo playthrough simulator
+
+"""Simulator module.
+
+This module runs automated agents through the real Game engine and aggregates
+the results. Playthroughs are independent and deterministic (each one uses
+its own seed), so they are spread over a ProcessPoolExecutor in chunks: every
+worker aggregates its chunk locally and only the aggregates are sent back,
+which keeps the run scaling linearly with the number of cores.
+
+Agents decide the next command from the game state:
+
+- RandomWalkAgent: random moves, pickups and conversations.
+- ExploreAgent: a greedy explorer that talks to everyone and takes everything.
+- PolicyAgent: any module-level function (game, rng) -> command.
+
+Usage: python simulator.py [-n N] [--agent random|explore] [--workers W]
+                           [--max-turns T] [--seed S] [--json]
+"""
+
+import argparse
+import json
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+from game import Game
+from output import NullSink
+
+
+class RandomWalkAgent:
+    """
+    This class plays random commands that make sense in the current room.
+
+    Attributes:
+        rng (random.Random): The generator the agent draws its choices from.
+        activate_all (bool): Whether the first command activates every quest.
+
+    Methods:
+        __init__(self, rng, activate_all=True): The constructor.
+        next_command(self, game): Return the next command to play.
+    """
+
+
+    def __init__(self, rng, activate_all=True):
+        """ Initialize the agent with its random generator. """
+        self.rng = rng
+        self.activate_all = activate_all
+        self._started = False
+
+
+
+    def next_command(self, game):
+        """
+        Return the next command to play.
+
+        Args:
+            game (Game): The game being played.
+
+        Returns:
+            str: The command.
+        """
+        if not self._started:
+            self._started = True
+            if self.activate_all:
+                return "activate_all"
+
+        player = game.player
+        room = player.current_room
+        roll = self.rng.random()
+        if roll < 0.15 and room.inventory:
+            return "take " + self.rng.choice(list(room.inventory))
+        if roll < 0.30 and room.characters:
+            return "talk " + self.rng.choice(list(room.characters))
+        if roll < 0.40 and player.inventory:
+            verb = self.rng.choice(["read", "use", "drop"])
+            return f"{verb} {self.rng.choice(list(player.inventory))}"
+        if room.exits:
+            return "go " + self.rng.choice(list(room.exits))
+        return "look"
+
+
+
+class PolicyAgent:
+    """
+    This class plays the commands chosen by a policy function.
+
+    Attributes:
+        rng (random.Random): The generator passed to the policy.
+        policy (function): A function (game, rng) -> command.
+
+    Methods:
+        __init__(self, rng, policy): The constructor.
+        next_command(self, game): Return the next command to play.
+    """
+
+
+    def __init__(self, rng, policy):
+        """ Initialize the agent with its random generator and policy. """
+        self.rng = rng
+        self.policy = policy
+
+
+
+    def next_command(self, game):
+        """ Return the command chosen by the policy. """
+        return self.policy(game, self.rng)
+
+
+
+class ExploreAgent:
+    """
+    This class activates every quest, talks to everyone it meets, picks up
+    everything it can carry and prefers exits towards rooms it has not visited.
+
+    Attributes:
+        rng (random.Random): The generator used to break ties.
+
+    Methods:
+        __init__(self, rng): The constructor.
+        next_command(self, game): Return the next command to play.
+    """
+
+
+    def __init__(self, rng):
+        """ Initialize the agent with its random generator. """
+        self.rng = rng
+        self._started = False
+        self._talked = set()
+
+
+
+    def next_command(self, game):
+        """ Return the next command to play. """
+        if not self._started:
+            self._started = True
+            return "activate_all"
+
+        player = game.player
+        room = player.current_room
+        for name in room.characters:
+            if (room.name, name) not in self._talked:
+                self._talked.add((room.name, name))
+                return "talk " + name
+
+        for name, item in room.inventory.items():
+            if player.can_carry(item):
+                return "take " + name
+
+        exits = list(room.exits.items())
+        if not exits:
+            return "look"
+        fresh = [direction for direction, target in exits if target not in player.visited]
+        return "go " + self.rng.choice(fresh or [direction for direction, _ in exits])
+
+
+
+# The agents that can be selected by name on the command line.
+AGENTS = {
+    "random": (RandomWalkAgent, {}),
+    "explore": (ExploreAgent, {}),
+}
+
+
+
+def play_once(seed, agent_class, agent_kwargs, max_turns):
+    """
+    Play one game with an agent and return what happened.
+
+    Args:
+        seed (int): The seed of the game and of the agent.
+        agent_class (type): The agent class.
+        agent_kwargs (dict): Extra arguments of the agent class.
+        max_turns (int): The number of commands after which the game is abandoned.
+
+    Returns:
+        dict: The outcome ("win", "lose", "quit" or "timeout"), the losing room,
+              the number of turns, the turn each quest was completed and the
+              number of turns each character was met.
+    """
+    game = Game(NullSink(), seed)
+    game.setup("Agent")
+    agent = agent_class(random.Random(seed ^ 0x5EED), **agent_kwargs)
+    quests = game.player.quest_manager.quests
+
+    quest_turns = {}
+    encounters = {}
+    turns = 0
+    while not game.finished and turns < max_turns:
+        turns += 1
+        game.play_turn(agent.next_command(game))
+        for quest in quests:
+            if quest.is_completed and quest.title not in quest_turns:
+                quest_turns[quest.title] = turns
+        for name in game.player.current_room.characters:
+            encounters[name] = encounters.get(name, 0) + 1
+
+    if game.outcome is not None:
+        outcome = game.outcome
+    elif game.finished:
+        outcome = "quit"
+    else:
+        outcome = "timeout"
+    return {
+        "outcome": outcome,
+        "room": game.player.current_room.name if outcome == "lose" else None,
+        "turns": turns,
+        "quest_turns": quest_turns,
+        "encounters": encounters,
+    }
+
+
+
+class SimulationStats:
+    """
+    This class aggregates playthrough results. Stats of different chunks can
+    be merged, so each worker only sends back its aggregate.
+
+    Attributes:
+        playthroughs (int): The number of playthroughs.
+        outcomes (dict): The number of playthroughs per outcome.
+        losses (dict): The number of losses per losing room.
+        turns (int): The total number of turns played.
+        quest_completions (dict): The number of completions per quest.
+        quest_turns (dict): The total completion turn per quest.
+        encounters (dict): The total number of turns each character was met.
+        met (dict): The number of playthroughs in which each character was met.
+
+    Methods:
+        __init__(self): The constructor.
+        add(self, result): Add the result of one playthrough.
+        merge(self, other): Add the aggregates of other stats.
+        report(self): Return the rates and averages as a dict.
+        format(self): Return the report as text.
+    """
+
+
+    def __init__(self):
+        """ Initialize empty aggregates. """
+        self.playthroughs = 0
+        self.outcomes = {}
+        self.losses = {}
+        self.turns = 0
+        self.quest_completions = {}
+        self.quest_turns = {}
+        self.encounters = {}
+        self.met = {}
+
+
+
+    def add(self, result):
+        """ Add the result of one playthrough. """
+        self.playthroughs += 1
+        self.turns += result["turns"]
+        _count(self.outcomes, result["outcome"], 1)
+        if result["room"] is not None:
+            _count(self.losses, result["room"], 1)
+        for title, turn in result["quest_turns"].items():
+            _count(self.quest_completions, title, 1)
+            _count(self.quest_turns, title, turn)
+        for name, count in result["encounters"].items():
+            _count(self.encounters, name, count)
+            _count(self.met, name, 1)
+
+
+
+    def merge(self, other):
+        """ Add the aggregates of other stats. """
+        self.playthroughs += other.playthroughs
+        self.turns += other.turns
+        for mine, theirs in ((self.outcomes, other.outcomes), (self.losses, other.losses),
+                             (self.quest_completions, other.quest_completions),
+                             (self.quest_turns, other.quest_turns),
+                             (self.encounters, other.encounters), (self.met, other.met)):
+            for key, value in theirs.items():
+                _count(mine, key, value)
+
+
+
+    def report(self):
+        """
+        Return the rates and averages.
+
+        Returns:
+            dict: The win and loss rates, the loss rate per room, the
+                  completion rate and mean completion turn per quest and the
+                  encounter frequencies per character.
+        """
+        n = self.playthroughs or 1
+        return {
+            "playthroughs": self.playthroughs,
+            "mean_turns": self.turns / n,
+            "outcome_rates": {outcome: count / n for outcome, count in sorted(self.outcomes.items())},
+            "loss_rates_by_room": {room: count / n for room, count in sorted(self.losses.items())},
+            "quests": {
+                title: {
+                    "completion_rate": count / n,
+                    "mean_turns_to_complete": self.quest_turns[title] / count,
+                }
+                for title, count in sorted(self.quest_completions.items())
+            },
+            "encounters": {
+                name: {
+                    "met_rate": self.met[name] / n,
+                    "turns_per_playthrough": count / n,
+                }
+                for name, count in sorted(self.encounters.items())
+            },
+        }
+
+
+
+    def format(self):
+        """ Return the report as text. """
+        report = self.report()
+        lines = [f"Parties jouées: {report['playthroughs']} (tours moyens: {report['mean_turns']:.1f})"]
+        lines.append("Issues:")
+        for outcome, rate in report["outcome_rates"].items():
+            lines.append(f"  {outcome:<10} {rate:7.2%}")
+        for room, rate in report["loss_rates_by_room"].items():
+            lines.append(f"    perdu dans {room:<14} {rate:7.2%}")
+        lines.append("Quêtes terminées:")
+        for title, stats in report["quests"].items():
+            lines.append(f"  {title:<28} {stats['completion_rate']:7.2%}  tour moyen {stats['mean_turns_to_complete']:.1f}")
+        lines.append("Rencontres:")
+        for name, stats in report["encounters"].items():
+            lines.append(f"  {name:<12} rencontré {stats['met_rate']:7.2%}  tours/partie {stats['turns_per_playthrough']:.2f}")
+        return "\n".join(lines)
+
+
+
+def _count(counts, key, value):
+    """ Add value to counts[key]. """
+    counts[key] = counts.get(key, 0) + value
+
+
+
+def run_chunk(seeds, agent_class, agent_kwargs, max_turns):
+    """
+    Play one game per seed and aggregate the results.
+
+    Returns:
+        SimulationStats: The aggregates of the chunk.
+    """
+    stats = SimulationStats()
+    for seed in seeds:
+        stats.add(play_once(seed, agent_class, agent_kwargs, max_turns))
+    return stats
+
+
+
+def simulate(playthroughs, agent="random", max_turns=500, workers=None, seed=0, chunk_size=None):
+    """
+    Run many playthroughs across a process pool and aggregate them.
+
+    Args:
+        playthroughs (int): The number of playthroughs.
+        agent (str or tuple): An agent name from AGENTS, or an (agent class, kwargs) pair.
+        max_turns (int): The number of commands after which a playthrough is abandoned.
+        workers (int): The number of processes (default: the number of cores).
+                       With 1 worker everything runs in the current process.
+        seed (int): The seed of the first playthrough, the others follow.
+        chunk_size (int): The number of playthroughs per task (default: a few tasks per worker).
+
+    Returns:
+        SimulationStats: The aggregates of every playthrough.
+    """
+    agent_class, agent_kwargs = AGENTS[agent] if isinstance(agent, str) else agent
+    workers = workers or os.cpu_count() or 1
+    seeds = range(seed, seed + playthroughs)
+    if workers == 1:
+        return run_chunk(seeds, agent_class, agent_kwargs, max_turns)
+
+    chunk_size = chunk_size or max(1, playthroughs // (workers * 4))
+    chunks = [seeds[i:i + chunk_size] for i in range(0, playthroughs, chunk_size)]
+    stats = SimulationStats()
+    with ProcessPoolExecutor(workers) as pool:
+        futures = [pool.submit(run_chunk, chunk, agent_class, agent_kwargs, max_turns) for chunk in chunks]
+        for future in futures:
+            stats.merge(future.result())
+    return stats
+
+
+
+def main():
+    # Parse the command line, run the simulation and print the report
+    parser = argparse.ArgumentParser(description="Simulateur de parties de L'Ombre de Poudlard.")
+    parser.add_argument("-n", "--playthroughs", type=int, default=1000)
+    parser.add_argument("--agent", choices=sorted(AGENTS), default="random")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--max-turns", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="afficher le rapport en JSON")
+    args = parser.parse_args()
+
+    stats = simulate(args.playthroughs, args.agent, args.max_turns, args.workers, args.seed)
+    if args.json:
+        print(json.dumps(stats.report(), ensure_ascii=False, indent=2))
+    else:
+        print(stats.format())
+
+
+if __name__ == "__main__":
+    main()
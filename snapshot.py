@@ -0,0 +1,368 @@
+# Description: Session snapshots
+
+"""Snapshot module.
+
+This module saves the whole state of a game to a compact, versioned binary
+format and restores it. Only the mutable state is written: the static world
+(descriptions, exits, items, quests, dialogues) comes from the world template
+the game was set up from, so a snapshot is about 3 KB (most of it the state
+of the random number generator) and restoring it only updates the forked
+world in place, in a fraction of a millisecond.
+
+A snapshot holds, in order (little-endian):
+
+- the header: the magic b"TBAS", the format version and the sizes of the
+  world (rooms, items, quests, characters) it was taken from
+- the game: finished, outcome and the room saved in the portoloin
+- the player: name, current room, move count, history, visited rooms, rewards
+- the item locations
+- the quests: active, completed and completed objectives of each quest,
+  the active quests in activation order and the missing prerequisites
+- the characters: room and dialogue position of each character
+- the state of the game's random number generator
+
+Rooms and objectives are written as their ids and positions.
+"""
+
+import os
+import random
+import re
+import struct
+from array import array
+
+from inventory import NOWHERE, PLAYER
+from quest import ActiveQuests
+
+MAGIC = b"TBAS"
+# The version of the format, increased whenever the layout changes.
+VERSION = 2
+
+_HEADER = struct.Struct("<4sHIIII")
+_GAME = struct.Struct("<BBi")
+_PLAYER = struct.Struct("<iI")
+_QUEST = struct.Struct("<BBH")
+_CHARACTER = struct.Struct("<iI")
+_OUTCOMES = (None, "win", "lose")
+
+# The directory of the saves made with the save command.
+SAVE_DIR = "saves"
+_SAVE_NAME = re.compile(r"[\w-]+")
+
+
+def dumps(game):
+    """
+    Return the snapshot of a game.
+
+    Args:
+        game (Game): A game set up from a world template.
+
+    Returns:
+        bytes: The snapshot.
+
+    Examples:
+
+    >>> from game import Game
+    >>> from output import NullSink
+    >>> game = Game(NullSink(), seed=1)
+    >>> game.setup("Bob")
+    >>> for command in ["take valise", "go E", "talk Hermione"]:
+    ...     _ = game.play_turn(command)
+    >>> data = dumps(game)
+    >>> other = Game(NullSink(), seed=2)
+    >>> other.setup("Alice")
+    >>> loads(other, data)
+    >>> other.player.name, other.player.current_room.name, list(other.player.inventory)
+    ('Bob', 'Train', ['valise'])
+    >>> dumps(other) == data
+    True
+    """
+    player = game.player
+    manager = player.quest_manager
+    parts = [_HEADER.pack(MAGIC, VERSION, len(game.rooms), len(game.items.catalog),
+                          len(manager.quests), len(game.characters))]
+
+    saved_room = getattr(game, "saved_room", None)
+    parts.append(_GAME.pack(game.finished, _OUTCOMES.index(game.outcome),
+                            -1 if saved_room is None else saved_room.id))
+
+    parts.append(_string(player.name))
+    parts.append(_PLAYER.pack(player.current_room.id, player.move_count))
+    parts.append(_ints([room.id for room in player.history]))
+    parts.append(_ints(sorted(room.id for room in player.visited)))
+    parts.append(_count(len(player.rewards)))
+    parts.extend(_string(reward) for reward in player.rewards)
+
+    parts.append(_ints(game.items.holders))
+
+    for quest in manager.quests:
+        positions = {objective: i for i, objective in reversed(list(enumerate(quest.objectives)))}
+        completed = [positions[objective] for objective in quest.completed_objectives]
+        parts.append(_QUEST.pack(quest.is_active, quest.is_completed, len(completed)))
+        parts.append(struct.pack(f"<{len(completed)}H", *completed))
+    parts.append(_ints([manager.positions[quest] for quest in manager.active_quests]))
+    parts.append(_ints(manager.missing_prerequisites))
+
+    for character in game.characters:
+        room = character.current_room
+        parts.append(_CHARACTER.pack(-1 if room is None else room.id, character.msg_index))
+
+    version, state, gauss = game.rng.getstate()
+    parts.append(struct.pack(f"<B{len(state)}I", version, *state))
+    parts.append(struct.pack("<Bd", gauss is not None, gauss or 0.0))
+    return b"".join(parts)
+
+
+
+def loads(game, data):
+    """
+    Restore a snapshot into a game set up from the same world template.
+
+    The whole snapshot is decoded and checked before the game is touched, so
+    a snapshot that is rejected leaves the game as it was.
+
+    Args:
+        game (Game): The game to restore, its player and world are updated in place.
+        data (bytes): A snapshot returned by dumps.
+
+    Raises:
+        ValueError: If the data is not a snapshot of this version or of this
+                    world, or if it is truncated or corrupted.
+
+    Examples:
+
+    >>> from game import Game
+    >>> from output import NullSink
+    >>> game = Game(NullSink(), seed=1)
+    >>> game.setup("Bob")
+    >>> data = dumps(game)
+    >>> corrupted = bytearray(data)
+    >>> corrupted[_HEADER.size + _GAME.size + 7:_HEADER.size + _GAME.size + 11] = struct.pack("<i", 999)
+    >>> loads(game, bytes(corrupted))
+    Traceback (most recent call last):
+    ...
+    ValueError: Sauvegarde corrompue: pièce 999 inconnue.
+    >>> _ = game.play_turn("go E")
+    >>> loads(game, data[:-100])  # doctest: +ELLIPSIS
+    Traceback (most recent call last):
+    ...
+    ValueError: Sauvegarde tronquée ou corrompue (...).
+    >>> game.player.current_room.name, game.player.move_count
+    ('Train', 1)
+    """
+    reader = _Reader(data)
+    magic, version, rooms, items, quests, characters = reader.unpack(_HEADER)
+    if magic != MAGIC:
+        raise ValueError("Ce fichier n'est pas une sauvegarde.")
+    if version != VERSION:
+        raise ValueError(f"Version de sauvegarde {version} non prise en charge (attendue: {VERSION}).")
+    player = game.player
+    manager = player.quest_manager
+    if (rooms, items, quests, characters) != (len(game.rooms), len(game.items.catalog),
+                                              len(manager.quests), len(game.characters)):
+        raise ValueError("Cette sauvegarde a été faite dans un autre monde.")
+
+    # Decode and check everything first
+    room_of = _RoomIds(game.rooms)
+    finished, outcome, saved_room = reader.unpack(_GAME)
+    if outcome >= len(_OUTCOMES):
+        raise ValueError(f"Sauvegarde corrompue: issue {outcome} inconnue.")
+    saved_room = None if saved_room == -1 else room_of(saved_room)
+
+    name = reader.string()
+    current_room, move_count = reader.unpack(_PLAYER)
+    current_room = room_of(current_room)
+    history = [room_of(room_id) for room_id in reader.ints()]
+    visited = {room_of(room_id) for room_id in reader.ints()}
+    rewards = [reader.string() for _ in range(reader.count())]
+
+    holders = array("l", reader.ints())
+    if len(holders) != items:
+        raise ValueError("Sauvegarde corrompue: le nombre d'objets ne correspond pas.")
+    for holder in holders:
+        if holder not in (PLAYER, NOWHERE):
+            room_of(holder)
+
+    quest_states = []
+    for quest in manager.quests:
+        is_active, is_completed, count = reader.unpack(_QUEST)
+        positions = reader.unpack_format(f"<{count}H")
+        if any(i >= len(quest.objectives) for i in positions):
+            raise ValueError(f"Sauvegarde corrompue: objectif inconnu dans la quête '{quest.title}'.")
+        quest_states.append((bool(is_active), bool(is_completed), [quest.objectives[i] for i in positions]))
+    active_positions = reader.ints()
+    if any(not 0 <= i < quests for i in active_positions):
+        raise ValueError("Sauvegarde corrompue: quête active inconnue.")
+    missing_prerequisites = list(reader.ints())
+    if len(missing_prerequisites) != quests or any(count < 0 for count in missing_prerequisites):
+        raise ValueError("Sauvegarde corrompue: prérequis des quêtes invalides.")
+
+    character_states = []
+    for _ in game.characters:
+        room_id, msg_index = reader.unpack(_CHARACTER)
+        character_states.append((None if room_id == -1 else room_of(room_id), msg_index))
+
+    rng_state = (reader.unpack_format("<B")[0], reader.unpack_format("<625I"))
+    has_gauss, gauss = reader.unpack_format("<Bd")
+    rng_state += (gauss if has_gauss else None,)
+    try:
+        random.Random().setstate(rng_state)
+    except (ValueError, TypeError) as error:
+        raise ValueError(f"Sauvegarde corrompue: état du générateur invalide ({error}).") from None
+    if reader.offset != len(data):
+        raise ValueError("Sauvegarde corrompue: données en trop.")
+
+    # Then update the game in one pass
+    game.finished = bool(finished)
+    game.outcome = _OUTCOMES[outcome]
+    game.saved_room = saved_room
+
+    player.name = name
+    player.current_room = current_room
+    player.move_count = move_count
+    player.history.clear()
+    player.history.extend(history)
+    player.visited = visited
+    player.rewards = rewards
+
+    game.items.restore(holders)
+    player.inventory_weight = sum(item.weight for item in player.inventory.values())
+
+    for quest, (is_active, is_completed, completed_objectives) in zip(manager.quests, quest_states):
+        quest.is_active = is_active
+        quest.is_completed = is_completed
+        quest.completed_objectives = completed_objectives
+    manager.active_quests = ActiveQuests(manager.quests[i] for i in active_positions)
+    manager.missing_prerequisites = missing_prerequisites
+    manager.rebuild_counter_heaps()
+
+    for room in game.rooms:
+        room.characters.clear()
+    for character, (room, msg_index) in zip(game.characters, character_states):
+        character.current_room = room
+        character.msg_index = msg_index
+        if room is not None:
+            room.characters[character.name] = character
+
+    game.rng.setstate(rng_state)
+
+
+
+def save(game, path):
+    """ Write the snapshot of a game to a file. """
+    with open(path, "wb") as file:
+        file.write(dumps(game))
+
+
+
+def load(game, path):
+    """ Restore a game from a snapshot file written by save. """
+    with open(path, "rb") as file:
+        loads(game, file.read())
+
+
+
+def save_path(name):
+    """
+    Return the file of a save made with the save command.
+
+    Args:
+        name (str): The name of the save (letters, digits, '_' and '-').
+
+    Returns:
+        str: The path of the file in SAVE_DIR.
+
+    Raises:
+        ValueError: If the name is not a valid save name.
+    """
+    if not _SAVE_NAME.fullmatch(name):
+        raise ValueError(f"Nom de sauvegarde invalide: '{name}'.")
+    return os.path.join(SAVE_DIR, f"{name}.sav")
+
+
+
+def _count(count):
+    """ Return the encoding of a count. """
+    return struct.pack("<I", count)
+
+
+
+def _ints(values):
+    """ Return the encoding of a list of ints: its length, then the values. """
+    values = list(values)
+    return struct.pack(f"<I{len(values)}i", len(values), *values)
+
+
+
+def _string(text):
+    """ Return the encoding of a string: its length in bytes, then its UTF-8 bytes. """
+    encoded = text.encode("utf-8")
+    return _count(len(encoded)) + encoded
+
+
+
+class _RoomIds:
+    """ This class returns the room of a room id read from a snapshot, checking its range. """
+
+
+    def __init__(self, rooms):
+        """ Initialize the lookup over the rooms of a game. """
+        self.rooms = rooms
+
+
+
+    def __call__(self, room_id):
+        """ Return the room of an id, raise ValueError if there is no such room. """
+        if not 0 <= room_id < len(self.rooms):
+            raise ValueError(f"Sauvegarde corrompue: pièce {room_id} inconnue.")
+        return self.rooms[room_id]
+
+
+
+class _Reader:
+    """ This class reads the values of a snapshot one after the other. """
+
+
+    def __init__(self, data):
+        """ Initialize the reader at the start of the data. """
+        self.data = data
+        self.offset = 0
+
+
+
+    def unpack(self, layout):
+        """ Read the fields of a struct.Struct. """
+        try:
+            values = layout.unpack_from(self.data, self.offset)
+        except struct.error as error:
+            raise ValueError(f"Sauvegarde tronquée ou corrompue ({error}).") from None
+        self.offset += layout.size
+        return values
+
+
+
+    def unpack_format(self, fmt):
+        """ Read the fields of a struct format. """
+        return self.unpack(struct.Struct(fmt))
+
+
+
+    def count(self):
+        """ Read a count. """
+        return self.unpack_format("<I")[0]
+
+
+
+    def ints(self):
+        """ Read a list of ints. """
+        return self.unpack_format(f"<{self.count()}i")
+
+
+
+    def string(self):
+        """ Read a string. """
+        length = self.count()
+        text = self.data[self.offset:self.offset + length]
+        if len(text) != length:
+            raise ValueError("Sauvegarde tronquée ou corrompue.")
+        self.offset += length
+        return bytes(text).decode("utf-8")
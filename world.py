@@ -0,0 +1,140 @@
+# Description: WorldTemplate class
+
+"""World module.
+
+This module defines the WorldTemplate class. A template is built once per
+process and every new game session is forked from it: only the mutable state
+(item locations, character positions, dialogue cursors and quest progress) is
+copied, while descriptions, exits layout, items and commands stay shared.
+Item locations are a single ItemLocations table per session.
+"""
+
+from graph import WorldGraph
+from inventory import ItemLocations, PLAYER
+from player import Player
+from quest import QuestManager
+from worldfile import DEFAULT_WORLD
+
+
+class WorldTemplate:
+    """
+    This class represents a compiled game world that sessions are forked from.
+
+    Attributes:
+        rooms (list): The template rooms, in the order of Game.rooms.
+        graph (WorldGraph): The integer graph of the rooms and exits, shared by every session.
+        characters (list): The (character, room index) pairs of every character.
+        items (ItemLocations): The items and their starting locations.
+        commands (dict): The commands, shared by every session.
+        directions (dict): The direction lexicon, shared by every session.
+        start_index (int): The index of the starting room.
+        main_quest (str): The title of the quest that wins the game.
+        losing_rooms (frozenset): The names of the rooms that lose the game.
+        victory (tuple): The lines shown when the game is won.
+        quest_manager (QuestManager): The template quests, none of them active.
+
+    Methods:
+        __init__(self, game, quest_manager): The constructor.
+        compile(cls, game_class, world_file=DEFAULT_WORLD): Build a world once and return its template.
+        fork(self, game, player_name): Populate a game with a fresh copy of the world.
+
+    Examples:
+
+    >>> from game import Game
+    >>> template = Game.default_template()
+    >>> first, second = Game(), Game()
+    >>> template.fork(first, "Alice")
+    >>> template.fork(second, "Bob")
+    >>> first.rooms[0] is second.rooms[0]
+    False
+    >>> first.rooms[0].description is second.rooms[0].description
+    True
+    """
+
+
+    def __init__(self, game, quest_manager):
+        """
+        Initialize the template from a game whose world has been built.
+
+        Args:
+            game (Game): A game on which build_world has been called.
+            quest_manager (QuestManager): The quest manager filled by build_world.
+        """
+        self.rooms = game.rooms
+        self.graph = WorldGraph.from_rooms(game.rooms)
+        self.characters = [
+            (character, i)
+            for i, room in enumerate(game.rooms)
+            for character in room.characters.values()
+        ]
+        self.items = ItemLocations.from_rooms(game.rooms)
+        self.commands = game.commands
+        self.directions = game.directions
+        self.start_index = game.start_room.id
+        self.main_quest = game.main_quest
+        self.losing_rooms = game.losing_rooms
+        self.victory = game.victory
+        self.quest_manager = quest_manager
+
+
+
+    @classmethod
+    def compile(cls, game_class, world_file=DEFAULT_WORLD):
+        """
+        Build a world once and return its template.
+
+        Args:
+            game_class (type): The Game class providing build_world.
+            world_file (str): The world file to build (see the worldfile module).
+
+        Returns:
+            WorldTemplate: The compiled template.
+        """
+        game = game_class()
+        quest_manager = QuestManager()
+        game.build_world(quest_manager, world_file)
+        return cls(game, quest_manager)
+
+
+
+    def fork(self, game, player_name):
+        """
+        Populate a game with a fresh copy of the world.
+
+        Args:
+            game (Game): The game to populate.
+            player_name (str): The name of the player.
+        """
+        items = self.items.fork()
+        rooms = [room.fork(items.view(i)) for i, room in enumerate(self.rooms)]
+        graph = self.graph.bind(rooms)
+        for room, original in zip(rooms, self.rooms):
+            for slot, i in graph.exit_pairs(room.id):
+                room.exit_slots[slot] = rooms[i]
+            room.exit_order = original.exit_order
+            room.neighbours = [neighbour for neighbour in room.exit_slots if neighbour is not None]
+        characters = []
+        movable_characters = []
+        for character, i in self.characters:
+            forked = character.fork(rooms[i])
+            characters.append(forked)
+            if forked.movable_status():
+                movable_characters.append(forked)
+
+        game.rooms = rooms
+        game.graph = graph
+        game.items = items
+        game.commands = self.commands
+        game.directions = self.directions
+        game.start_room = rooms[self.start_index]
+        game.main_quest = self.main_quest
+        game.losing_rooms = self.losing_rooms
+        game.victory = self.victory
+        game.characters = characters
+        game.movable_characters = movable_characters
+
+        player = Player(player_name)
+        player.enter(game.start_room)
+        player.inventory = items.view(PLAYER)
+        player.quest_manager = self.quest_manager.fork(player)
+        game.player = player
@@ -0,0 +1,406 @@
+# Description: World files
+
+"""World file module.
+
+This module loads the content of a world (rooms, exits, items, characters and
+quests) from a declarative JSON file, so that several adventures can ship as
+data. The commands and the direction lexicon stay in the code.
+
+A world file is validated against the schema below before anything is built;
+every error names the faulty entry (e.g. "rooms[3].exits.X") in a ValueError.
+
+    {
+      "format": 1,
+      "name": "L'Ombre de Poudlard",
+      "start": "<room name>",
+      "main_quest": "<quest title>",        winning it wins the game
+      "losing_rooms": ["<room name>", ...], entering one loses the game
+      "victory": ["<line>", ...],           shown when the game is won
+      "rooms": [{"name", "description",
+                 "exits": {"<direction>": "<room name>"},
+                 "items": [{"name", "description", "weight"}],
+                 "characters": [{"name", "description", "msgs", "movable"}]}],
+      "quests": [{"title", "description", "objectives", "reward", "prerequisites"}]
+    }
+
+Parsing and validating are only done once per content: the validated world
+is compiled to a marshal cache file keyed by the SHA-256 of the world file,
+so a warm start only hashes the file and unmarshals the cache. The cache is
+rebuilt whenever the file changes, and ignored if it cannot be read.
+"""
+
+import hashlib
+import json
+import marshal
+import os
+import re
+import struct
+
+from character import Character
+from item import Item
+from quest import DEPENDENCY_OBJECTIVE_PREFIX, Quest
+from room import DIRECTIONS, Room, resolve_direction
+
+# The version of the world file format.
+FORMAT = 1
+# The world played by default.
+DEFAULT_WORLD = os.path.join(os.path.dirname(os.path.abspath(__file__)), "worlds", "poudlard.json")
+# The directory of the compiled caches, next to the world files.
+CACHE_DIR = "__cache__"
+
+CACHE_MAGIC = b"TBAW"
+# The version of the cache layout, increased whenever it or the validated data changes.
+CACHE_VERSION = 2
+_CACHE_HEADER = struct.Struct("<4sH32s")
+
+# The lines shown when the game is won, for the worlds that do not define theirs.
+DEFAULT_VICTORY = [
+    "\n 🏆 Félicitations ! Vous avez sauvé Poudlard et remporté le jeu ! 🏆",
+    "Vous êtes désormais le Héros de Poudlard.🎖️🎖️🎖️",
+]
+
+_WORLD_KEYS = {"format": True, "name": True, "start": True, "main_quest": True,
+               "losing_rooms": False, "victory": False, "rooms": True, "quests": False}
+_ROOM_KEYS = {"name": True, "description": True, "exits": False, "items": False, "characters": False}
+_ITEM_KEYS = {"name": True, "description": True, "weight": True}
+_CHARACTER_KEYS = {"name": True, "description": True, "msgs": True, "movable": False}
+_QUEST_KEYS = {"title": True, "description": True, "objectives": False, "reward": False,
+               "prerequisites": False}
+
+
+def load(path=DEFAULT_WORLD, cache=True):
+    """
+    Return the validated content of a world file, from its cache when possible.
+
+    Args:
+        path (str): The world file.
+        cache (bool): Whether to read and write the compiled cache.
+
+    Returns:
+        dict: The validated world, see validate.
+
+    Raises:
+        ValueError: If the file is not a valid world.
+
+    Examples:
+
+    >>> world = load()
+    >>> world["start"], len(world["rooms"]), len(world["quests"])
+    ('Gare', 16, 9)
+    >>> load(cache=False) == world
+    True
+    """
+    with open(path, "rb") as file:
+        raw = file.read()
+    digest = hashlib.sha256(raw).digest()
+    cache_path = _cache_path(path, digest)
+    if cache:
+        world = _read_cache(cache_path, digest)
+        if world is not None:
+            return world
+
+    world = parse(raw, os.path.basename(path))
+    if cache:
+        _write_cache(cache_path, digest, world)
+    return world
+
+
+
+def parse(raw, source="<world>"):
+    """
+    Parse and validate the content of a world file.
+
+    Args:
+        raw (bytes or str): The JSON content.
+        source (str): The name of the content, for the error messages.
+
+    Returns:
+        dict: The validated world.
+
+    Raises:
+        ValueError: If the content is not a valid world.
+    """
+    try:
+        data = json.loads(raw)
+    except ValueError as error:
+        raise ValueError(f"{source}: JSON invalide ({error}).") from None
+    return validate(data)
+
+
+
+def validate(data):
+    """
+    Check a world against the schema and return it normalized.
+
+    Optional entries are filled in (no exits, items, characters, prerequisites
+    or reward, characters movable, DEFAULT_VICTORY), exits use the canonical
+    directions and weights are floats.
+
+    Args:
+        data (dict): The decoded world file.
+
+    Returns:
+        dict: The normalized world.
+
+    Raises:
+        ValueError: If the world does not follow the schema.
+
+    Examples:
+
+    >>> world = validate({"format": 1, "name": "W", "start": "A", "main_quest": "Q",
+    ...                   "rooms": [{"name": "A", "description": "a", "exits": {"nord": "B"}},
+    ...                             {"name": "B", "description": "b"}],
+    ...                   "quests": [{"title": "Q", "description": "q"}]})
+    >>> world["rooms"][0]["exits"], world["rooms"][1]["characters"]
+    ({'N': 'B'}, [])
+    >>> world["victory"] == DEFAULT_VICTORY
+    True
+    >>> validate(dict(world, victory=["Bravo !"]))["victory"]
+    ['Bravo !']
+    >>> world["rooms"][0]["exits"] = {"N": "C"}
+    >>> validate(world)
+    Traceback (most recent call last):
+    ...
+    ValueError: rooms[0].exits.N: la pièce 'C' n'existe pas.
+    """
+    _check_keys(data, _WORLD_KEYS, "monde")
+    if data["format"] != FORMAT:
+        raise ValueError(f"format: version {data['format']!r} non prise en charge (attendue: {FORMAT}).")
+    world = {
+        "format": FORMAT,
+        "name": _string(data["name"], "name"),
+        "start": _string(data["start"], "start"),
+        "main_quest": _string(data["main_quest"], "main_quest"),
+        "losing_rooms": [_string(name, f"losing_rooms[{i}]")
+                         for i, name in enumerate(_list(data.get("losing_rooms", []), "losing_rooms"))],
+        "victory": [_string(line, f"victory[{i}]")
+                    for i, line in enumerate(_list(data.get("victory", DEFAULT_VICTORY), "victory"))],
+        "rooms": [],
+        "quests": [],
+    }
+
+    room_names = set()
+    item_names = set()
+    character_names = set()
+    for i, room in enumerate(_list(data["rooms"], "rooms")):
+        where = f"rooms[{i}]"
+        _check_keys(room, _ROOM_KEYS, where)
+        name = _unique(_string(room["name"], f"{where}.name"), room_names, f"{where}.name", "pièce")
+        exits = {}
+        for direction, target in _dict(room.get("exits", {}), f"{where}.exits").items():
+            slot = resolve_direction(direction)
+            if slot is None:
+                raise ValueError(f"{where}.exits.{direction}: direction inconnue.")
+            if DIRECTIONS[slot] in exits:
+                raise ValueError(f"{where}.exits.{direction}: direction en double.")
+            exits[DIRECTIONS[slot]] = _string(target, f"{where}.exits.{direction}")
+        world["rooms"].append({
+            "name": name,
+            "description": _string(room["description"], f"{where}.description"),
+            "exits": exits,
+            "items": [_item(item, f"{where}.items[{j}]", item_names)
+                      for j, item in enumerate(_list(room.get("items", []), f"{where}.items"))],
+            "characters": [_character(character, f"{where}.characters[{j}]", character_names)
+                           for j, character in enumerate(_list(room.get("characters", []), f"{where}.characters"))],
+        })
+    if not world["rooms"]:
+        raise ValueError("rooms: le monde n'a aucune pièce.")
+
+    room_names = {room["name"] for room in world["rooms"]}
+    for i, room in enumerate(world["rooms"]):
+        for direction, target in room["exits"].items():
+            _known(target, room_names, f"rooms[{i}].exits.{direction}", "la pièce")
+    _known(world["start"], room_names, "start", "la pièce")
+    for i, name in enumerate(world["losing_rooms"]):
+        _known(name, room_names, f"losing_rooms[{i}]", "la pièce")
+
+    titles = set()
+    for i, quest in enumerate(_list(data.get("quests", []), "quests")):
+        world["quests"].append(_quest(quest, f"quests[{i}]", titles))
+    titles = {title.lower() for title in titles}
+    prefix = DEPENDENCY_OBJECTIVE_PREFIX.lower()
+    for i, quest in enumerate(world["quests"]):
+        for j, title in enumerate(quest["prerequisites"]):
+            _known(title.lower(), titles, f"quests[{i}].prerequisites[{j}]", "la quête", title)
+        for j, objective in enumerate(quest["objectives"]):
+            if objective.lower().startswith(prefix):
+                title = objective[len(prefix):]
+                _known(title.lower(), titles, f"quests[{i}].objectives[{j}]", "la quête", title)
+    _known(world["main_quest"].lower(), titles, "main_quest", "la quête", world["main_quest"])
+    return world
+
+
+
+def build(game, quest_manager, world):
+    """
+    Create the rooms, items, characters and quests of a validated world.
+
+    Args:
+        game (Game): The game receiving the rooms, start room, main quest, losing rooms and victory lines.
+        quest_manager (QuestManager): The quest manager receiving the quests.
+        world (dict): A world returned by load or validate.
+    """
+    rooms = {}
+    for data in world["rooms"]:
+        room = Room(data["name"], data["description"])
+        for item in data["items"]:
+            room.inventory[item["name"]] = Item(item["name"], item["description"], item["weight"])
+        for character in data["characters"]:
+            Character(character["name"], character["description"], room,
+                      character["msgs"], character["movable"])
+        rooms[room.name] = room
+        game.rooms.append(room)
+
+    for data in world["rooms"]:
+        rooms[data["name"]].exits = {direction: rooms[target] for direction, target in data["exits"].items()}
+
+    game.start_room = rooms[world["start"]]
+    game.main_quest = world["main_quest"]
+    game.losing_rooms = frozenset(world["losing_rooms"])
+    game.victory = tuple(world["victory"])
+    for data in world["quests"]:
+        quest_manager.add_quest(Quest(data["title"], data["description"], data["objectives"],
+                                      data["reward"], data["prerequisites"]))
+
+
+
+def _cache_path(path, digest):
+    """ Return the cache file of a world file content. """
+    directory, name = os.path.split(os.path.abspath(path))
+    stem = os.path.splitext(name)[0]
+    return os.path.join(directory, CACHE_DIR, f"{stem}.{digest.hex()[:16]}.bin")
+
+
+
+def _read_cache(cache_path, digest):
+    """ Return the world compiled in a cache file, None if it is missing or not valid. """
+    try:
+        with open(cache_path, "rb") as file:
+            data = file.read()
+        magic, version, cached_digest = _CACHE_HEADER.unpack_from(data)
+        if (magic, version, cached_digest) != (CACHE_MAGIC, CACHE_VERSION, digest):
+            return None
+        return marshal.loads(data[_CACHE_HEADER.size:])
+    except (OSError, struct.error, ValueError, EOFError, TypeError):
+        return None
+
+
+
+def _write_cache(cache_path, digest, world):
+    """ Write the cache of a world atomically and remove the caches of older contents. """
+    directory, name = os.path.split(cache_path)
+    # The caches of this world file only: <stem>.<16 hex digits>.bin, the stem may contain dots
+    older = re.compile(re.escape(name[:-len(".0123456789abcdef.bin")]) + r"\.[0-9a-f]{16}\.bin")
+    try:
+        os.makedirs(directory, exist_ok=True)
+        temporary = f"{cache_path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as file:
+            file.write(_CACHE_HEADER.pack(CACHE_MAGIC, CACHE_VERSION, digest))
+            file.write(marshal.dumps(world))
+        os.replace(temporary, cache_path)
+        for other in os.listdir(directory):
+            if older.fullmatch(other) and other != name:
+                os.remove(os.path.join(directory, other))
+    except OSError:
+        # A read-only install still works, it only parses the file every time
+        pass
+
+
+
+def _check_keys(data, keys, where):
+    """ Check that a dict has the required keys of the schema and no unknown key. """
+    _dict(data, where)
+    for key, required in keys.items():
+        if required and key not in data:
+            raise ValueError(f"{where}: la clé '{key}' est obligatoire.")
+    for key in data:
+        if key not in keys:
+            raise ValueError(f"{where}: clé inconnue '{key}'.")
+
+
+
+def _dict(value, where):
+    """ Return a value that must be an object. """
+    if not isinstance(value, dict):
+        raise ValueError(f"{where}: un objet est attendu.")
+    return value
+
+
+
+def _list(value, where):
+    """ Return a value that must be a list. """
+    if not isinstance(value, list):
+        raise ValueError(f"{where}: une liste est attendue.")
+    return value
+
+
+
+def _string(value, where):
+    """ Return a value that must be a non-empty string. """
+    if not isinstance(value, str) or not value:
+        raise ValueError(f"{where}: une chaîne non vide est attendue.")
+    return value
+
+
+
+def _unique(name, names, where, kind):
+    """ Record a name that must not be used twice (case-insensitive). """
+    if name.lower() in names:
+        raise ValueError(f"{where}: nom de {kind} en double '{name}'.")
+    names.add(name.lower())
+    return name
+
+
+
+def _known(key, keys, where, kind, name=None):
+    """ Check that an entry refers to something that exists. """
+    if key not in keys:
+        raise ValueError(f"{where}: {kind} '{name or key}' n'existe pas.")
+
+
+
+def _item(data, where, names):
+    """ Return a validated item. """
+    _check_keys(data, _ITEM_KEYS, where)
+    weight = data["weight"]
+    if isinstance(weight, bool) or not isinstance(weight, (int, float)) or weight < 0:
+        raise ValueError(f"{where}.weight: un nombre positif est attendu.")
+    return {
+        "name": _unique(_string(data["name"], f"{where}.name"), names, f"{where}.name", "objet"),
+        "description": _string(data["description"], f"{where}.description"),
+        "weight": float(weight),
+    }
+
+
+
+def _character(data, where, names):
+    """ Return a validated character. """
+    _check_keys(data, _CHARACTER_KEYS, where)
+    msgs = _list(data["msgs"], f"{where}.msgs")
+    if not msgs:
+        raise ValueError(f"{where}.msgs: le personnage doit avoir au moins un message.")
+    movable = data.get("movable", True)
+    if not isinstance(movable, bool):
+        raise ValueError(f"{where}.movable: un booléen est attendu.")
+    return {
+        "name": _unique(_string(data["name"], f"{where}.name"), names, f"{where}.name", "personnage"),
+        "description": _string(data["description"], f"{where}.description"),
+        "msgs": [_string(msg, f"{where}.msgs[{i}]") for i, msg in enumerate(msgs)],
+        "movable": movable,
+    }
+
+
+
+def _quest(data, where, titles):
+    """ Return a validated quest. """
+    _check_keys(data, _QUEST_KEYS, where)
+    reward = data.get("reward")
+    return {
+        "title": _unique(_string(data["title"], f"{where}.title"), titles, f"{where}.title", "quête"),
+        "description": _string(data["description"], f"{where}.description"),
+        "objectives": [_string(objective, f"{where}.objectives[{i}]")
+                       for i, objective in enumerate(_list(data.get("objectives", []), f"{where}.objectives"))],
+        "reward": None if reward is None else _string(reward, f"{where}.reward"),
+        "prerequisites": [_string(title, f"{where}.prerequisites[{i}]")
+                          for i, title in enumerate(_list(data.get("prerequisites", []), f"{where}.prerequisites"))],
+    }
@@ -0,0 +1,244 @@
+# Description: Procedural world generator
+
+"""World generator module.
+
+This module generates synthetic worlds of any size for scale testing. A
+generated world is a world file (see the worldfile module): it is validated
+and built into Room, Item, Character and Quest objects exactly like the
+Poudlard adventure, and can be compiled into a WorldTemplate.
+
+The rooms are laid out with one of these topologies, every exit having its
+opposite exit back:
+
+- grid: a square grid, exits N, E, S and O.
+- tree: a random tree, the longest routes grow with the log of the size.
+- small_world: a ring (E and O) with random shortcuts (N, S, U and D).
+- corridor: corridors of corridor_length rooms (E and O) hanging from a
+  spine (S and N), the longest routes grow with the size.
+
+Items and characters are spread uniformly over the rooms. Quests mix room,
+take and talk objectives and depend on earlier quests, so the dependency
+graph stays acyclic; the last quest is the main quest and completes the game.
+
+Usage: python worldgen.py ROOMS [--topology grid|tree|small_world|corridor]
+                           [--items N] [--characters N] [--quests N]
+                           [--seed S] [-o FILE]
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+
+import worldfile
+
+# The topologies that can be generated.
+TOPOLOGIES = ("grid", "tree", "small_world", "corridor")
+OPPOSITES = {"N": "S", "S": "N", "E": "O", "O": "E", "U": "D", "D": "U"}
+# The directory the command line writes generated worlds to.
+GENERATED_DIR = os.path.join(os.path.dirname(worldfile.DEFAULT_WORLD), "generated")
+
+
+def generate(rooms, items=None, characters=None, quests=None, topology="grid", seed=0,
+             corridor_length=50, shortcut_rate=0.1):
+    """
+    Generate a world.
+
+    Args:
+        rooms (int): The number of rooms.
+        items (int): The number of items (default: one for two rooms).
+        characters (int): The number of characters (default: one for ten rooms).
+        quests (int): The number of quests, the main quest included (default: one for a hundred rooms).
+        topology (str): The layout of the rooms, one of TOPOLOGIES.
+        seed (int): The seed of the generator, the same seed gives the same world.
+        corridor_length (int): The number of rooms of each corridor of the corridor topology.
+        shortcut_rate (float): The probability that a room of the small_world topology gets a shortcut.
+
+    Returns:
+        dict: The world, in the world file format.
+
+    Raises:
+        ValueError: If the topology is unknown or there is no room.
+
+    Examples:
+
+    >>> world = worldfile.validate(generate(100, topology="tree", seed=1))
+    >>> len(world["rooms"]), len(world["quests"]), world["main_quest"]
+    (100, 1, 'Quête finale')
+    >>> from graph import WorldGraph
+    >>> from game import Game
+    >>> from output import NullSink
+    >>> from quest import QuestManager
+    >>> game = Game(NullSink())
+    >>> worldfile.build(game, QuestManager(), world)
+    >>> len(WorldGraph.from_rooms(game.rooms).reachable(0))
+    100
+    """
+    if topology not in TOPOLOGIES:
+        raise ValueError(f"Topologie inconnue: '{topology}' (possibles: {', '.join(TOPOLOGIES)}).")
+    if rooms < 1:
+        raise ValueError("Le monde doit avoir au moins une pièce.")
+    items = rooms // 2 if items is None else items
+    characters = rooms // 10 if characters is None else characters
+    quests = max(1, rooms // 100) if quests is None else max(1, quests)
+    rng = random.Random(seed)
+
+    names = [f"Salle{i}" for i in range(rooms)]
+    exits = [{} for _ in range(rooms)]
+    if topology == "grid":
+        _grid(exits)
+    elif topology == "tree":
+        _tree(exits, rng)
+    elif topology == "small_world":
+        _small_world(exits, rng, shortcut_rate)
+    else:
+        _corridor(exits, corridor_length)
+
+    room_data = [
+        {"name": names[i], "description": f"dans la salle {i}.",
+         "exits": {direction: names[target] for direction, target in exits[i].items()},
+         "items": [], "characters": []}
+        for i in range(rooms)
+    ]
+    item_names = [f"objet{k}" for k in range(items)]
+    for name in item_names:
+        room_data[rng.randrange(rooms)]["items"].append(
+            {"name": name, "description": f"Un {name} de test.", "weight": round(rng.uniform(0.1, 3.0), 1)})
+    character_names = [f"Perso{k}" for k in range(characters)]
+    for name in character_names:
+        room_data[rng.randrange(rooms)]["characters"].append(
+            {"name": name, "description": f"{name}, un personnage de test.",
+             "msgs": [f"Bonjour, je suis {name}.", "Il fait beau aujourd'hui."],
+             "movable": rng.random() < 0.5})
+
+    quest_data = []
+    for q in range(quests - 1):
+        objectives = [f"Visiter {rng.choice(names)}"]
+        if item_names:
+            objectives.append(f"take {rng.choice(item_names)}")
+        if character_names:
+            objectives.append(f"talk à {rng.choice(character_names)}")
+        quest = {"title": f"Quête {q}", "description": f"La quête de test numéro {q}.",
+                 "objectives": objectives, "reward": f"Récompense {q}"}
+        if q and rng.random() < 0.3:
+            objectives.append(f"Compléter Quête {rng.randrange(q)}")
+        if q and rng.random() < 0.3:
+            quest["prerequisites"] = [f"Quête {rng.randrange(q)}"]
+        quest_data.append(quest)
+    final_objectives = [f"Compléter {quest['title']}" for quest in rng.sample(quest_data, min(3, len(quest_data)))]
+    quest_data.append({"title": "Quête finale", "description": "Terminer le monde de test.",
+                       "objectives": final_objectives or [f"Visiter {names[-1]}"],
+                       "reward": "Héros du monde de test"})
+
+    return {
+        "format": worldfile.FORMAT,
+        "name": f"Monde {topology} de {rooms} pièces (graine {seed})",
+        "start": names[0],
+        "main_quest": "Quête finale",
+        "losing_rooms": [],
+        "victory": ["\n 🏆 Félicitations ! Vous avez terminé le monde de test ! 🏆"],
+        "rooms": room_data,
+        "quests": quest_data,
+    }
+
+
+
+def write(world, path):
+    """ Write a world to a world file. """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(world, file, ensure_ascii=False, separators=(",", ":"))
+
+
+
+def _connect(exits, a, b, direction):
+    """ Connect two rooms both ways if the exits are free, return True if they were. """
+    opposite = OPPOSITES[direction]
+    if a == b or direction in exits[a] or opposite in exits[b]:
+        return False
+    exits[a][direction] = b
+    exits[b][opposite] = a
+    return True
+
+
+
+def _grid(exits):
+    """ Lay the rooms out on a square grid. """
+    width = math.isqrt(len(exits) - 1) + 1
+    for i in range(len(exits)):
+        if i % width + 1 < width and i + 1 < len(exits):
+            _connect(exits, i, i + 1, "E")
+        if i + width < len(exits):
+            _connect(exits, i, i + width, "S")
+
+
+
+def _tree(exits, rng):
+    """ Lay the rooms out as a random tree, each room hanging from an earlier one. """
+    directions = tuple(OPPOSITES)
+    open_rooms = [0]
+    for child in range(1, len(exits)):
+        k = rng.randrange(len(open_rooms))
+        parent = open_rooms[k]
+        free = [direction for direction in directions if direction not in exits[parent]]
+        _connect(exits, parent, child, rng.choice(free))
+        if len(free) == 1:
+            open_rooms[k] = open_rooms[-1]
+            open_rooms.pop()
+        open_rooms.append(child)
+
+
+
+def _small_world(exits, rng, shortcut_rate):
+    """ Lay the rooms out on a ring with random shortcuts. """
+    count = len(exits)
+    for i in range(count - 1):
+        _connect(exits, i, i + 1, "E")
+    if count > 2:
+        _connect(exits, count - 1, 0, "E")
+    for i in range(count):
+        if rng.random() < shortcut_rate:
+            target = rng.randrange(count)
+            if target not in exits[i].values():
+                for direction in ("N", "U", "S", "D"):
+                    if _connect(exits, i, target, direction):
+                        break
+
+
+
+def _corridor(exits, corridor_length):
+    """ Lay the rooms out as corridors hanging from a spine. """
+    corridor_length = max(1, corridor_length)
+    for i in range(len(exits)):
+        if i % corridor_length:
+            _connect(exits, i - 1, i, "E")
+        elif i:
+            _connect(exits, i - corridor_length, i, "S")
+
+
+
+def main():
+    # Parse the command line, generate the world and write it
+    parser = argparse.ArgumentParser(description="Générateur de mondes de test.")
+    parser.add_argument("rooms", type=int)
+    parser.add_argument("--topology", choices=TOPOLOGIES, default="grid")
+    parser.add_argument("--items", type=int, default=None)
+    parser.add_argument("--characters", type=int, default=None)
+    parser.add_argument("--quests", type=int, default=None)
+    parser.add_argument("--corridor-length", type=int, default=50)
+    parser.add_argument("--shortcut-rate", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", default=None,
+                        help="fichier du monde (par défaut: worlds/generated/<topologie>-<pièces>.json)")
+    args = parser.parse_args()
+
+    world = generate(args.rooms, args.items, args.characters, args.quests, args.topology,
+                     args.seed, args.corridor_length, args.shortcut_rate)
+    path = args.output or os.path.join(GENERATED_DIR, f"{args.topology}-{args.rooms}.json")
+    write(world, path)
+    print(f"{world['name']}: {path}")
+
+
+if __name__ == "__main__":
+    main()